@@ -0,0 +1,87 @@
+"""Compare la latence par appel de ModerationDB avec l'ancien mode « une connexion par appel ».
+
+Usage :
+    python benchmarks/bench_database.py [--iterations 2000]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cogs.database import ModerationDB
+
+
+def connect_per_call_get(db_path, user_id):
+    """Reproduit l'ancien comportement : ouverture et fermeture d'une connexion à chaque appel."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM moderators WHERE user_id = ?", (user_id,))
+    result = cursor.fetchone()
+    conn.close()
+    return result
+
+
+def connect_per_call_ban(db_path, user_id):
+    """Reproduit l'ancien /ban : lecture du quota, décrément puis insertion dans l'historique."""
+    for sql, params in (
+        ("SELECT * FROM moderators WHERE user_id = ?", (user_id,)),
+        ("UPDATE moderators SET ban_limit = ban_limit - 1 WHERE user_id = ?", (user_id,)),
+        ("INSERT INTO ban_history (moderator_id, banned_user_id, banned_user_name, reason) VALUES (?, ?, ?, ?)",
+         (user_id, 1, "bench", None)),
+    ):
+        conn = sqlite3.connect(db_path)
+        conn.execute(sql, params)
+        conn.commit()
+        conn.close()
+
+
+def pooled_ban(db, user_id):
+    db.get_moderator_data(user_id)
+    db.update_moderator_ban_limit(user_id, 0)
+    db.add_ban_to_history(user_id, 1, "bench", None)
+
+
+def measure(func, iterations):
+    """Retourne les latences (en µs) de ``iterations`` appels à ``func``."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"{label:<32} moyenne={statistics.mean(samples):9.1f}µs  "
+          f"médiane={statistics.median(samples):9.1f}µs  p99={p99:9.1f}µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        db = ModerationDB(db_path)
+        reset_date = (datetime.utcnow() + timedelta(days=30)).isoformat()
+        db.set_moderator_data(42, 10, 10, reset_date, "bench")
+
+        print(f"{args.iterations} itérations, SQLite {sqlite3.sqlite_version}\n")
+        report("get_moderator_data (connexion/appel)", measure(lambda: connect_per_call_get(db_path, 42), args.iterations))
+        report("get_moderator_data (pool)", measure(lambda: db.get_moderator_data(42), args.iterations))
+        report("/ban complet (connexion/appel)", measure(lambda: connect_per_call_ban(db_path, 42), args.iterations))
+        report("/ban complet (pool)", measure(lambda: pooled_ban(db, 42), args.iterations))
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Mesure le coût par appel de l'instrumentation (cogs.metrics), activée et désactivée.
+
+Usage :
+    python benchmarks/bench_instrumentation.py [--iterations 200000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cogs.database import ModerationDB
+from cogs.metrics import Registry, instrumented, track
+
+
+def noop(value):
+    return value
+
+
+async def async_noop(value):
+    return value
+
+
+def per_call(func, iterations, repeat=5):
+    """Meilleur temps par appel (en ns) sur ``repeat`` séries de ``iterations`` appels."""
+    return min(timeit.repeat(func, number=iterations, repeat=repeat)) / iterations * 1e9
+
+
+def run_coroutines(func, iterations):
+    """Retourne une fonction qui attend ``iterations`` fois ``func`` dans une seule tâche."""
+    async def batch():
+        for _ in range(iterations):
+            await func(1)
+
+    loop = asyncio.new_event_loop()
+    return lambda: loop.run_until_complete(batch())
+
+
+def report(label, nanoseconds, baseline=None):
+    overhead = f"  surcoût={nanoseconds - baseline:7.1f}ns" if baseline is not None else ""
+    print(f"{label:<40} {nanoseconds:8.1f}ns/appel{overhead}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+    iterations = args.iterations
+    registry = Registry()
+
+    disabled = instrumented("db", registry=registry, enabled=False)(noop)
+    enabled = instrumented("db", registry=registry, enabled=True)(noop)
+    # Désactivée, l'instrumentation retourne la fonction d'origine : aucun appel supplémentaire
+    assert disabled is noop
+
+    def tracked_block():
+        with track("db", "bloc", registry=registry, enabled=True):
+            noop(1)
+
+    print(f"{iterations} appels par série\n")
+    baseline = per_call(lambda: noop(1), iterations)
+    report("fonction nue", baseline)
+    report("fonction, instrumentation désactivée", per_call(lambda: disabled(1), iterations), baseline)
+    report("fonction, instrumentation activée", per_call(lambda: enabled(1), iterations), baseline)
+    report("bloc track(), activé", per_call(tracked_block, iterations), baseline)
+
+    async_enabled = instrumented("handler", registry=registry, enabled=True)(async_noop)
+    async_baseline = per_call(run_coroutines(async_noop, iterations), 1) / iterations
+    report("\ncoroutine nue", async_baseline)
+    report("coroutine, instrumentation activée", per_call(run_coroutines(async_enabled, iterations), 1) / iterations,
+           async_baseline)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ModerationDB(os.path.join(tmp, "bench.db"))
+        db.set_moderator_data(42, 10, 10, (datetime.utcnow() + timedelta(days=30)).isoformat(), "bench")
+        raw = ModerationDB.get_moderator_data.__wrapped__
+        db_iterations = max(1, iterations // 10)
+        db_baseline = per_call(lambda: raw(db, 42), db_iterations)
+        report("\nget_moderator_data (cache), nue", db_baseline)
+        report("get_moderator_data (cache), instrumentée", per_call(lambda: db.get_moderator_data(42), db_iterations),
+               db_baseline)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,59 +4,84 @@ import logging
 import os
 import asyncio
 from dotenv import load_dotenv
-from keep_alive import keep_alive
-# Charger les variables d'environnement depuis .env
+# Charger les variables d'environnement depuis .env, avant les cogs (METRICS_ENABLED est lu à leur import)
 load_dotenv()
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO)
+from cogs.command_sync import CommandTreeSync
+from cogs.commands.moderation.ban.dispatcher import BanDispatcher
+from cogs.database import GuildDatabases
+from cogs.health import HealthServer
+from cogs.logging_setup import setup_logging_from_env
+
 logger = logging.getLogger("bot")
 
 # Récupérer le token depuis les variables d'environnement
 TOKEN = os.getenv('DISCORD_TOKEN')
 
-# Configuration des intents (permissions)
-intents = discord.Intents.default()
-intents.members = True
-intents.message_content = True
+def create_bot():
+    """Crée le bot et ses services partagés.
 
-# Création du bot
-bot = commands.Bot(command_prefix="/", intents=intents)
+    Rien n'est construit à l'import : les workers du filtre d'images (multiprocessing
+    « spawn ») réimportent ce module et ne doivent ni migrer la base ni créer de bot.
+    """
+    # Configuration des intents (permissions)
+    intents = discord.Intents.default()
+    intents.members = True
+    intents.message_content = True
 
-async def load_extensions():
-    """Charge tous les cogs du bot."""
-    try:
-        await bot.load_extension("cogs.commands")
-        await bot.load_extension("cogs.listeners")
-        logger.info("Module chargés.")
-    except Exception as e:
-        logger.error(f"Erreur lors du chargement du module de modération: {e}")
+    bot = commands.Bot(command_prefix="/", intents=intents)
 
-@bot.event
-async def on_ready():
-    logger.info(f"Bot connecté: {bot.user.name} (ID: {bot.user.id})")
+    # Bases des serveurs et file des bans uniques, partagées par les commandes et les listeners :
+    # un seul pool de connexions, un seul cache des quotas, les mêmes buckets de rate limit
+    bot.databases = GuildDatabases.from_env()
+    bot.dispatcher = BanDispatcher()
 
-    # Synchroniser les commandes slash
-    try:
-        synced = await bot.tree.sync()
-        logger.info(f"Commandes synchronisées: {len(synced)}")
+    # Synchronisation des commandes slash uniquement si l'arbre a changé (DEV_GUILD_ID pour un serveur de test)
+    command_sync = CommandTreeSync.from_env(bot)
 
+    @bot.event
+    async def on_ready():
+        logger.info("Bot connecté: %s (ID: %s)", bot.user.name, bot.user.id)
 
-        # Afficher uniquement les détails des commandes synchronisées
-        for command in synced:
-            logger.info(f"Commande synchronisée: {command.name} - Description: {command.description}")
+        # on_ready est aussi appelé à chaque reconnexion : la synchronisation n'a lieu qu'une fois
+        await command_sync.on_ready()
 
+    return bot
+
+async def load_extensions(bot):
+    """Charge tous les cogs du bot."""
+    try:
+        await bot.load_extension("cogs.commands")
+        await bot.load_extension("cogs.listeners")
+        logger.info("Module chargés.")
     except Exception as e:
-        logger.error(f"Erreur lors de la synchronisation des commandes: {e}")
+        logger.error("Erreur lors du chargement du module de modération: %s", e)
 
 # Fonction principale asynchrone
 async def main():
-    keep_alive()
-    await load_extensions()
-    await bot.start(TOKEN)
+    bot = create_bot()
+    # Supervision (/healthz, /metrics) servie par la boucle du bot : HTTP_HOST, HTTP_PORT
+    health_server = HealthServer.from_env(bot)
+    await health_server.start()
+    try:
+        await load_extensions(bot)
+        await bot.start(TOKEN)
+    finally:
+        await health_server.stop()
+        # Récupéré avant bot.close(), qui retire les cogs
+        image_filter = bot.get_cog("ImageFilter")
+        if not bot.is_closed():
+            await bot.close()
+        await bot.dispatcher.close()
+        if image_filter is not None:
+            await image_filter.close()
+        # close() attend les requêtes SQLite en cours : exécuté hors de la boucle
+        await asyncio.get_running_loop().run_in_executor(None, bot.databases.close)
 
 # Lancement du bot
 if __name__ == "__main__":
+    # Configuration du logging : écriture dans un thread dédié (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLING)
+    log_listener = setup_logging_from_env()
     try:
         # Lance la boucle d'événements asyncio avec la fonction main
         asyncio.run(main())
@@ -67,4 +92,7 @@ if __name__ == "__main__":
         logger.critical("ERREUR CRITIQUE: Échec de la connexion - Token Discord invalide.")
     except Exception as e:
         # Attrape toute autre erreur critique non gérée pendant l'exécution
-        logger.critical(f"Erreur critique non gérée lors de l'exécution du bot:", exc_info=e)
+        logger.critical("Erreur critique non gérée lors de l'exécution du bot:", exc_info=e)
+    finally:
+        # Écrit les logs encore en file avant de quitter
+        log_listener.stop()
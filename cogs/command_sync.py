@@ -0,0 +1,90 @@
+import hashlib
+import json
+import logging
+import os
+
+import discord
+
+logger = logging.getLogger("bot")
+
+# Fichier où sont conservées les empreintes des arbres de commandes déjà synchronisés
+DEFAULT_STATE_PATH = ".command_tree_hash.json"
+
+
+def command_tree_hash(tree, guild=None):
+    """Empreinte SHA-256 de la sérialisation (``to_dict``) des commandes de ``tree``."""
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+                     key=lambda command: (command.get("type", 1), command["name"]))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+class CommandTreeSync:
+    """Synchronise l'arbre des commandes slash seulement quand il a changé.
+
+    L'empreinte de l'arbre est comparée à celle du dernier ``tree.sync()`` réussi,
+    enregistrée dans ``state_path`` : au redémarrage sans changement, et à chaque
+    reconnexion (``on_ready``), aucune requête n'est envoyée. Avec ``dev_guild_id``,
+    les commandes sont copiées et synchronisées sur ce seul serveur (mise à jour immédiate,
+    utile en développement) au lieu d'être publiées globalement.
+    """
+
+    def __init__(self, bot, state_path=DEFAULT_STATE_PATH, dev_guild_id=None):
+        self.bot = bot
+        self.state_path = state_path
+        self.dev_guild_id = dev_guild_id
+        self.done = False
+
+    @classmethod
+    def from_env(cls, bot):
+        """Construit la synchronisation depuis DEV_GUILD_ID et COMMAND_SYNC_STATE."""
+        dev_guild_id = os.getenv("DEV_GUILD_ID")
+        return cls(
+            bot,
+            state_path=os.getenv("COMMAND_SYNC_STATE", DEFAULT_STATE_PATH),
+            dev_guild_id=int(dev_guild_id) if dev_guild_id else None,
+        )
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    async def sync(self, force=False):
+        """Synchronise si nécessaire ; retourne les commandes synchronisées ou None si inchangé."""
+        guild = None
+        if self.dev_guild_id:
+            guild = discord.Object(id=self.dev_guild_id)
+            self.bot.tree.copy_global_to(guild=guild)
+
+        scope = f"{self.bot.application_id}:{self.dev_guild_id or 'global'}"
+        digest = command_tree_hash(self.bot.tree, guild=guild)
+        state = self._load_state()
+        if not force and state.get(scope) == digest:
+            logger.info("Commandes inchangées (%s), synchronisation ignorée", scope)
+            self.done = True
+            return None
+
+        synced = await self.bot.tree.sync(guild=guild)
+        state[scope] = digest
+        self._save_state(state)
+        self.done = True
+        logger.info("Commandes synchronisées (%s): %s", scope, len(synced))
+        return synced
+
+    async def on_ready(self):
+        """À appeler depuis on_ready : ne synchronise qu'une fois par processus."""
+        if self.done:
+            return None
+        try:
+            return await self.sync()
+        except Exception as e:
+            logger.error("Erreur lors de la synchronisation des commandes: %s", e)
+            return None
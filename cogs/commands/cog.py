@@ -2,8 +2,10 @@ import discord
 from discord.ext import commands
 import logging
 from .moderation.ban.ban_commands import BanCommands
-from .moderation.ban.utilities_commands import UtilitiesCommands
-from cogs.database import ModerationDB
+from .moderation.ban.filter_commands import FilterCommands
+from .moderation.ban.quota_reset import QuotaResetScheduler
+from .moderation.ban.temp_bans import TempBanScheduler
+from cogs.metrics import REGISTRY
 
 logger = logging.getLogger("moderation")
 
@@ -13,18 +15,28 @@ class ModerationCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    async def setup(self):
-        """Charge les commandes de bannissement et utilitaires."""
-        db = ModerationDB("moderation.db")
-        db.init_database()
-        await self.bot.add_cog(BanCommands(self.bot, db))
-        await self.bot.add_cog(UtilitiesCommands(self.bot))
-        
-        logger.info("ModerationCog ajouté au bot")
+def _register_metrics(databases, dispatcher, cogs, source="commands"):
+    """Expose les files des commandes et le cache des modérateurs dans /metrics (sans requête en base)."""
+    REGISTRY.gauge("diobot_job_queue_depth", "Commandes en attente d'un worker").add_callback(
+        lambda: sum(len(cog.jobs) for cog in cogs), source)
+    REGISTRY.gauge("diobot_dispatch_queue_depth", "Actions Discord (bans, expulsions) en file").add_callback(
+        lambda: sum(state["queued"] for state in dispatcher.stats().values()), source)
+    REGISTRY.counter("diobot_cache_hits_total", "Succès des caches", ("cache",)).add_callback(
+        lambda: {"moderators": databases.cache_stats()["hits"]}, source)
+    REGISTRY.counter("diobot_cache_misses_total", "Échecs des caches", ("cache",)).add_callback(
+        lambda: {"moderators": databases.cache_stats()["misses"]}, source)
+
 
 async def setup(bot):
-    """Ajoute le cog de modération au bot."""
-    db = ModerationDB("moderation.db")
-    db.init_database()
+    """Ajoute le cog de modération au bot (bases et dispatcher partagés avec les listeners)."""
+    databases, dispatcher = bot.databases, bot.dispatcher
+    quota_scheduler = QuotaResetScheduler(bot, databases)
+    temp_bans = TempBanScheduler(bot, databases, dispatcher)
     await bot.add_cog(ModerationCog(bot))
-    await bot.add_cog(BanCommands(bot, db))
+    await bot.add_cog(quota_scheduler)
+    await bot.add_cog(temp_bans)
+    ban_commands = BanCommands(bot, databases, quota_scheduler=quota_scheduler, dispatcher=dispatcher, temp_bans=temp_bans)
+    filter_commands = FilterCommands(bot, databases)
+    await bot.add_cog(ban_commands)
+    await bot.add_cog(filter_commands)
+    _register_metrics(databases, dispatcher, (ban_commands, filter_commands))
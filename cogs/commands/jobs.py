@@ -0,0 +1,144 @@
+import asyncio
+import functools
+import logging
+import time
+
+from cogs.logging_setup import current_context, log_context
+from cogs.metrics import instrumented
+
+logger = logging.getLogger(__name__)
+
+# Nombre de commandes de modération exécutées en parallèle
+DEFAULT_WORKERS = 4
+# Attente en file au-delà de laquelle un avertissement est journalisé (secondes)
+SLOW_WAIT_THRESHOLD = 2.0
+
+
+class JobStats:
+    """Compteurs d'une commande : temps d'attente en file et temps d'exécution."""
+
+    __slots__ = ("count", "failures", "total_wait", "max_wait", "total_run", "max_run")
+
+    def __init__(self):
+        self.count = 0
+        self.failures = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+        self.max_run = 0.0
+
+    def record(self, wait, run, failed):
+        self.count += 1
+        self.failures += failed
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.total_run += run
+        self.max_run = max(self.max_run, run)
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "failures": self.failures,
+            "avg_wait": self.total_wait / self.count if self.count else 0.0,
+            "max_wait": self.max_wait,
+            "avg_run": self.total_run / self.count if self.count else 0.0,
+            "max_run": self.max_run,
+        }
+
+
+class JobQueue:
+    """File de tâches en mémoire exécutée par un nombre borné de workers asyncio.
+
+    Les commandes diffèrent leur réponse puis y déposent leur travail (base de données,
+    appels HTTP) ; au plus ``workers`` commandes s'exécutent en même temps. Les workers
+    sont démarrés au premier ``submit``. Chaque tâche s'exécute avec le contexte de
+    log (serveur, utilisateur, commande) de celui qui l'a déposée.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, maxsize=0, clock=time.perf_counter):
+        self.workers = workers
+        self.clock = clock
+        self._queue = asyncio.Queue(maxsize)
+        self._tasks = []
+        self._stats = {}
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def _start(self):
+        self._tasks = [t for t in self._tasks if not t.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def submit(self, name, func, *args, **kwargs):
+        """Dépose ``func(*args, **kwargs)`` dans la file et retourne un Future de son résultat."""
+        self._start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((name, func, args, kwargs, future, self.clock(), current_context()))
+        return future
+
+    async def run(self, name, func, *args, **kwargs):
+        """Dépose une tâche et attend son résultat."""
+        return await (await self.submit(name, func, *args, **kwargs))
+
+    async def _worker(self):
+        while True:
+            name, func, args, kwargs, future, queued_at, context = await self._queue.get()
+            with log_context(**context):
+                await self._execute(name, func, args, kwargs, future, queued_at)
+
+    async def _execute(self, name, func, args, kwargs, future, queued_at):
+        started = self.clock()
+        failed = False
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            failed = True
+            logger.error("Erreur lors de l'exécution de la tâche %s: %s", name, e)
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+        finally:
+            wait = started - queued_at
+            self._stats.setdefault(name, JobStats()).record(wait, self.clock() - started, failed)
+            if wait > SLOW_WAIT_THRESHOLD:
+                logger.warning("La tâche %s a attendu %.2fs dans la file", name, wait)
+            self._queue.task_done()
+
+    def stats(self):
+        """Métriques par commande : nombre, échecs, attente et exécution (moyenne, max)."""
+        return {name: stats.as_dict() for name, stats in self._stats.items()}
+
+    async def close(self):
+        """Arrête les workers (les tâches encore en file sont abandonnées)."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+def deferred(name, ephemeral=False):
+    """Diffère immédiatement la réponse puis exécute la commande dans ``self.jobs``.
+
+    La commande décorée répond via ``interaction.followup`` ; le délai de 3 secondes
+    de Discord ne dépend plus de la charge de la base ni des appels HTTP. La durée
+    (attente en file comprise) et les erreurs sont mesurées sous le nom ``name`` ; les
+    logs émis pendant la commande portent le serveur, l'utilisateur et ``name``.
+    """
+    def decorator(func):
+        @instrumented("command", name)
+        async def run(self, interaction, *args, **kwargs):
+            await self.jobs.run(name, func, self, interaction, *args, **kwargs)
+
+        @functools.wraps(func)
+        async def wrapper(self, interaction, *args, **kwargs):
+            with log_context(guild_id=interaction.guild_id, user_id=interaction.user.id, command=name):
+                await interaction.response.defer(thinking=True, ephemeral=ephemeral)
+                try:
+                    await run(self, interaction, *args, **kwargs)
+                except Exception:
+                    await interaction.followup.send("❌ Une erreur inattendue est survenue.", ephemeral=True)
+        return wrapper
+    return decorator
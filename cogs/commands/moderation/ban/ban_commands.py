@@ -4,76 +4,161 @@ from discord import app_commands, Interaction, Member
 from datetime import datetime, timedelta
 import os
 import sqlite3
+import time
 import logging
 
-from cogs.database.database import ModerationDB
+from cogs.commands.jobs import JobQueue, deferred
+from .ban_history_view import BanHistoryView
+from .bulk_ban import bulk_ban, format_mass_ban_report, parse_user_ids
+from .dispatcher import BanDispatcher
+from .temp_bans import parse_duration
 
 logger = logging.getLogger(__name__)
 
 class BanCommands(commands.Cog):
-    """Commandes liées au bannissement."""
+    """Commandes liées au bannissement.
 
-    def __init__(self, bot, db):
+    ``databases`` (GuildDatabases) fournit la base du serveur de chaque interaction.
+    Les réponses sont différées en éphémère : erreurs, historique et quotas ne sont
+    vus que par le modérateur ; un ban réussi est en plus annoncé dans le salon.
+    """
+
+    def __init__(self, bot, databases, quota_scheduler=None, jobs=None, dispatcher=None, temp_bans=None):
         self.bot = bot
-        self.db = db
+        self.databases = databases
+        self.quota_scheduler = quota_scheduler
+        self.temp_bans = temp_bans
+        # Les commandes diffèrent leur réponse et s'exécutent dans cette file
+        self.jobs = jobs if jobs is not None else JobQueue()
+        # Les bans sont envoyés à Discord par serveur, en respectant les rate limits ;
+        # un dispatcher fourni (partagé avec les listeners) est fermé par son propriétaire
+        self._owns_dispatcher = dispatcher is None
+        self.dispatcher = dispatcher if dispatcher is not None else BanDispatcher()
+
+    async def cog_unload(self):
+        await self.jobs.close()
+        if self._owns_dispatcher:
+            await self.dispatcher.close()
+
+    async def _announce(self, interaction, message):
+        """Publie ``message`` dans le salon de la commande et le confirme au modérateur."""
+        try:
+            await interaction.channel.send(message)
+        except Exception as e:
+            logger.error("Erreur lors de l'annonce dans le salon %s: %s", interaction.channel_id, e)
+        await interaction.followup.send(message, ephemeral=True)
 
     @app_commands.command(name="ban", description="Bannit un membre.")
-    async def ban_member(self, interaction: Interaction, member: Member, *, reason: str = None):
-        """Bannit un membre du serveur."""
-        # Vérifier les droits du modérateur
-        moderator_data = self.db.get_moderator_data(interaction.user.id)
-        
-        if not moderator_data:
-            await interaction.response.send_message("❌ Vous n'avez pas les droits pour bannir des membres ou les données sont incomplètes.", ephemeral=True)
-            return
-        
-        # Vérifier le nombre de bans restants
-        ban_limit = moderator_data.get("ban_limit", 0)
-        
-        if ban_limit <= 0:
-            await interaction.response.send_message("❌ Vous avez atteint votre limite de bans pour cette période.", ephemeral=True)
-            return
-            
-        # Vérifier si le membre peut être banni
-        try:
-            # Vérifier les permissions avant de bannir
-            if not interaction.guild.me.guild_permissions.ban_members:
-                await interaction.response.send_message("❌ Je n'ai pas les permissions nécessaires pour bannir ce membre.", ephemeral=True)
+    @app_commands.describe(duration="Durée d'un ban temporaire, par exemple 30m, 12h, 7d ou 1d12h (définitif si omis)")
+    @deferred("ban", ephemeral=True)
+    async def ban_member(self, interaction: Interaction, member: Member, *, reason: str = None, duration: str = None):
+        """Bannit un membre du serveur, définitivement ou pour ``duration``."""
+        db = self.databases.for_guild(interaction.guild.id)
+
+        expires_at = None
+        if duration:
+            try:
+                expires_at = int(time.time()) + parse_duration(duration)
+            except ValueError:
+                await interaction.followup.send("❌ Durée invalide. Exemples : 30m, 12h, 7d, 1d12h.", ephemeral=True)
                 return
-                
-            # Effectuer le bannissement
-            await interaction.guild.ban(member, reason=reason)
-            
-            # Mettre à jour le nombre de bans restants
-            self.db.update_moderator_ban_limit(interaction.user.id, ban_limit - 1)
-            
-            # Enregistrer le bannissement dans l'historique
-            self.db.add_ban_to_history(interaction.user.id, member.id, member.name, reason)
-            
-            await interaction.response.send_message(f"✅ {member.name} a été banni. Raison: {reason}")
-            
+
+        try:
+            # Le quota n'est décompté qu'après confirmation de Discord : le verrou du
+            # modérateur empêche deux /ban simultanés de dépenser le même dernier ban
+            async with self.dispatcher.moderator_lock(interaction.guild.id, interaction.user.id):
+                # Vérifier les droits du modérateur
+                moderator_data = await db.get_moderator_data(interaction.user.id)
+
+                if not moderator_data:
+                    await interaction.followup.send("❌ Vous n'avez pas les droits pour bannir des membres ou les données sont incomplètes.", ephemeral=True)
+                    return
+
+                # Vérifier le nombre de bans restants
+                if moderator_data.get("ban_limit", 0) <= 0:
+                    await interaction.followup.send("❌ Vous avez atteint votre limite de bans pour cette période.", ephemeral=True)
+                    return
+
+                # Vérifier les permissions avant de bannir
+                if not interaction.guild.me.guild_permissions.ban_members:
+                    await interaction.followup.send("❌ Je n'ai pas les permissions nécessaires pour bannir ce membre.", ephemeral=True)
+                    return
+
+                # Effectuer le bannissement (file du serveur, rate limits et réessais)
+                audit_reason = f"{reason} (ban temporaire : {duration})" if expires_at else reason
+                await self.dispatcher.ban(interaction.guild, member, reason=audit_reason)
+
+                # Décrément conditionnel + historique en une seule transaction
+                ban = await db.consume_ban(interaction.user.id, member.id, member.name, reason, expires_at=expires_at)
+                if ban is None:
+                    logger.warning("Ban de %s effectué mais non décompté : quota du modérateur %s modifié entre-temps", member.id, interaction.user.id)
+                elif expires_at and self.temp_bans:
+                    self.temp_bans.schedule(interaction.guild.id, ban["ban_id"], member.id, expires_at)
+
+            if expires_at:
+                await self._announce(interaction, f"✅ {member.name} a été banni jusqu'au <t:{expires_at}:f>. Raison: {reason}")
+            else:
+                await self._announce(interaction, f"✅ {member.name} a été banni. Raison: {reason}")
+
         except discord.Forbidden:
-            await interaction.response.send_message("❌ Vous n'avez pas la permission de bannir ce membre.", ephemeral=True)
+            await interaction.followup.send("❌ Vous n'avez pas la permission de bannir ce membre.", ephemeral=True)
         except discord.HTTPException as e:
-            logger.error(f"Erreur lors du bannissement: {e}")
-            await interaction.response.send_message("❌ Une erreur est survenue lors du bannissement.", ephemeral=True)
-        except Exception as e:
-            logger.error(f"Erreur inattendue: {e}")
-            if ban_limit <= 0:
-                reset_date = datetime.fromisoformat(moderator_data["reset_date"])
-                time_remaining = reset_date - datetime.utcnow()
-                days_remaining = time_remaining.days
-                await interaction.response.send_message(f"❌ Vous avez atteint votre limite de bans. Vous devez attendre encore {days_remaining} jours.", ephemeral=True)
+            logger.error("Erreur lors du bannissement: %s", e)
+            if e.status == 429:
+                await interaction.followup.send("❌ Discord limite actuellement les bannissements, réessayez dans quelques instants (aucun ban décompté).", ephemeral=True)
             else:
-                await interaction.response.send_message("❌ Une erreur inattendue est survenue.", ephemeral=True)
+                await interaction.followup.send("❌ Une erreur est survenue lors du bannissement.", ephemeral=True)
+        except discord.RateLimited as e:
+            logger.error("Rate limit Discord lors du bannissement: %s", e)
+            await interaction.followup.send("❌ Discord limite actuellement les bannissements, réessayez dans quelques instants (aucun ban décompté).", ephemeral=True)
+        except Exception as e:
+            logger.error("Erreur inattendue: %s", e)
+            await interaction.followup.send("❌ Une erreur inattendue est survenue.", ephemeral=True)
+
+    @app_commands.command(name="massban", description="Bannit en une fois une liste d'utilisateurs (IDs ou mentions).")
+    @app_commands.describe(users="IDs ou mentions des utilisateurs, séparés par des espaces ou des retours à la ligne")
+    @deferred("massban", ephemeral=True)
+    async def mass_ban(self, interaction: Interaction, users: str, reason: str = None):
+        """Bannit plusieurs utilisateurs via l'API de bannissement groupé de Discord."""
+        db = self.databases.for_guild(interaction.guild.id)
+
+        moderator_data = await db.get_moderator_data(interaction.user.id)
+        if not moderator_data:
+            await interaction.followup.send("❌ Vous n'avez pas les droits pour bannir des membres ou les données sont incomplètes.", ephemeral=True)
+            return
+
+        excluded = {interaction.user.id, interaction.guild.me.id}
+        user_ids = [user_id for user_id in parse_user_ids(users) if user_id not in excluded]
+        if not user_ids:
+            await interaction.followup.send("❌ Aucun ID d'utilisateur valide trouvé.", ephemeral=True)
+            return
+
+        ban_limit = moderator_data.get("ban_limit", 0)
+        if ban_limit < len(user_ids):
+            await interaction.followup.send(f"❌ Quota insuffisant : {len(user_ids)} bannissement(s) demandé(s), {ban_limit} restant(s).", ephemeral=True)
+            return
+
+        permissions = interaction.guild.me.guild_permissions
+        if not (permissions.ban_members and permissions.manage_guild):
+            await interaction.followup.send("❌ Je n'ai pas les permissions nécessaires (bannir des membres et gérer le serveur).", ephemeral=True)
+            return
+
+        result = await bulk_ban(interaction.guild, db, self.dispatcher, interaction.user.id, user_ids, reason)
+        if result is None:
+            await interaction.followup.send("❌ Vous avez atteint votre limite de bans pour cette période.", ephemeral=True)
+            return
+
+        banned, failed = result
+        await self._announce(interaction, format_mass_ban_report(banned, failed, reason))
 
     @app_commands.command(name="setban", description="Définit le nombre de bans et le timer de réinitialisation pour un utilisateur.")
+    @deferred("setban", ephemeral=True)
     async def set_ban(self, interaction: Interaction, user: Member, initial_number_ban: int, timer_reset: int):
         """Définit le nombre de bans et le timer de réinitialisation pour un utilisateur."""
         admin_role_id = int(os.getenv('ADMIN_ROLE_ID', 0))
 
         if admin_role_id not in [role.id for role in interaction.user.roles]:
-            await interaction.response.send_message("❌ Vous n'avez pas la permission de définir des bans.", ephemeral=True)
+            await interaction.followup.send("❌ Vous n'avez pas la permission de définir des bans.", ephemeral=True)
             return
 
         reset_date = (datetime.utcnow() + timedelta(days=timer_reset)).isoformat()
@@ -81,44 +166,68 @@ class BanCommands(commands.Cog):
         # Récupérez le pseudo du membre
         username = user.display_name  # Utilisez le nom d'affichage du membre
 
-        success = self.db.set_moderator_data(user.id, initial_number_ban, initial_number_ban, reset_date, username)
+        success = await self.databases.for_guild(interaction.guild.id).set_moderator_data(user.id, initial_number_ban, initial_number_ban, reset_date, username, reset_interval_days=timer_reset)
         
         if success:
-            await interaction.response.send_message(f"✅ Le nombre de bans pour {username} a été défini à {initial_number_ban} avec un timer de réinitialisation de {timer_reset} jours.")
+            if self.quota_scheduler:
+                self.quota_scheduler.schedule(interaction.guild.id, user.id, reset_date)
+            await self._announce(interaction, f"✅ Le nombre de bans pour {username} a été défini à {initial_number_ban} avec un timer de réinitialisation de {timer_reset} jours.")
+        else:
+            await interaction.followup.send("❌ Échec de la mise à jour des données.", ephemeral=True)
+
+    @app_commands.command(name="setmodlog", description="Définit le salon ou le webhook du journal de modération.")
+    @deferred("setmodlog", ephemeral=True)
+    async def set_modlog(self, interaction: Interaction, channel: discord.TextChannel = None, webhook_url: str = None):
+        """Définit la destination du journal de modération (messages supprimés) du serveur."""
+        admin_role_id = int(os.getenv('ADMIN_ROLE_ID', 0))
+
+        if admin_role_id not in [role.id for role in interaction.user.roles]:
+            await interaction.followup.send("❌ Vous n'avez pas la permission de configurer le journal de modération.", ephemeral=True)
+            return
+
+        if webhook_url:
+            try:
+                discord.Webhook.from_url(webhook_url, client=self.bot)
+            except ValueError:
+                await interaction.followup.send("❌ URL de webhook invalide.", ephemeral=True)
+                return
+
+        success = await self.databases.for_guild(interaction.guild.id).set_modlog(channel.id if channel else None, webhook_url)
+
+        if success:
+            # Le journal de modération (cogs.listeners) relit la destination
+            self.bot.dispatch("modlog_update", interaction.guild.id)
+            if webhook_url:
+                destination = "le webhook"
+            elif channel:
+                destination = channel.mention
+            else:
+                destination = "aucun salon (désactivé)"
+            await interaction.followup.send(f"✅ Journal de modération envoyé vers {destination}.", ephemeral=True)
         else:
-            await interaction.response.send_message("❌ Échec de la mise à jour des données.", ephemeral=True)
+            await interaction.followup.send("❌ Échec de la mise à jour des réglages.", ephemeral=True)
 
     @app_commands.command(name="banhistory", description="Affiche l'historique des bans.")
+    @deferred("banhistory", ephemeral=True)
     async def ban_history(self, interaction, user: Member = None):
         """Affiche l'historique des bans pour un utilisateur spécifique ou pour tous les utilisateurs."""
-        ban_history_records = []  # Initialisation par défaut
-
-        if user:
-            ban_history_records = self.db.get_ban_history(moderator_id=user.id)
-        else:
-            ban_history_records = self.db.get_all_ban_history()
+        view = BanHistoryView(self.databases.for_guild(interaction.guild.id), interaction.user.id, moderator_id=user.id if user else None)
+        ban_history_records = await view.load_page()
 
         if not ban_history_records:
-            await interaction.response.send_message("❌ Aucun historique de bans trouvé.", ephemeral=True)
+            await interaction.followup.send("❌ Aucun historique de bans trouvé.", ephemeral=True)
             return
 
-        response = "Historique des bans :\n"
-        for record in ban_history_records:
-            if len(record) == 6:  # Vérifiez que vous avez 6 colonnes
-                ban_id, moderator_id, banned_user_id, banned_user_name, reason, timestamp = record
-                response += f"**Banni par** : <@{moderator_id}> | **Banni** : {banned_user_name} | **Raison** : {reason} | **Date** : {timestamp}\n"
-            else:
-                logger.warning(f"Enregistrement inattendu dans l'historique des bans: {record}")
-
-        await interaction.response.send_message(response)
+        await interaction.followup.send(embed=view.build_embed(), view=view, ephemeral=True)
 
     @app_commands.command(name="banlimits", description="Affiche la liste des bans restants pour tous les modérateurs.")
+    @deferred("banlimits", ephemeral=True)
     async def ban_limits(self, interaction: Interaction):
         """Affiche la liste des bans restants pour tous les modérateurs."""
-        moderators = self.db.get_all_moderators_with_ban_limits()
+        moderators = await self.databases.for_guild(interaction.guild.id).get_all_moderators_with_ban_limits()
 
         if not moderators:
-            await interaction.response.send_message("❌ Aucun modérateur trouvé.", ephemeral=True)
+            await interaction.followup.send("❌ Aucun modérateur trouvé.", ephemeral=True)
             return
 
         response = "Liste des bans restants pour les modérateurs :\n"
@@ -135,10 +244,4 @@ class BanCommands(commands.Cog):
 
             response += f"**Modérateur** : {username} | **Bans restants** : {ban_limit} | **Temps restant avant réinitialisation** : {time_left}\n"
 
-        await interaction.response.send_message(response)
-
-async def setup(bot):
-    """Ajoute les commandes de bannissement au bot."""
-    db = ModerationDB("moderation.db")  # Chemin vers votre base de données
-    db.init_database()  # Initialisez la base de données
-    await bot.add_cog(BanCommands(bot, db))  # Ajoutez le cog de bannissement
\ No newline at end of file
+        await interaction.followup.send(response, ephemeral=True)
@@ -0,0 +1,79 @@
+import discord
+import logging
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 10
+MAX_REASON_LENGTH = 200
+
+
+class BanHistoryView(discord.ui.View):
+    """Affiche l'historique des bans page par page.
+
+    Chaque page est lue à la demande via ``get_ban_history_page`` (pagination par clé) :
+    seule la page courante est gardée en mémoire, quelle que soit la taille de l'historique.
+    """
+
+    def __init__(self, db, author_id, moderator_id=None, page_size=PAGE_SIZE, timeout=180):
+        super().__init__(timeout=timeout)
+        self.db = db
+        self.author_id = author_id
+        self.moderator_id = moderator_id
+        self.page_size = page_size
+        self.records = []
+        # Curseur (before_id) de chaque page visitée ; None = première page
+        self._cursors = [None]
+
+    @property
+    def page_number(self):
+        return len(self._cursors)
+
+    async def load_page(self):
+        """Charge la page courante et met à jour l'état des boutons."""
+        rows = await self.db.get_ban_history_page(self.moderator_id, self._cursors[-1], self.page_size + 1)
+        # Une ligne de plus que nécessaire indique qu'une page suivante existe
+        self.records = rows[:self.page_size]
+        self.previous_page.disabled = self.page_number == 1
+        self.next_page.disabled = len(rows) <= self.page_size
+        return self.records
+
+    def build_embed(self):
+        """Construit l'embed de la page courante."""
+        embed = discord.Embed(title="Historique des bans", color=discord.Color.red())
+        for record in self.records:
+            if len(record) < 6:
+                logger.warning("Enregistrement inattendu dans l'historique des bans: %s", record)
+                continue
+            ban_id, moderator_id, banned_user_id, banned_user_name, reason, timestamp = record[:6]
+            reason = reason or "Aucune raison"
+            if len(reason) > MAX_REASON_LENGTH:
+                reason = reason[:MAX_REASON_LENGTH - 1] + "…"
+            date = f"<t:{timestamp}:f>" if isinstance(timestamp, int) else timestamp
+            embed.add_field(
+                name=f"#{ban_id} — {banned_user_name}",
+                value=f"**Banni par** : <@{moderator_id}>\n**Raison** : {reason}\n**Date** : {date}",
+                inline=False,
+            )
+        embed.set_footer(text=f"Page {self.page_number}")
+        return embed
+
+    async def interaction_check(self, interaction):
+        """Seul l'auteur de la commande peut changer de page."""
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ Seul l'auteur de la commande peut changer de page.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="◀ Précédent", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        if self.page_number > 1:
+            self._cursors.pop()
+        await self.load_page()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(label="Suivant ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction, button):
+        if self.records:
+            self._cursors.append(self.records[-1][0])
+        await self.load_page()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
@@ -0,0 +1,72 @@
+import re
+import logging
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximal d'utilisateurs par appel à Guild.bulk_ban (limite de l'API Discord)
+BULK_BAN_CHUNK_SIZE = 200
+
+# Longueur maximale d'un message Discord
+MAX_MESSAGE_LENGTH = 2000
+
+# Un snowflake Discord : 15 à 20 chiffres (les mentions <@id> sont aussi reconnues)
+_USER_ID = re.compile(r"(?<!\d)\d{15,20}(?!\d)")
+
+
+def parse_user_ids(text):
+    """Extrait les IDs d'utilisateurs d'un texte collé (IDs, mentions, une ligne par membre...).
+
+    Les doublons sont ignorés ; l'ordre d'apparition est conservé.
+    """
+    return list(dict.fromkeys(int(match) for match in _USER_ID.findall(text or "")))
+
+
+async def bulk_ban(guild, db, dispatcher, moderator_id, user_ids, reason=None, chunk_size=BULK_BAN_CHUNK_SIZE):
+    """Bannit ``user_ids`` par lots de ``chunk_size`` en comptabilisant le quota du modérateur.
+
+    Les lots passent par le BanDispatcher (rate limits, réessais). Le quota n'est décompté
+    qu'une fois tous les lots traités, en une seule transaction (``consume_bans``) et
+    uniquement pour les utilisateurs confirmés par Discord ; le verrou du modérateur,
+    tenu jusque-là, empêche deux commandes de dépenser le même quota. Retourne ``(bannis, échecs)``
+    (listes d'IDs), ou None si le quota est insuffisant pour tout le lot.
+    """
+    async with dispatcher.moderator_lock(guild.id, moderator_id):
+        moderator_data = await db.get_moderator_data(moderator_id)
+        if not moderator_data or moderator_data.get("ban_limit", 0) < len(user_ids):
+            return None
+
+        banned, failed = [], []
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            try:
+                result = await dispatcher.bulk_ban(guild, [discord.Object(id=user_id) for user_id in chunk], reason=reason)
+            except Exception as e:
+                logger.error("Échec du bannissement groupé de %s membre(s): %s", len(chunk), e)
+                failed.extend(chunk)
+                continue
+            confirmed = {user.id for user in result.banned}
+            banned.extend(user_id for user_id in chunk if user_id in confirmed)
+            failed.extend(user_id for user_id in chunk if user_id not in confirmed)
+
+        if banned:
+            bans = []
+            for user_id in banned:
+                member = guild.get_member(user_id)
+                bans.append((user_id, member.name if member else None, reason))
+            if await db.consume_bans(moderator_id, bans) is None:
+                logger.warning("Quota du modérateur %s modifié pendant /massban : %s ban(s) non décompté(s)", moderator_id, len(bans))
+        return banned, failed
+
+
+def format_mass_ban_report(banned, failed, reason=None):
+    """Résumé de /massban : nombre de bannis et liste (tronquée) des échecs."""
+    report = f"✅ {len(banned)} utilisateur(s) banni(s). Raison: {reason}"
+    if failed:
+        report += f"\n❌ {len(failed)} échec(s) (quota non décompté) :\n"
+        ids = " ".join(str(user_id) for user_id in failed)
+        if len(report) + len(ids) > MAX_MESSAGE_LENGTH:
+            ids = ids[:MAX_MESSAGE_LENGTH - len(report) - 1].rsplit(" ", 1)[0] + "…"
+        report += ids
+    return report
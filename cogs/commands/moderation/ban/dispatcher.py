@@ -0,0 +1,207 @@
+import asyncio
+import contextlib
+import logging
+import random
+import time
+
+import aiohttp
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Actions en attente par serveur au-delà desquelles les appelants sont mis en attente
+DEFAULT_QUEUE_SIZE = 100
+# Requêtes de bannissement simultanées par serveur (Discord limite par serveur)
+DEFAULT_GUILD_CONCURRENCY = 2
+DEFAULT_MAX_ATTEMPTS = 5
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+GLOBAL_BUCKET = "global"
+
+
+def _retry_after(error):
+    """Délai demandé par Discord dans une réponse 429 (secondes), ou None."""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is not None:
+        return float(retry_after)
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("Retry-After") or headers.get("X-RateLimit-Reset-After")
+    return float(value) if value else None
+
+
+def _is_global(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    return headers.get("X-RateLimit-Global", "").lower() == "true" or headers.get("X-RateLimit-Scope") == "global"
+
+
+class RateLimitBuckets:
+    """Échéances de blocage des buckets de rate limit Discord (un par serveur, plus le global)."""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._blocked_until = {}
+
+    def block(self, key, retry_after):
+        """Bloque ``key`` pendant ``retry_after`` secondes (sans raccourcir un blocage existant)."""
+        until = self.clock() + retry_after
+        self._blocked_until[key] = max(self._blocked_until.get(key, 0), until)
+
+    def delay(self, key):
+        """Temps restant avant que ``key`` (et le bucket global) accepte une requête."""
+        now = self.clock()
+        until = max(self._blocked_until.get(key, 0), self._blocked_until.get(GLOBAL_BUCKET, 0))
+        return max(0.0, until - now)
+
+
+class _GuildQueue:
+    """File bornée et workers d'un serveur."""
+
+    def __init__(self, queue_size):
+        self.queue = asyncio.Queue(queue_size)
+        self.workers = []
+        self.sent = 0
+        self.retries = 0
+        self.rate_limited = 0
+
+
+class BanDispatcher:
+    """Envoie les bans, débans et expulsions à Discord, serveur par serveur, en respectant les rate limits.
+
+    Chaque serveur a sa propre file bornée (``queue_size``) : quand elle est pleine,
+    ``ban``/``unban`` attendent (contre-pression). Un 429 bloque le bucket du serveur
+    (ou tous les serveurs si la limite est globale) pendant le ``Retry-After`` indiqué
+    puis l'action est renvoyée ; les erreurs 5xx et réseau sont réessayées avec un
+    backoff exponentiel. Les erreurs définitives (403, 404...) sont propagées à l'appelant.
+    """
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE, concurrency=DEFAULT_GUILD_CONCURRENCY,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, base_backoff=BASE_BACKOFF, max_backoff=MAX_BACKOFF,
+                 clock=time.monotonic, sleep=asyncio.sleep):
+        self.queue_size = queue_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.sleep = sleep
+        self.buckets = RateLimitBuckets(clock)
+        self._guilds = {}
+        # (serveur, modérateur) -> [verrou, détenteur et appelants en attente]
+        self._moderator_locks = {}
+
+    @contextlib.asynccontextmanager
+    async def moderator_lock(self, guild_id, moderator_id):
+        """Sérialise les bans d'un modérateur (le quota n'est décompté qu'après Discord).
+
+        Le verrou est oublié dès que plus personne ne le détient ni ne l'attend.
+        """
+        key = (guild_id, moderator_id)
+        entry = self._moderator_locks.get(key)
+        if entry is None:
+            entry = self._moderator_locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._moderator_locks[key]
+
+    async def ban(self, guild, user, reason=None):
+        """Bannit ``user`` ; retourne quand Discord a confirmé le bannissement."""
+        return await self._submit(guild, "ban", lambda: guild.ban(user, reason=reason))
+
+    async def unban(self, guild, user, reason=None):
+        """Débannit ``user`` ; retourne quand Discord a confirmé le débannissement."""
+        return await self._submit(guild, "unban", lambda: guild.unban(user, reason=reason))
+
+    async def kick(self, guild, user, reason=None):
+        """Expulse ``user`` ; retourne quand Discord a confirmé l'expulsion."""
+        return await self._submit(guild, "kick", lambda: guild.kick(user, reason=reason))
+
+    async def bulk_ban(self, guild, users, reason=None):
+        """Bannit jusqu'à 200 utilisateurs en un appel ; retourne le BulkBanResult de Discord."""
+        return await self._submit(guild, "bulk_ban", lambda: guild.bulk_ban(users, reason=reason))
+
+    async def _submit(self, guild, action, call):
+        state = self._guilds.get(guild.id)
+        if state is None:
+            state = self._guilds[guild.id] = _GuildQueue(self.queue_size)
+        state.workers = [worker for worker in state.workers if not worker.done()]
+        while len(state.workers) < self.concurrency:
+            state.workers.append(asyncio.create_task(self._worker(guild.id, state)))
+
+        future = asyncio.get_running_loop().create_future()
+        # File pleine : l'appelant attend ici (contre-pression)
+        await state.queue.put((action, call, future))
+        return await future
+
+    async def _worker(self, guild_id, state):
+        while True:
+            action, call, future = await state.queue.get()
+            try:
+                result = await self._execute(guild_id, state, action, call)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                state.queue.task_done()
+
+    async def _execute(self, guild_id, state, action, call):
+        """Exécute un appel en attendant le bucket du serveur, avec réessais."""
+        attempt = 0
+        while True:
+            delay = self.buckets.delay(guild_id)
+            if delay:
+                await self.sleep(delay)
+            try:
+                result = await call()
+                state.sent += 1
+                return result
+            except (discord.RateLimited, discord.HTTPException) as e:
+                status = getattr(e, "status", 429 if isinstance(e, discord.RateLimited) else None)
+                if status != 429 and not (status and status >= 500):
+                    raise
+                error = e
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                status, error = None, e
+
+            attempt += 1
+            if attempt >= self.max_attempts:
+                logger.error("Abandon de l'action %s sur le serveur %s après %s tentatives: %s", action, guild_id, attempt, error)
+                raise error
+            state.retries += 1
+            retry_after = _retry_after(error) if status == 429 else None
+            if retry_after is not None:
+                state.rate_limited += 1
+                self.buckets.block(GLOBAL_BUCKET if _is_global(error) else guild_id, retry_after)
+                logger.warning("Rate limit Discord sur le serveur %s (%s), nouvel essai dans %.2fs", guild_id, action, retry_after)
+            else:
+                backoff = min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1))
+                backoff *= random.uniform(0.5, 1.0)
+                logger.warning("Erreur temporaire sur le serveur %s (%s), nouvel essai dans %.2fs: %s", guild_id, action, backoff, error)
+                await self.sleep(backoff)
+
+    def stats(self):
+        """Compteurs par serveur : actions en file, envoyées, réessayées, limitées."""
+        return {
+            guild_id: {
+                "queued": state.queue.qsize(),
+                "sent": state.sent,
+                "retries": state.retries,
+                "rate_limited": state.rate_limited,
+            }
+            for guild_id, state in self._guilds.items()
+        }
+
+    async def close(self):
+        """Arrête les workers de tous les serveurs."""
+        workers = [worker for state in self._guilds.values() for worker in state.workers]
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._guilds.clear()
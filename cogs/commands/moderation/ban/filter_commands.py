@@ -0,0 +1,132 @@
+import discord
+from discord.ext import commands
+from discord import app_commands, Interaction
+import asyncio
+import os
+import logging
+
+from cogs.commands.jobs import JobQueue, deferred
+from cogs.listeners.messages.image_filter import DEFAULT_MAX_BYTES, hash_image
+
+logger = logging.getLogger(__name__)
+
+# Longueur maximale d'un terme interdit
+MAX_TERM_LENGTH = 100
+
+
+class FilterCommands(commands.Cog):
+    """Gestion des termes et des images interdits du filtre de messages.
+
+    Chaque modification envoie l'événement ``banned_terms_update`` ou
+    ``image_hashes_update`` : le filtre (cogs.listeners) recharge alors la liste
+    du serveur concerné.
+    """
+
+    def __init__(self, bot, databases, jobs=None):
+        self.bot = bot
+        self.databases = databases
+        self.jobs = jobs if jobs is not None else JobQueue(workers=1)
+
+    async def cog_unload(self):
+        await self.jobs.close()
+
+    def _is_admin(self, interaction):
+        admin_role_id = int(os.getenv('ADMIN_ROLE_ID', 0))
+        return admin_role_id in [role.id for role in interaction.user.roles]
+
+    @app_commands.command(name="addterm", description="Ajoute un mot ou une expression interdits.")
+    @deferred("addterm", ephemeral=True)
+    async def add_term(self, interaction: Interaction, term: str):
+        """Ajoute un terme interdit au filtre du serveur."""
+        if not self._is_admin(interaction):
+            await interaction.followup.send("❌ Vous n'avez pas la permission de modifier le filtre.", ephemeral=True)
+            return
+
+        term = term.strip()
+        if not term or len(term) > MAX_TERM_LENGTH:
+            await interaction.followup.send(f"❌ Le terme doit faire entre 1 et {MAX_TERM_LENGTH} caractères.", ephemeral=True)
+            return
+
+        if await self.databases.for_guild(interaction.guild.id).add_banned_term(term):
+            self.bot.dispatch("banned_terms_update", interaction.guild.id)
+            await interaction.followup.send(f"✅ « {term} » ajouté au filtre.", ephemeral=True)
+        else:
+            await interaction.followup.send(f"❌ « {term} » est déjà dans le filtre ou n'a pas pu être ajouté.", ephemeral=True)
+
+    @app_commands.command(name="removeterm", description="Retire un mot ou une expression interdits.")
+    @deferred("removeterm", ephemeral=True)
+    async def remove_term(self, interaction: Interaction, term: str):
+        """Retire un terme interdit du filtre du serveur."""
+        if not self._is_admin(interaction):
+            await interaction.followup.send("❌ Vous n'avez pas la permission de modifier le filtre.", ephemeral=True)
+            return
+
+        term = term.strip()
+        if await self.databases.for_guild(interaction.guild.id).remove_banned_term(term):
+            self.bot.dispatch("banned_terms_update", interaction.guild.id)
+            await interaction.followup.send(f"✅ « {term} » retiré du filtre.", ephemeral=True)
+        else:
+            await interaction.followup.send(f"❌ « {term} » n'est pas dans le filtre.", ephemeral=True)
+
+    @app_commands.command(name="terms", description="Affiche les mots et expressions interdits.")
+    @deferred("terms", ephemeral=True)
+    async def list_terms(self, interaction: Interaction):
+        """Affiche la liste des termes interdits du serveur."""
+        if not self._is_admin(interaction):
+            await interaction.followup.send("❌ Vous n'avez pas la permission de consulter le filtre.", ephemeral=True)
+            return
+
+        terms = await self.databases.for_guild(interaction.guild.id).get_banned_terms()
+        if not terms:
+            await interaction.followup.send("Aucun terme interdit.", ephemeral=True)
+            return
+
+        response = f"Termes interdits ({len(terms)}) : " + ", ".join(f"`{term}`" for term in terms)
+        if len(response) > 2000:
+            response = response[:1997] + "..."
+        await interaction.followup.send(response, ephemeral=True)
+
+    @app_commands.command(name="blockimage", description="Interdit une image et ses variantes proches.")
+    @deferred("blockimage", ephemeral=True)
+    async def block_image(self, interaction: Interaction, image: discord.Attachment, label: str = None):
+        """Ajoute l'empreinte d'une image aux images interdites du serveur."""
+        if not self._is_admin(interaction):
+            await interaction.followup.send("❌ Vous n'avez pas la permission de modifier le filtre.", ephemeral=True)
+            return
+
+        if not (image.content_type or "").startswith("image/") or image.size > DEFAULT_MAX_BYTES:
+            await interaction.followup.send("❌ La pièce jointe doit être une image de moins de 8 Mo.", ephemeral=True)
+            return
+
+        # Décodage dans un thread : la boucle de la passerelle reste disponible
+        hashes = await asyncio.to_thread(hash_image, await image.read())
+        if hashes is None:
+            await interaction.followup.send("❌ Image illisible.", ephemeral=True)
+            return
+
+        phash, dhash = hashes
+        if await self.databases.for_guild(interaction.guild.id).add_image_hash(phash, dhash, label):
+            self.bot.dispatch("image_hashes_update", interaction.guild.id)
+            await interaction.followup.send(f"✅ Image interdite (empreinte `{phash:016x}`).", ephemeral=True)
+        else:
+            await interaction.followup.send(f"❌ L'image `{phash:016x}` est déjà interdite ou n'a pas pu être ajoutée.", ephemeral=True)
+
+    @app_commands.command(name="unblockimage", description="Retire une image interdite à partir de son empreinte.")
+    @deferred("unblockimage", ephemeral=True)
+    async def unblock_image(self, interaction: Interaction, image_hash: str):
+        """Retire une image interdite du filtre du serveur."""
+        if not self._is_admin(interaction):
+            await interaction.followup.send("❌ Vous n'avez pas la permission de modifier le filtre.", ephemeral=True)
+            return
+
+        try:
+            phash = int(image_hash.strip(), 16)
+        except ValueError:
+            await interaction.followup.send("❌ Empreinte invalide (16 caractères hexadécimaux).", ephemeral=True)
+            return
+
+        if await self.databases.for_guild(interaction.guild.id).remove_image_hash(phash):
+            self.bot.dispatch("image_hashes_update", interaction.guild.id)
+            await interaction.followup.send(f"✅ Image `{phash:016x}` retirée du filtre.", ephemeral=True)
+        else:
+            await interaction.followup.send(f"❌ L'image `{image_hash}` n'est pas dans le filtre.", ephemeral=True)
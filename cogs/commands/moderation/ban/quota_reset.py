@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from discord.ext import commands
+
+from cogs.scheduling import DeadlineScheduler
+
+logger = logging.getLogger(__name__)
+
+# Délai avant une nouvelle tentative si la base est indisponible
+RETRY_DELAY = 30
+
+
+def reset_date_to_timestamp(reset_date):
+    """Convertit une reset_date ISO (UTC, sans fuseau) en timestamp."""
+    return datetime.fromisoformat(reset_date).replace(tzinfo=timezone.utc).timestamp()
+
+
+class QuotaResetScheduler(commands.Cog):
+    """Réinitialise les quotas de bans à leur échéance.
+
+    Les échéances de tous les modérateurs de tous les serveurs sont gardées dans un
+    min-heap, indexé par (guild_id, user_id) : la tâche de fond dort jusqu'à la plus
+    proche, puis réinitialise en une seule requête par serveur
+    (``reset_due_moderators``) tous les modérateurs arrivés à échéance.
+    """
+
+    def __init__(self, bot, databases):
+        self.bot = bot
+        self.databases = databases
+        self.deadlines = DeadlineScheduler()
+        self._task = None
+
+    async def cog_load(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def cog_unload(self):
+        if self._task:
+            self._task.cancel()
+
+    def schedule(self, guild_id, user_id, reset_date):
+        """Programme la prochaine réinitialisation d'un modérateur (appelé par /setban)."""
+        try:
+            self.deadlines.schedule((guild_id, user_id), reset_date_to_timestamp(reset_date))
+        except (TypeError, ValueError):
+            logger.warning("Date de réinitialisation invalide pour le modérateur %s (serveur %s): %s", user_id, guild_id, reset_date)
+
+    async def load_schedule(self):
+        """Charge les échéances des modérateurs de tous les serveurs depuis la base."""
+        for guild_id in await self.databases.guild_ids():
+            for user_id, reset_date in await self.databases.for_guild(guild_id).get_reset_schedule():
+                self.schedule(guild_id, user_id, reset_date)
+        logger.info("%s échéance(s) de réinitialisation programmée(s)", len(self.deadlines))
+
+    async def reset_due(self, guild_ids):
+        """Réinitialise les quotas échus des serveurs indiqués et reprogramme leurs échéances.
+
+        Retourne l'ensemble des (guild_id, user_id) réinitialisés.
+        """
+        reset = set()
+        for guild_id in guild_ids:
+            for user_id, reset_date in await self.databases.for_guild(guild_id).reset_due_moderators():
+                self.schedule(guild_id, user_id, reset_date)
+                reset.add((guild_id, user_id))
+        return reset
+
+    async def _run(self):
+        loaded = False
+        while True:
+            try:
+                if not loaded:
+                    await self.load_schedule()
+                    loaded = True
+                due = set(await self.deadlines.wait_due())
+                if due - await self.reset_due(sorted({guild_id for guild_id, _ in due})):
+                    # Base indisponible ou modérateur modifié hors du bot : recharger les échéances
+                    await self.load_schedule()
+                    deadline = self.deadlines.next_deadline()
+                    if deadline is not None and deadline <= self.deadlines.clock():
+                        await asyncio.sleep(RETRY_DELAY)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Erreur lors de la réinitialisation des quotas: %s", e)
+                await asyncio.sleep(RETRY_DELAY)
+                # Les échéances retirées du tas mais non réinitialisées sont relues depuis la base
+                loaded = False
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import re
+import time
+from collections import defaultdict
+
+import discord
+from discord.ext import commands
+
+from cogs.scheduling import DeadlineScheduler
+
+logger = logging.getLogger(__name__)
+
+# Débannissements traités ensemble (appels Discord en parallèle, une transaction en base)
+UNBAN_BATCH_SIZE = 50
+# Délai avant une nouvelle tentative si Discord ou le serveur est indisponible
+RETRY_DELAY = 60
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+_DURATION_PART = re.compile(r"(\d+)\s*([smhdw])")
+
+
+def parse_duration(text):
+    """Convertit une durée comme ``30m``, ``12h``, ``7d`` ou ``1d12h`` en secondes.
+
+    Lève ValueError si le texte n'est pas une durée valide.
+    """
+    compact = (text or "").strip().lower().replace(" ", "")
+    parts = _DURATION_PART.findall(compact)
+    if not parts or "".join(value + unit for value, unit in parts) != compact:
+        raise ValueError(f"Durée invalide: {text}")
+    seconds = sum(int(value) * _DURATION_UNITS[unit] for value, unit in parts)
+    if seconds <= 0:
+        raise ValueError(f"Durée invalide: {text}")
+    return seconds
+
+
+class TempBanScheduler(commands.Cog):
+    """Lève les bans temporaires à leur échéance.
+
+    Les échéances (``ban_history.expires_at``) de tous les serveurs sont chargées une fois
+    au démarrage, via l'index partiel des bans actifs, dans un min-heap indexé par
+    (guild_id, ban_id, user_id) : la base n'est plus interrogée ensuite. Les débans
+    échus, y compris ceux accumulés pendant un arrêt du bot, sont traités par lots de
+    ``batch_size`` via le BanDispatcher.
+    """
+
+    def __init__(self, bot, databases, dispatcher, batch_size=UNBAN_BATCH_SIZE):
+        self.bot = bot
+        self.databases = databases
+        self.dispatcher = dispatcher
+        self.batch_size = batch_size
+        self.deadlines = DeadlineScheduler()
+        self._task = None
+
+    async def cog_load(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def cog_unload(self):
+        if self._task:
+            self._task.cancel()
+
+    def schedule(self, guild_id, ban_id, user_id, expires_at):
+        """Programme la levée d'un ban temporaire (appelé par /ban avec une durée)."""
+        self.deadlines.schedule((guild_id, ban_id, user_id), expires_at)
+
+    async def load_schedule(self):
+        """Charge les bans temporaires non levés de tous les serveurs depuis la base."""
+        for guild_id in await self.databases.guild_ids():
+            for ban_id, user_id, expires_at in await self.databases.for_guild(guild_id).get_pending_unbans():
+                self.schedule(guild_id, ban_id, user_id, expires_at)
+        logger.info("%s ban(s) temporaire(s) programmé(s)", len(self.deadlines))
+
+    async def lift(self, due):
+        """Lève les bans échus ``due`` (liste de clés), par serveur et par lots.
+
+        Les débans refusés temporairement sont reprogrammés ``RETRY_DELAY`` secondes plus tard.
+        """
+        by_guild = defaultdict(list)
+        for key in due:
+            by_guild[key[0]].append(key)
+
+        for guild_id, keys in by_guild.items():
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                logger.warning("Serveur %s indisponible, %s débannissement(s) reporté(s)", guild_id, len(keys))
+                for key in keys:
+                    self.deadlines.schedule(key, time.time() + RETRY_DELAY)
+                continue
+
+            db = self.databases.for_guild(guild_id)
+            for start in range(0, len(keys), self.batch_size):
+                batch = keys[start:start + self.batch_size]
+                results = await asyncio.gather(
+                    *(self.dispatcher.unban(guild, discord.Object(id=user_id), reason="Fin du ban temporaire")
+                      for _, _, user_id in batch),
+                    return_exceptions=True,
+                )
+                lifted = []
+                for key, result in zip(batch, results):
+                    # NotFound : l'utilisateur a déjà été débanni manuellement
+                    if result is None or isinstance(result, discord.NotFound):
+                        lifted.append(key[1])
+                    else:
+                        logger.error("Échec du débannissement de %s sur le serveur %s: %s", key[2], guild_id, result)
+                        self.deadlines.schedule(key, time.time() + RETRY_DELAY)
+                await db.mark_unbans_lifted(lifted)
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        await self.load_schedule()
+        while True:
+            try:
+                await self.lift(await self.deadlines.wait_due())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Erreur lors de la levée des bans temporaires: %s", e)
+                await asyncio.sleep(RETRY_DELAY)
+                # Les échéances retirées du tas mais non levées sont relues depuis la base
+                await self.load_schedule()
@@ -1,2 +1,4 @@
    # cogs/moderation/database/__init__.py
-from .database import ModerationDB  # Assurez-vous que cela est présent
\ No newline at end of file
+from .database import ModerationDB  # Assurez-vous que cela est présent
+from .async_database import AsyncModerationDB
+from .router import GuildDatabases
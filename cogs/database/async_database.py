@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from cogs.metrics import REGISTRY
+
+from .database import ModerationDB
+
+logger = logging.getLogger("moderation")
+
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    "diobot_db_query_seconds", "Durée des appels à la base, attente de l'exécuteur comprise", ("method",)
+)
+
+
+def _threaded(name):
+    """Expose une méthode de ModerationDB sous forme de coroutine exécutée dans l'exécuteur."""
+    sync_method = getattr(ModerationDB, name)
+
+    async def method(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            db = await self._open()
+            return await self._run(getattr(db, name), *args, **kwargs)
+        finally:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - started, method=name)
+
+    method.__name__ = name
+    method.__qualname__ = f"AsyncModerationDB.{name}"
+    method.__doc__ = sync_method.__doc__
+    return method
+
+
+class AsyncModerationDB:
+    """Variante asynchrone de ModerationDB.
+
+    Chaque appel sqlite3 est exécuté dans un exécuteur dédié afin de ne jamais
+    bloquer la boucle d'événements de discord.py (heartbeats, interactions).
+    Les méthodes portent les mêmes noms et arguments que ModerationDB.
+
+    La base (pool de connexions, migrations) est ouverte dans l'exécuteur au
+    premier appel : construire l'instance ne touche pas au disque.
+    """
+
+    def __init__(self, db_path, executor=None, guild_id=0, **pool_options):
+        self.db_path = db_path
+        self.guild_id = guild_id
+        self.db = None
+        self._pool_options = pool_options
+        self._opening = None
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="moderation-db")
+
+    @property
+    def moderator_cache(self):
+        """Cache des modérateurs, None tant que la base n'est pas ouverte."""
+        return self.db.moderator_cache if self.db is not None else None
+
+    async def _open(self):
+        """Ouvre la base dans l'exécuteur au premier appel (une seule fois, même en concurrence)."""
+        if self.db is None:
+            if self._opening is None:
+                self._opening = asyncio.Lock()
+            async with self._opening:
+                if self.db is None:
+                    self.db = await self._run(ModerationDB, self.db_path, guild_id=self.guild_id,
+                                              **self._pool_options)
+        return self.db
+
+    async def _run(self, func, *args, **kwargs):
+        """Exécute un appel bloquant dans l'exécuteur de la base de données."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    def close(self):
+        """Arrête l'exécuteur s'il a été créé par cette instance et ferme les connexions."""
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
+        if self.db is not None:
+            self.db.close()
+
+    init_database = _threaded("init_database")
+    get_moderator_data = _threaded("get_moderator_data")
+    update_moderator_ban_limit = _threaded("update_moderator_ban_limit")
+    get_all_moderators = _threaded("get_all_moderators")
+    set_moderator_data = _threaded("set_moderator_data")
+    get_reset_schedule = _threaded("get_reset_schedule")
+    reset_due_moderators = _threaded("reset_due_moderators")
+    add_ban_to_history = _threaded("add_ban_to_history")
+    consume_ban = _threaded("consume_ban")
+    consume_bans = _threaded("consume_bans")
+    get_pending_unbans = _threaded("get_pending_unbans")
+    mark_unbans_lifted = _threaded("mark_unbans_lifted")
+    get_guild_settings = _threaded("get_guild_settings")
+    set_modlog = _threaded("set_modlog")
+    get_banned_terms = _threaded("get_banned_terms")
+    add_banned_term = _threaded("add_banned_term")
+    remove_banned_term = _threaded("remove_banned_term")
+    get_image_hashes = _threaded("get_image_hashes")
+    add_image_hash = _threaded("add_image_hash")
+    remove_image_hash = _threaded("remove_image_hash")
+    get_ban_history = _threaded("get_ban_history")
+    get_ban_history_page = _threaded("get_ban_history_page")
+    get_all_ban_history = _threaded("get_all_ban_history")
+    get_bans_for_user = _threaded("get_bans_for_user")
+    create_moderator = _threaded("create_moderator")
+    delete_moderator = _threaded("delete_moderator")
+    delete_ban_history = _threaded("delete_ban_history")
+    get_all_moderators_with_ban_limits = _threaded("get_all_moderators_with_ban_limits")
@@ -0,0 +1,159 @@
+import threading
+from collections import OrderedDict
+
+DEFAULT_MODERATOR_CACHE_SIZE = 1024
+
+
+class ModeratorRecord:
+    """Données d'un modérateur, stockées de façon compacte (``__slots__``).
+
+    Les enregistrements sont immuables par convention : chaque écriture en crée un
+    nouveau. L'accès par clé (``record["ban_limit"]``, ``record.get(...)``) est
+    conservé pour rester compatible avec l'ancien format dict.
+    """
+
+    __slots__ = ("user_id", "ban_limit", "initial_limit", "reset_date", "username", "reset_interval_days")
+
+    def __init__(self, user_id, ban_limit, initial_limit, reset_date, username, reset_interval_days=None):
+        self.user_id = user_id
+        self.ban_limit = ban_limit
+        self.initial_limit = initial_limit
+        self.reset_date = reset_date
+        self.username = username
+        self.reset_interval_days = reset_interval_days
+
+    @classmethod
+    def from_row(cls, row):
+        """Construit un enregistrement depuis une ligne de la table moderators."""
+        return cls(*row[:6])
+
+    def replace(self, **changes):
+        """Retourne une copie avec les champs indiqués modifiés."""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return ModeratorRecord(**values)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def __eq__(self, other):
+        if isinstance(other, ModeratorRecord):
+            return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+        if isinstance(other, dict):
+            return self.as_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"ModeratorRecord({self.as_dict()})"
+
+
+class ModeratorCache:
+    """Cache LRU borné des modérateurs, mis à jour en écriture par ModerationDB.
+
+    ``generation`` est incrémenté à chaque écriture : une lecture en base commencée
+    avant une écriture concurrente n'insère pas sa valeur (potentiellement périmée).
+    ``complete`` indique que le cache contient tous les modérateurs de la table.
+    """
+
+    def __init__(self, capacity=DEFAULT_MODERATOR_CACHE_SIZE):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0
+        self.complete = False
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, user_id):
+        """Retourne l'enregistrement en cache ou None (compté comme hit/miss)."""
+        with self._lock:
+            record = self._records.get(user_id)
+            if record is None:
+                self.misses += 1
+                return None
+            self._records.move_to_end(user_id)
+            self.hits += 1
+            return record
+
+    def load(self, record, generation):
+        """Insère un enregistrement lu en base, sauf si une écriture a eu lieu entre-temps."""
+        with self._lock:
+            if generation == self.generation and record.user_id not in self._records:
+                self._insert(record)
+
+    def load_all(self, records, generation):
+        """Remplit le cache avec la table complète si elle tient dans la capacité."""
+        with self._lock:
+            if generation != self.generation or len(records) > self.capacity:
+                return
+            self._records.clear()
+            for record in records:
+                self._records[record.user_id] = record
+            self.complete = True
+
+    def all(self):
+        """Retourne tous les enregistrements si le cache est complet, sinon None."""
+        with self._lock:
+            if not self.complete:
+                return None
+            self.hits += 1
+            return sorted(self._records.values(), key=lambda record: record.user_id)
+
+    def put(self, record):
+        """Écriture : remplace l'enregistrement du modérateur."""
+        with self._lock:
+            self.generation += 1
+            self._records.pop(record.user_id, None)
+            self._insert(record)
+
+    def update(self, user_id, **changes):
+        """Écriture partielle : modifie les champs d'un enregistrement s'il est en cache."""
+        with self._lock:
+            self.generation += 1
+            record = self._records.get(user_id)
+            if record is not None:
+                self._records[user_id] = record.replace(**changes)
+
+    def discard(self, user_id):
+        """Écriture : retire un modérateur (supprimé ou modifié hors du cache)."""
+        with self._lock:
+            self.generation += 1
+            self._records.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._records.clear()
+            self.complete = False
+
+    def stats(self):
+        """Compteurs du cache (hits, misses, évictions, taille)."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._records),
+                "capacity": self.capacity,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _insert(self, record):
+        self._records[record.user_id] = record
+        while len(self._records) > self.capacity:
+            self._records.popitem(last=False)
+            self.evictions += 1
+            self.complete = False
@@ -1,245 +1,662 @@
 import sqlite3
 import os
 import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
+from cogs.metrics import instrumented
+
+from .cache import ModeratorCache, ModeratorRecord, DEFAULT_MODERATOR_CACHE_SIZE
+from .migrations import migrate
+
 logger = logging.getLogger("moderation")
 
+# Valeurs par défaut des pragmas appliqués à chaque connexion du pool
+DEFAULT_POOL_SIZE = 4
+DEFAULT_MMAP_SIZE = 64 * 1024 * 1024  # 64 Mo
+DEFAULT_CACHE_SIZE = -8000  # négatif = en Kio (~8 Mo par connexion)
+DEFAULT_CACHED_STATEMENTS = 128
+
+# Colonnes lues par le code : l'ordre correspond à ModeratorRecord et à l'ancien format des lignes
+MODERATOR_COLUMNS = "user_id, ban_limit, initial_limit, reset_date, username, reset_interval_days"
+BAN_HISTORY_COLUMNS = "id, moderator_id, banned_user_id, banned_user_name, reason, timestamp"
+
+# Requêtes fréquentes, servies par les index créés dans migrations.py (toutes filtrées par serveur)
+SELECT_MODERATOR = f"SELECT {MODERATOR_COLUMNS} FROM moderators WHERE guild_id = ? AND user_id = ?"
+SELECT_MODERATORS = f"SELECT {MODERATOR_COLUMNS} FROM moderators WHERE guild_id = ? ORDER BY user_id"
+SELECT_BAN_HISTORY_BY_MODERATOR = f"SELECT {BAN_HISTORY_COLUMNS} FROM ban_history WHERE guild_id = ? AND moderator_id = ? ORDER BY id DESC"
+SELECT_BAN_HISTORY = f"SELECT {BAN_HISTORY_COLUMNS} FROM ban_history WHERE guild_id = ? ORDER BY id DESC"
+SELECT_BANS_FOR_USER = f"SELECT {BAN_HISTORY_COLUMNS} FROM ban_history WHERE guild_id = ? AND banned_user_id = ? ORDER BY id DESC"
+SELECT_BAN_HISTORY_PAGE_BY_MODERATOR = (
+    f"SELECT {BAN_HISTORY_COLUMNS} FROM ban_history WHERE guild_id = ? AND moderator_id = ? AND id < ? ORDER BY id DESC LIMIT ?"
+)
+SELECT_BAN_HISTORY_PAGE = f"SELECT {BAN_HISTORY_COLUMNS} FROM ban_history WHERE guild_id = ? AND id < ? ORDER BY id DESC LIMIT ?"
+SELECT_PENDING_UNBANS = (
+    "SELECT id, banned_user_id, expires_at FROM ban_history "
+    "WHERE guild_id = ? AND expires_at IS NOT NULL AND lifted_at IS NULL ORDER BY expires_at"
+)
+SELECT_GUILD_SETTINGS = "SELECT modlog_channel_id, modlog_webhook_url FROM guild_settings WHERE guild_id = ?"
+SELECT_BANNED_TERMS = "SELECT term FROM banned_terms WHERE guild_id = ? ORDER BY term"
+SELECT_IMAGE_HASHES = "SELECT phash, dhash, label FROM image_hashes WHERE guild_id = ? ORDER BY phash"
+SELECT_GUILD_IDS = "SELECT DISTINCT guild_id FROM moderators ORDER BY guild_id"
+
+# Intervalle appliqué aux modérateurs enregistrés avant l'ajout de reset_interval_days
+DEFAULT_RESET_INTERVAL_DAYS = 30
+
+# Plus grand rowid possible : curseur de la première page
+MAX_ROWID = 2 ** 63 - 1
+
+
+class ConnectionPool:
+    """Pool de connexions sqlite3 persistantes partagées entre les threads.
+
+    Les connexions sont ouvertes à la demande (jusqu'à ``size``), configurées
+    une seule fois (WAL, synchronous=NORMAL, mmap, cache) puis réutilisées,
+    ce qui permet aussi à sqlite3 de réutiliser ses requêtes préparées.
+    """
+
+    def __init__(self, db_path, size=DEFAULT_POOL_SIZE, mmap_size=DEFAULT_MMAP_SIZE,
+                 cache_size=DEFAULT_CACHE_SIZE, cached_statements=DEFAULT_CACHED_STATEMENTS,
+                 timeout=5.0):
+        self.db_path = db_path
+        self.size = size
+        self.mmap_size = int(mmap_size)
+        self.cache_size = int(cache_size)
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self):
+        """Ouvre une nouvelle connexion et applique les pragmas."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        conn.execute(f"PRAGMA cache_size={self.cache_size}")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Le pool de connexions est fermé.")
+            if len(self._connections) < self.size:
+                conn = self._connect()
+                self._connections.append(conn)
+                return conn
+        return self._idle.get(timeout=self.timeout)
+
+    @contextmanager
+    def connection(self):
+        """Emprunte une connexion du pool le temps d'un bloc ``with``."""
+        conn = self._acquire()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
+
+    def close(self):
+        """Ferme toutes les connexions du pool."""
+        with self._lock:
+            self._closed = True
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+
+
 class ModerationDB:
-    """Gère les interactions avec la base de données pour le module de modération."""
-    
-    def __init__(self, db_path):
+    """Gère les interactions avec la base de données pour le module de modération.
+
+    Une instance correspond à un serveur (``guild_id``) : toutes les requêtes sont
+    filtrées par serveur. Plusieurs instances peuvent partager le même ``pool``
+    (un seul fichier pour tous les serveurs) ; le pool n'est alors ni migré ici (c'est
+    à son propriétaire de le faire) ni fermé par ``close``.
+    """
+
+    def __init__(self, db_path, pool_size=DEFAULT_POOL_SIZE, mmap_size=DEFAULT_MMAP_SIZE,
+                 cache_size=DEFAULT_CACHE_SIZE, moderator_cache_size=DEFAULT_MODERATOR_CACHE_SIZE,
+                 guild_id=0, pool=None):
         self.db_path = db_path
-        self.init_database()
-    
+        self.guild_id = guild_id
+        self._owns_pool = pool is None
+        self._pool = pool or ConnectionPool(db_path, size=pool_size, mmap_size=mmap_size, cache_size=cache_size)
+        # Cache des modérateurs : toutes les écritures passant par cette classe le tiennent à jour
+        self.moderator_cache = ModeratorCache(moderator_cache_size)
+        if self._owns_pool:
+            self.init_database()
+
+    def close(self):
+        """Ferme les connexions persistantes vers la base de données (si le pool n'est pas partagé)."""
+        if self._owns_pool:
+            self._pool.close()
+
+    @instrumented("db")
     def init_database(self):
         """Initialise la base de données."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Créer la table des modérateurs
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS moderators (
-                user_id INTEGER PRIMARY KEY,
-                ban_limit INTEGER,
-                initial_limit INTEGER,
-                reset_date TEXT,
-                username TEXT
-            )
-            ''')
-            
-            # Créer la table de l'historique des bans
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS ban_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                moderator_id INTEGER,
-                banned_user_id INTEGER,
-                banned_user_name TEXT,
-                reason TEXT,
-                timestamp TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
-            
-            conn.commit()
-            conn.close()
-            
-            logger.info(f"Base de données initialisée avec succès: {self.db_path}")
+            with self._pool.connection() as conn:
+                applied = migrate(conn)
+
+            logger.info("Base de données initialisée avec succès: %s (migrations appliquées: %s)", self.db_path, applied or 'aucune')
             return True
         except Exception as e:
-            logger.error(f"Erreur lors de l'initialisation de la base de données: {e}")
+            logger.error("Erreur lors de l'initialisation de la base de données: %s", e)
             return False
-    
+
+    @instrumented("db")
     def get_moderator_data(self, user_id):
-        """Récupère les données d'un modérateur depuis la base de données."""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM moderators WHERE user_id = ?", (user_id,))
-            result = cursor.fetchone()
-            conn.close()
-            
+        """Récupère les données d'un modérateur (depuis le cache si possible)."""
+        record = self.moderator_cache.get(user_id)
+        if record is not None:
+            return record
+        try:
+            generation = self.moderator_cache.generation
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(SELECT_MODERATOR, (self.guild_id, user_id))
+                result = cursor.fetchone()
+
             if result:
-                return {
-                    "user_id": result[0],
-                    "ban_limit": result[1],
-                    "initial_limit": result[2],
-                    "reset_date": result[3],
-                    "username": result[4]
-                }
-            logger.warning(f"Aucun modérateur trouvé pour l'utilisateur ID: {user_id}")
+                record = ModeratorRecord.from_row(result)
+                self.moderator_cache.load(record, generation)
+                return record
+            logger.warning("Aucun modérateur trouvé pour l'utilisateur ID: %s (serveur %s)", user_id, self.guild_id)
             return None
         except Exception as e:
-            logger.error(f"Erreur lors de la récupération des données du modérateur: {e}")
+            logger.error("Erreur lors de la récupération des données du modérateur: %s", e)
             return None
-        
+
+    @instrumented("db")
     def update_moderator_ban_limit(self, user_id, new_ban_limit):
         """Met à jour la limite de bans d'un modérateur dans la base de données."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "UPDATE moderators SET ban_limit = ? WHERE user_id = ?",
-                (new_ban_limit, user_id)
-            )
-            
-            conn.commit()
-            conn.close()
-            logger.info(f"Limite de bans mise à jour pour l'utilisateur ID: {user_id} à {new_ban_limit}")
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute(
+                    "UPDATE moderators SET ban_limit = ? WHERE guild_id = ? AND user_id = ?",
+                    (new_ban_limit, self.guild_id, user_id)
+                )
+
+                conn.commit()
+            self.moderator_cache.update(user_id, ban_limit=new_ban_limit)
+            logger.info("Limite de bans mise à jour pour l'utilisateur ID: %s à %s", user_id, new_ban_limit)
             return True
         except Exception as e:
-            logger.error(f"Erreur lors de la mise à jour de la limite de bans: {e}")
+            logger.error("Erreur lors de la mise à jour de la limite de bans: %s", e)
             return False
-    
+
+    @instrumented("db")
     def get_all_moderators(self):
         """Récupère tous les modérateurs depuis la base de données."""
+        return [record.as_dict() for record in self._all_moderator_records()]
+
+    def _all_moderator_records(self):
+        """Retourne tous les modérateurs, depuis le cache s'il contient toute la table."""
+        records = self.moderator_cache.all()
+        if records is not None:
+            return records
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM moderators")
-            results = cursor.fetchall()
-            conn.close()
-            
-            moderators = []
-            for result in results:
-                moderators.append({
-                    "user_id": result[0],
-                    "ban_limit": result[1],
-                    "initial_limit": result[2],
-                    "reset_date": result[3],
-                    "username": result[4]
-                })
-            return moderators
-        except Exception as e:
-            logger.error(f"Erreur lors de la récupération de tous les modérateurs: {e}")
+            generation = self.moderator_cache.generation
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(SELECT_MODERATORS, (self.guild_id,))
+                results = cursor.fetchall()
+
+            records = [ModeratorRecord.from_row(result) for result in results]
+            self.moderator_cache.load_all(records, generation)
+            return records
+        except Exception as e:
+            logger.error("Erreur lors de la récupération de tous les modérateurs: %s", e)
             return []
-    
-    def set_moderator_data(self, user_id, initial_ban_limit, current_ban_limit, reset_date, username):
-        """Met à jour les données du modérateur dans la base de données."""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO moderators (user_id, ban_limit, initial_limit, reset_date, username) VALUES (?, ?, ?, ?, ?) "
-                "ON CONFLICT(user_id) DO UPDATE SET ban_limit = ?, initial_limit = ?, reset_date = ?, username = ?",
-                (user_id, current_ban_limit, initial_ban_limit, reset_date, username, current_ban_limit, initial_ban_limit, reset_date, username)
-            )
-            conn.commit()
-            conn.close()
-            logger.info(f"Données mises à jour pour le modérateur {username} (ID: {user_id})")
+
+    @instrumented("db")
+    def set_moderator_data(self, user_id, initial_ban_limit, current_ban_limit, reset_date, username, reset_interval_days=None):
+        """Met à jour les données du modérateur dans la base de données.
+
+        ``reset_interval_days`` est l'intervalle choisi via /setban ; s'il est omis,
+        l'intervalle déjà enregistré est conservé.
+        """
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT INTO moderators (guild_id, user_id, ban_limit, initial_limit, reset_date, username, reset_interval_days) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(guild_id, user_id) DO UPDATE SET ban_limit = excluded.ban_limit, initial_limit = excluded.initial_limit, "
+                    "reset_date = excluded.reset_date, username = excluded.username, "
+                    "reset_interval_days = COALESCE(excluded.reset_interval_days, reset_interval_days) "
+                    f"RETURNING {MODERATOR_COLUMNS}",
+                    (self.guild_id, user_id, current_ban_limit, initial_ban_limit, reset_date, username, reset_interval_days)
+                )
+                row = cursor.fetchone()
+                conn.commit()
+            self.moderator_cache.put(ModeratorRecord.from_row(row))
+            logger.info("Données mises à jour pour le modérateur %s (ID: %s)", username, user_id)
             return True
         except Exception as e:
-            logger.error(f"Erreur lors de la mise à jour des données du modérateur {username} (ID: {user_id}): {e}")
+            logger.error("Erreur lors de la mise à jour des données du modérateur %s (ID: %s): %s", username, user_id, e)
             return False
-    
+
+    @instrumented("db")
+    def get_reset_schedule(self):
+        """Retourne les échéances de réinitialisation : liste de (user_id, reset_date)."""
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT user_id, reset_date FROM moderators WHERE guild_id = ? AND reset_date IS NOT NULL",
+                    (self.guild_id,)
+                )
+                results = cursor.fetchall()
+            return results
+        except Exception as e:
+            logger.error("Erreur lors de la récupération des échéances de réinitialisation: %s", e)
+            return []
+
+    @instrumented("db")
+    def reset_due_moderators(self, now=None):
+        """Réinitialise en une seule requête tous les quotas arrivés à échéance.
+
+        Chaque modérateur retrouve son ``initial_limit`` et sa prochaine échéance est
+        ``now + reset_interval_days`` (intervalle défini via /setban). Retourne la liste
+        des (user_id, nouvelle reset_date).
+        """
+        now = (now or datetime.utcnow()).isoformat(timespec="microseconds")
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "UPDATE moderators SET ban_limit = initial_limit, "
+                    "reset_date = strftime('%Y-%m-%dT%H:%M:%S', :now, '+' || COALESCE(reset_interval_days, :default_days) || ' days') "
+                    "WHERE guild_id = :guild_id AND reset_date IS NOT NULL AND reset_date <= :now "
+                    "RETURNING user_id, ban_limit, reset_date",
+                    {"now": now, "default_days": DEFAULT_RESET_INTERVAL_DAYS, "guild_id": self.guild_id}
+                )
+                results = cursor.fetchall()
+                conn.commit()
+            for user_id, ban_limit, reset_date in results:
+                self.moderator_cache.update(user_id, ban_limit=ban_limit, reset_date=reset_date)
+            if results:
+                logger.info("Quotas de bans réinitialisés pour %s modérateur(s) (serveur %s)", len(results), self.guild_id)
+            return [(user_id, reset_date) for user_id, _, reset_date in results]
+        except Exception as e:
+            logger.error("Erreur lors de la réinitialisation des quotas: %s", e)
+            return []
+
+    @instrumented("db")
     def add_ban_to_history(self, moderator_id, banned_user_id, banned_user_name, reason):
         """Ajoute un bannissement à l'historique."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO ban_history (moderator_id, banned_user_id, banned_user_name, reason) VALUES (?, ?, ?, ?)",
-                (moderator_id, banned_user_id, banned_user_name, reason)
-            )
-            conn.commit()
-            conn.close()
-            logger.info(f"Bannissement ajouté à l'historique pour {banned_user_name} (ID: {banned_user_id})")
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT INTO ban_history (guild_id, moderator_id, banned_user_id, banned_user_name, reason) VALUES (?, ?, ?, ?, ?)",
+                    (self.guild_id, moderator_id, banned_user_id, banned_user_name, reason)
+                )
+                conn.commit()
+            logger.info("Bannissement ajouté à l'historique pour %s (ID: %s)", banned_user_name, banned_user_id)
             return True
         except Exception as e:
-            logger.error(f"Erreur lors de l'enregistrement du bannissement: {e}")
+            logger.error("Erreur lors de l'enregistrement du bannissement: %s", e)
             return False
-    
-    def get_ban_history(self, moderator_id=None):
-        """Récupère l'historique des bannissements pour un modérateur spécifique ou tous les bannissements."""
+
+    @instrumented("db")
+    def consume_ban(self, moderator_id, banned_user_id, banned_user_name, reason, expires_at=None):
+        """Décrémente le quota du modérateur et enregistre le bannissement en une seule transaction.
+
+        Le décrément est conditionnel (``ban_limit > 0``), ce qui garantit qu'une rafale
+        de /ban ne peut pas dépasser le quota. ``expires_at`` (epoch) marque un ban
+        temporaire. Retourne ``{"ban_id", "ban_limit"}`` ou None si le modérateur
+        n'existe pas ou n'a plus de bans disponibles.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            if moderator_id:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
                 cursor.execute(
-                    "SELECT * FROM ban_history WHERE moderator_id = ? ORDER BY timestamp DESC",
-                    (moderator_id,)
+                    "UPDATE moderators SET ban_limit = ban_limit - 1 WHERE guild_id = ? AND user_id = ? AND ban_limit > 0 RETURNING ban_limit",
+                    (self.guild_id, moderator_id)
                 )
-            else:
-                cursor.execute("SELECT * FROM ban_history ORDER BY timestamp DESC")
-            
-            results = cursor.fetchall()
-            conn.close()
+                row = cursor.fetchone()
+                if row is None:
+                    conn.rollback()
+                    logger.warning("Quota de bans épuisé ou modérateur inconnu: %s", moderator_id)
+                    return None
+
+                cursor.execute(
+                    "INSERT INTO ban_history (guild_id, moderator_id, banned_user_id, banned_user_name, reason, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.guild_id, moderator_id, banned_user_id, banned_user_name, reason, expires_at)
+                )
+                ban_id = cursor.lastrowid
+                conn.commit()
+            self.moderator_cache.update(moderator_id, ban_limit=row[0])
+            logger.info("Bannissement de %s (ID: %s) comptabilisé pour le modérateur %s, bans restants: %s", banned_user_name, banned_user_id, moderator_id, row[0])
+            return {"ban_id": ban_id, "ban_limit": row[0]}
+        except Exception as e:
+            logger.error("Erreur lors de la comptabilisation du bannissement: %s", e)
+            return None
+
+    @instrumented("db")
+    def consume_bans(self, moderator_id, bans):
+        """Version groupée de consume_ban pour /massban : une seule transaction pour tout le lot.
+
+        ``bans`` est une liste de (banned_user_id, banned_user_name, reason). Le quota est
+        décrémenté de ``len(bans)`` seulement s'il est suffisant. Retourne
+        ``{"ban_ids", "ban_limit"}`` (ids dans l'ordre de ``bans``) ou None.
+        """
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "UPDATE moderators SET ban_limit = ban_limit - ? WHERE guild_id = ? AND user_id = ? AND ban_limit >= ? RETURNING ban_limit",
+                    (len(bans), self.guild_id, moderator_id, len(bans))
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    conn.rollback()
+                    logger.warning("Quota de bans insuffisant pour %s bannissement(s) ou modérateur inconnu: %s", len(bans), moderator_id)
+                    return None
+
+                ban_ids = []
+                for banned_user_id, banned_user_name, reason in bans:
+                    cursor.execute(
+                        "INSERT INTO ban_history (guild_id, moderator_id, banned_user_id, banned_user_name, reason) VALUES (?, ?, ?, ?, ?)",
+                        (self.guild_id, moderator_id, banned_user_id, banned_user_name, reason)
+                    )
+                    ban_ids.append(cursor.lastrowid)
+                conn.commit()
+            self.moderator_cache.update(moderator_id, ban_limit=row[0])
+            logger.info("%s bannissement(s) comptabilisé(s) pour le modérateur %s, bans restants: %s", len(bans), moderator_id, row[0])
+            return {"ban_ids": ban_ids, "ban_limit": row[0]}
+        except Exception as e:
+            logger.error("Erreur lors de la comptabilisation des bannissements: %s", e)
+            return None
+
+    @instrumented("db")
+    def get_pending_unbans(self):
+        """Bans temporaires non encore levés : liste de (ban_id, banned_user_id, expires_at)."""
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(SELECT_PENDING_UNBANS, (self.guild_id,))
+                results = cursor.fetchall()
+            return results
+        except Exception as e:
+            logger.error("Erreur lors de la récupération des bans temporaires: %s", e)
+            return []
+
+    @instrumented("db")
+    def mark_unbans_lifted(self, ban_ids, lifted_at=None):
+        """Marque des bans temporaires comme levés, en une seule transaction."""
+        if not ban_ids:
+            return True
+        lifted_at = int(time.time()) if lifted_at is None else lifted_at
+        try:
+            with self._pool.connection() as conn:
+                conn.executemany(
+                    "UPDATE ban_history SET lifted_at = ? WHERE id = ? AND guild_id = ?",
+                    [(lifted_at, ban_id, self.guild_id) for ban_id in ban_ids]
+                )
+                conn.commit()
+            logger.info("%s ban(s) temporaire(s) levé(s) (serveur %s)", len(ban_ids), self.guild_id)
+            return True
+        except Exception as e:
+            logger.error("Erreur lors de l'enregistrement des débannissements: %s", e)
+            return False
+
+    @instrumented("db")
+    def get_guild_settings(self):
+        """Réglages du serveur : dict (modlog_channel_id, modlog_webhook_url), vide si non configuré."""
+        try:
+            with self._pool.connection() as conn:
+                row = conn.execute(SELECT_GUILD_SETTINGS, (self.guild_id,)).fetchone()
+            if row is None:
+                return {}
+            return {"modlog_channel_id": row[0], "modlog_webhook_url": row[1]}
+        except Exception as e:
+            logger.error("Erreur lors de la récupération des réglages du serveur %s: %s", self.guild_id, e)
+            return {}
+
+    @instrumented("db")
+    def set_modlog(self, channel_id=None, webhook_url=None):
+        """Définit la destination du journal de modération (salon ou webhook)."""
+        try:
+            with self._pool.connection() as conn:
+                conn.execute(
+                    "INSERT INTO guild_settings (guild_id, modlog_channel_id, modlog_webhook_url) VALUES (?, ?, ?) "
+                    "ON CONFLICT(guild_id) DO UPDATE SET modlog_channel_id = excluded.modlog_channel_id, "
+                    "modlog_webhook_url = excluded.modlog_webhook_url",
+                    (self.guild_id, channel_id, webhook_url)
+                )
+                conn.commit()
+            logger.info("Journal de modération configuré pour le serveur %s", self.guild_id)
+            return True
+        except Exception as e:
+            logger.error("Erreur lors de la configuration du journal de modération: %s", e)
+            return False
+
+    @instrumented("db")
+    def get_banned_terms(self):
+        """Liste des termes interdits du serveur."""
+        try:
+            with self._pool.connection() as conn:
+                return [term for term, in conn.execute(SELECT_BANNED_TERMS, (self.guild_id,))]
+        except Exception as e:
+            logger.error("Erreur lors de la récupération des termes interdits: %s", e)
+            return []
+
+    @instrumented("db")
+    def add_banned_term(self, term):
+        """Ajoute un terme interdit ; retourne False s'il existait déjà ou en cas d'erreur."""
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO banned_terms (guild_id, term) VALUES (?, ?)", (self.guild_id, term)
+                )
+                conn.commit()
+            return cursor.rowcount == 1
+        except Exception as e:
+            logger.error("Erreur lors de l'ajout du terme interdit %s: %s", term, e)
+            return False
+
+    @instrumented("db")
+    def remove_banned_term(self, term):
+        """Retire un terme interdit ; retourne False s'il n'existait pas ou en cas d'erreur."""
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.execute(
+                    "DELETE FROM banned_terms WHERE guild_id = ? AND term = ?", (self.guild_id, term)
+                )
+                conn.commit()
+            return cursor.rowcount == 1
+        except Exception as e:
+            logger.error("Erreur lors de la suppression du terme interdit %s: %s", term, e)
+            return False
+
+    @instrumented("db")
+    def get_image_hashes(self):
+        """Empreintes des images interdites du serveur : liste de (phash, dhash, label)."""
+        try:
+            with self._pool.connection() as conn:
+                return [
+                    (int(phash, 16), int(dhash, 16), label)
+                    for phash, dhash, label in conn.execute(SELECT_IMAGE_HASHES, (self.guild_id,))
+                ]
+        except Exception as e:
+            logger.error("Erreur lors de la récupération des images interdites: %s", e)
+            return []
+
+    @instrumented("db")
+    def add_image_hash(self, phash, dhash, label=None):
+        """Ajoute une image interdite ; retourne False si elle existait déjà ou en cas d'erreur."""
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO image_hashes (guild_id, phash, dhash, label) VALUES (?, ?, ?, ?)",
+                    (self.guild_id, f"{phash:016x}", f"{dhash:016x}", label)
+                )
+                conn.commit()
+            return cursor.rowcount == 1
+        except Exception as e:
+            logger.error("Erreur lors de l'ajout de l'image interdite %016x: %s", phash, e)
+            return False
+
+    @instrumented("db")
+    def remove_image_hash(self, phash):
+        """Retire une image interdite ; retourne False si elle n'existait pas ou en cas d'erreur."""
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.execute(
+                    "DELETE FROM image_hashes WHERE guild_id = ? AND phash = ?", (self.guild_id, f"{phash:016x}")
+                )
+                conn.commit()
+            return cursor.rowcount == 1
+        except Exception as e:
+            logger.error("Erreur lors de la suppression de l'image interdite %016x: %s", phash, e)
+            return False
+
+    @instrumented("db")
+    def get_ban_history(self, moderator_id=None):
+        """Récupère l'historique des bannissements pour un modérateur spécifique ou tous les bannissements."""
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+
+                if moderator_id:
+                    cursor.execute(SELECT_BAN_HISTORY_BY_MODERATOR, (self.guild_id, moderator_id))
+                else:
+                    cursor.execute(SELECT_BAN_HISTORY, (self.guild_id,))
+
+                results = cursor.fetchall()
+            return results
+        except Exception as e:
+            logger.error("Erreur lors de la récupération de l'historique des bannissements: %s", e)
+            return []
+
+    @instrumented("db")
+    def get_ban_history_page(self, moderator_id=None, before_id=None, limit=10):
+        """Récupère une page de l'historique, du plus récent au plus ancien (pagination par clé).
+
+        ``before_id`` est l'id du dernier bannissement de la page précédente (None pour
+        la première page). Le coût ne dépend que de ``limit``, pas de la taille de la table.
+        """
+        before_id = MAX_ROWID if before_id is None else before_id
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+
+                if moderator_id:
+                    cursor.execute(SELECT_BAN_HISTORY_PAGE_BY_MODERATOR, (self.guild_id, moderator_id, before_id, limit))
+                else:
+                    cursor.execute(SELECT_BAN_HISTORY_PAGE, (self.guild_id, before_id, limit))
+
+                results = cursor.fetchall()
             return results
         except Exception as e:
-            logger.error(f"Erreur lors de la récupération de l'historique des bannissements: {e}")
+            logger.error("Erreur lors de la récupération d'une page de l'historique des bannissements: %s", e)
             return []
-    
+
+    @instrumented("db")
     def get_all_ban_history(self):
         """Récupère l'historique de tous les bans depuis la base de données."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM ban_history ORDER BY timestamp DESC")
-            results = cursor.fetchall()
-            conn.close()
-            
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(SELECT_BAN_HISTORY, (self.guild_id,))
+                results = cursor.fetchall()
+
             return results
         except Exception as e:
-            logger.error(f"Erreur lors de la récupération de l'historique des bans: {e}")
+            logger.error("Erreur lors de la récupération de l'historique des bans: %s", e)
             return []
 
+    @instrumented("db")
+    def get_bans_for_user(self, banned_user_id):
+        """Récupère les bannissements d'un utilisateur banni, du plus récent au plus ancien."""
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(SELECT_BANS_FOR_USER, (self.guild_id, banned_user_id))
+                results = cursor.fetchall()
+
+            return results
+        except Exception as e:
+            logger.error("Erreur lors de la récupération des bannissements de l'utilisateur %s: %s", banned_user_id, e)
+            return []
+
+    @instrumented("db")
     def create_moderator(self, user_id, ban_limit, initial_limit, reset_date):
         """Ajoute un modérateur à la base de données."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO moderators (user_id, ban_limit, initial_limit, reset_date) VALUES (?, ?, ?, ?)",
-                (user_id, ban_limit, initial_limit, reset_date)
-            )
-            conn.commit()
-            conn.close()
-            logger.info(f"Modérateur ajouté: {user_id}")
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT INTO moderators (guild_id, user_id, ban_limit, initial_limit, reset_date) VALUES (?, ?, ?, ?, ?) "
+                    f"RETURNING {MODERATOR_COLUMNS}",
+                    (self.guild_id, user_id, ban_limit, initial_limit, reset_date)
+                )
+                row = cursor.fetchone()
+                conn.commit()
+            self.moderator_cache.put(ModeratorRecord.from_row(row))
+            logger.info("Modérateur ajouté: %s", user_id)
             return True
         except Exception as e:
-            logger.error(f"Erreur lors de l'ajout du modérateur: {e}")
+            logger.error("Erreur lors de l'ajout du modérateur: %s", e)
             return False
 
+    @instrumented("db")
     def delete_moderator(self, user_id):
         """Supprime un modérateur de la base de données."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM moderators WHERE user_id = ?", (user_id,))
-            conn.commit()
-            conn.close()
-            logger.info(f"Modérateur supprimé: {user_id}")
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM moderators WHERE guild_id = ? AND user_id = ?", (self.guild_id, user_id))
+                conn.commit()
+            self.moderator_cache.discard(user_id)
+            logger.info("Modérateur supprimé: %s", user_id)
             return True
         except Exception as e:
-            logger.error(f"Erreur lors de la suppression du modérateur: {e}")
+            logger.error("Erreur lors de la suppression du modérateur: %s", e)
             return False
 
+    @instrumented("db")
     def delete_ban_history(self, ban_id):
         """Supprime un enregistrement de l'historique des bans."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM ban_history WHERE id = ?", (ban_id,))
-            conn.commit()
-            conn.close()
-            logger.info(f"Bannissement supprimé de l'historique: {ban_id}")
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM ban_history WHERE id = ? AND guild_id = ?", (ban_id, self.guild_id))
+                conn.commit()
+            logger.info("Bannissement supprimé de l'historique: %s", ban_id)
             return True
         except Exception as e:
-            logger.error(f"Erreur lors de la suppression de l'historique des bans: {e}")
+            logger.error("Erreur lors de la suppression de l'historique des bans: %s", e)
             return False
 
+    @instrumented("db")
     def get_all_moderators_with_ban_limits(self):
         """Récupère tous les modérateurs et leurs limites de bans."""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT username, ban_limit, reset_date FROM moderators")
-            results = cursor.fetchall()
-            conn.close()
-            
-            return results
-        except Exception as e:
-            logger.error(f"Erreur lors de la récupération des modérateurs: {e}")
-            return []   
\ No newline at end of file
+        return [(record.username, record.ban_limit, record.reset_date) for record in self._all_moderator_records()]
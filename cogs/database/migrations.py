@@ -0,0 +1,201 @@
+import logging
+import time
+
+logger = logging.getLogger("moderation")
+
+
+def _columns(conn, table):
+    """Retourne les noms des colonnes d'une table."""
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _initial_schema(conn):
+    """Schéma historique, unifiant les deux anciennes définitions (ModerationDB et init_db.py)."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS moderators (
+        user_id INTEGER PRIMARY KEY,
+        ban_limit INTEGER,
+        initial_limit INTEGER,
+        reset_date TEXT,
+        username TEXT
+    )
+    ''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS ban_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        moderator_id INTEGER,
+        banned_user_id INTEGER,
+        banned_user_name TEXT,
+        reason TEXT,
+        timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    # Les bases créées par init_db.py n'avaient pas de colonne username
+    if "username" not in _columns(conn, "moderators"):
+        conn.execute("ALTER TABLE moderators ADD COLUMN username TEXT")
+
+
+def _epoch_timestamps_and_indexes(conn):
+    """Passe ban_history.timestamp en epoch entier et indexe les requêtes fréquentes."""
+    conn.execute('''
+    CREATE TABLE ban_history_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        moderator_id INTEGER,
+        banned_user_id INTEGER,
+        banned_user_name TEXT,
+        reason TEXT,
+        timestamp INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+    )
+    ''')
+    # Les anciennes dates sont du texte ISO (CURRENT_TIMESTAMP ou isoformat) ; NULL reste NULL
+    conn.execute('''
+    INSERT INTO ban_history_new (id, moderator_id, banned_user_id, banned_user_name, reason, timestamp)
+    SELECT id, moderator_id, banned_user_id, banned_user_name, reason,
+           CASE WHEN typeof(timestamp) = 'integer' THEN timestamp
+                ELSE CAST(strftime('%s', timestamp) AS INTEGER) END
+    FROM ban_history
+    ''')
+    conn.execute("DROP TABLE ban_history")
+    conn.execute("ALTER TABLE ban_history_new RENAME TO ban_history")
+    conn.execute("CREATE INDEX idx_ban_history_moderator ON ban_history (moderator_id, id)")
+    conn.execute("CREATE INDEX idx_ban_history_banned_user ON ban_history (banned_user_id)")
+
+
+def _reset_intervals(conn):
+    """Mémorise l'intervalle de réinitialisation choisi via /setban et indexe les échéances."""
+    conn.execute("ALTER TABLE moderators ADD COLUMN reset_interval_days INTEGER")
+    conn.execute("CREATE INDEX idx_moderators_reset_date ON moderators (reset_date)")
+
+
+def _guild_partitioning(conn):
+    """Ajoute guild_id à tout le schéma ; les données existantes sont rattachées au serveur 0."""
+    conn.execute('''
+    CREATE TABLE moderators_new (
+        user_id INTEGER NOT NULL,
+        ban_limit INTEGER,
+        initial_limit INTEGER,
+        reset_date TEXT,
+        username TEXT,
+        reset_interval_days INTEGER,
+        guild_id INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (guild_id, user_id)
+    )
+    ''')
+    conn.execute('''
+    INSERT INTO moderators_new (user_id, ban_limit, initial_limit, reset_date, username, reset_interval_days)
+    SELECT user_id, ban_limit, initial_limit, reset_date, username, reset_interval_days FROM moderators
+    ''')
+    conn.execute("DROP TABLE moderators")
+    conn.execute("ALTER TABLE moderators_new RENAME TO moderators")
+    conn.execute("CREATE INDEX idx_moderators_reset_date ON moderators (guild_id, reset_date)")
+
+    conn.execute("ALTER TABLE ban_history ADD COLUMN guild_id INTEGER NOT NULL DEFAULT 0")
+    conn.execute("DROP INDEX idx_ban_history_moderator")
+    conn.execute("DROP INDEX idx_ban_history_banned_user")
+    conn.execute("CREATE INDEX idx_ban_history_moderator ON ban_history (guild_id, moderator_id, id)")
+    conn.execute("CREATE INDEX idx_ban_history_banned_user ON ban_history (guild_id, banned_user_id)")
+    conn.execute("CREATE INDEX idx_ban_history_guild ON ban_history (guild_id, id)")
+
+
+def _temporary_bans(conn):
+    """Échéance des bans temporaires ; l'index partiel ne couvre que les bans encore actifs."""
+    conn.execute("ALTER TABLE ban_history ADD COLUMN expires_at INTEGER")
+    conn.execute("ALTER TABLE ban_history ADD COLUMN lifted_at INTEGER")
+    conn.execute(
+        "CREATE INDEX idx_ban_history_expiry ON ban_history (guild_id, expires_at) "
+        "WHERE expires_at IS NOT NULL AND lifted_at IS NULL"
+    )
+
+
+def _guild_settings(conn):
+    """Réglages par serveur (destination du journal de modération)."""
+    conn.execute('''
+    CREATE TABLE guild_settings (
+        guild_id INTEGER PRIMARY KEY,
+        modlog_channel_id INTEGER,
+        modlog_webhook_url TEXT
+    )
+    ''')
+
+
+def _banned_terms(conn):
+    """Mots et expressions interdits, par serveur."""
+    conn.execute('''
+    CREATE TABLE banned_terms (
+        guild_id INTEGER NOT NULL,
+        term TEXT NOT NULL,
+        PRIMARY KEY (guild_id, term)
+    )
+    ''')
+
+
+def _image_hashes(conn):
+    """Empreintes perceptuelles des images interdites, par serveur.
+
+    Les empreintes 64 bits sont stockées en hexadécimal : un INTEGER SQLite est signé.
+    """
+    conn.execute('''
+    CREATE TABLE image_hashes (
+        guild_id INTEGER NOT NULL,
+        phash TEXT NOT NULL,
+        dhash TEXT NOT NULL,
+        label TEXT,
+        PRIMARY KEY (guild_id, phash)
+    )
+    ''')
+
+
+# Liste ordonnée des migrations : (version, description, fonction)
+MIGRATIONS = [
+    (1, "Schéma initial", _initial_schema),
+    (2, "Horodatage epoch et index de ban_history", _epoch_timestamps_and_indexes),
+    (3, "Intervalle de réinitialisation des quotas", _reset_intervals),
+    (4, "Partitionnement par serveur (guild_id)", _guild_partitioning),
+    (5, "Bans temporaires (expires_at, lifted_at)", _temporary_bans),
+    (6, "Réglages par serveur (journal de modération)", _guild_settings),
+    (7, "Termes interdits par serveur", _banned_terms),
+    (8, "Empreintes des images interdites par serveur", _image_hashes),
+]
+
+
+def get_schema_version(conn):
+    """Retourne la version du schéma appliquée (0 pour une base vierge)."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at INTEGER
+    )
+    ''')
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(conn, migrations=MIGRATIONS):
+    """Applique les migrations manquantes, chacune dans sa propre transaction.
+
+    Retourne la liste des versions appliquées.
+    """
+    current = get_schema_version(conn)
+    applied = []
+    for version, description, apply in migrations:
+        if version <= current:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Un autre processus a pu appliquer la migration entre-temps
+            current = get_schema_version(conn)
+            if version <= current:
+                conn.rollback()
+                continue
+            apply(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (version, description, int(time.time()))
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logger.info("Migration %s appliquée: %s", version, description)
+        applied.append(version)
+    return applied
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from .async_database import AsyncModerationDB
+from .database import ConnectionPool, SELECT_GUILD_IDS, DEFAULT_POOL_SIZE, DEFAULT_MMAP_SIZE, DEFAULT_CACHE_SIZE
+from .migrations import migrate
+
+logger = logging.getLogger("moderation")
+
+# Threads partagés par toutes les bases des serveurs
+DEFAULT_WORKERS = 4
+DEFAULT_GUILD_DIRECTORY = "guilds"
+
+_GUILD_FILE = re.compile(r"^(\d+)\.db$")
+
+
+class GuildDatabases:
+    """Fournit la base de données de chaque serveur (``for_guild``).
+
+    Par défaut, tous les serveurs partagent un même fichier et un même pool de
+    connexions, chaque requête étant filtrée par ``guild_id``. Avec
+    ``per_guild_files=True``, chaque serveur a son propre fichier dans ``directory``
+    (``<guild_id>.db``) : les serveurs ne se disputent plus le verrou d'écriture de SQLite.
+    Le fichier d'un nouveau serveur est créé et migré dans l'exécuteur, à sa première requête.
+
+    Les données antérieures au partitionnement sont rattachées au serveur 0 ;
+    ``legacy_guild_id`` permet de les associer à un serveur réel.
+    """
+
+    def __init__(self, db_path="moderation.db", per_guild_files=False, directory=DEFAULT_GUILD_DIRECTORY,
+                 workers=DEFAULT_WORKERS, legacy_guild_id=None, pool_size=DEFAULT_POOL_SIZE,
+                 mmap_size=DEFAULT_MMAP_SIZE, cache_size=DEFAULT_CACHE_SIZE, **db_options):
+        self.db_path = db_path
+        self.per_guild_files = per_guild_files
+        self.directory = directory
+        self.legacy_guild_id = legacy_guild_id
+        self._pool_options = {"pool_size": pool_size, "mmap_size": mmap_size, "cache_size": cache_size}
+        self._db_options = db_options
+        self._databases = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="moderation-db")
+        self._pool = None
+        if per_guild_files:
+            os.makedirs(directory, exist_ok=True)
+        else:
+            self._pool = ConnectionPool(db_path, size=pool_size, mmap_size=mmap_size, cache_size=cache_size)
+            with self._pool.connection() as conn:
+                migrate(conn)
+
+    @classmethod
+    def from_env(cls, **options):
+        """Construit le routeur depuis DB_PATH, DB_PER_GUILD, DB_GUILD_DIR et DB_LEGACY_GUILD_ID."""
+        legacy_guild_id = os.getenv("DB_LEGACY_GUILD_ID")
+        return cls(
+            db_path=os.getenv("DB_PATH", "moderation.db"),
+            per_guild_files=os.getenv("DB_PER_GUILD", "").lower() in ("1", "true", "yes"),
+            directory=os.getenv("DB_GUILD_DIR", DEFAULT_GUILD_DIRECTORY),
+            legacy_guild_id=int(legacy_guild_id) if legacy_guild_id else None,
+            **options,
+        )
+
+    def _storage_id(self, guild_id):
+        """Identifiant utilisé en base : 0 pour le serveur qui reprend les anciennes données."""
+        return 0 if guild_id == self.legacy_guild_id else guild_id
+
+    def _guild_path(self, storage_id):
+        if not self.per_guild_files or storage_id == 0:
+            return self.db_path
+        return os.path.join(self.directory, f"{storage_id}.db")
+
+    def for_guild(self, guild_id):
+        """Retourne (en la créant au besoin) la base de données du serveur ``guild_id``.
+
+        Sans accès disque : la base est ouverte dans l'exécuteur à sa première requête.
+        """
+        db = self._databases.get(guild_id)
+        if db is None:
+            storage_id = self._storage_id(guild_id)
+            if self.per_guild_files:
+                db = AsyncModerationDB(self._guild_path(storage_id), executor=self._executor, guild_id=storage_id,
+                                       **self._pool_options, **self._db_options)
+            else:
+                db = AsyncModerationDB(self.db_path, executor=self._executor, guild_id=storage_id, pool=self._pool,
+                                       **self._db_options)
+            self._databases[guild_id] = db
+        return db
+
+    def _stored_guild_ids(self):
+        """Liste les serveurs présents en base (identifiants de stockage)."""
+        if self.per_guild_files:
+            guild_ids = [int(match.group(1)) for match in map(_GUILD_FILE.match, os.listdir(self.directory)) if match]
+            if os.path.exists(self.db_path):
+                guild_ids.append(0)
+            return guild_ids
+        with self._pool.connection() as conn:
+            return [guild_id for guild_id, in conn.execute(SELECT_GUILD_IDS)]
+
+    async def guild_ids(self):
+        """Retourne les serveurs ayant des données (pour charger les échéances au démarrage)."""
+        try:
+            loop = asyncio.get_running_loop()
+            stored = await loop.run_in_executor(self._executor, self._stored_guild_ids)
+        except Exception as e:
+            logger.error("Erreur lors de la récupération des serveurs: %s", e)
+            return []
+        legacy = self.legacy_guild_id if self.legacy_guild_id is not None else 0
+        return sorted(legacy if guild_id == 0 else guild_id for guild_id in stored)
+
+    def cache_stats(self):
+        """Hits et misses cumulés des caches de modérateurs des serveurs ouverts (sans requête)."""
+        hits = misses = 0
+        for db in list(self._databases.values()):
+            if db.moderator_cache is None:
+                continue
+            stats = db.moderator_cache.stats()
+            hits += stats["hits"]
+            misses += stats["misses"]
+        return {"hits": hits, "misses": misses}
+
+    def close(self):
+        """Attend les requêtes en cours puis ferme toutes les bases."""
+        self._executor.shutdown(wait=True)
+        for db in self._databases.values():
+            db.close()
+        self._databases.clear()
+        if self._pool is not None:
+            self._pool.close()
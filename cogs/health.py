@@ -0,0 +1,90 @@
+import logging
+import math
+import os
+import time
+
+from aiohttp import web
+
+from cogs.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8080
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class HealthServer:
+    """Serveur HTTP de supervision, exécuté dans la boucle d'événements du bot.
+
+    - ``/healthz`` : état de la connexion à la passerelle et latence (503 si le bot
+      n'est pas prêt) ;
+    - ``/metrics`` : métriques au format texte de Prometheus, lues en mémoire
+      (jamais en base) ;
+    - ``/`` : réponse texte pour les services de maintien en vie.
+    """
+
+    def __init__(self, bot, host=DEFAULT_HOST, port=DEFAULT_PORT, registry=REGISTRY, clock=time.monotonic):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self.clock = clock
+        self.started_at = clock()
+        self._runner = None
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get("/", self.index),
+            web.get("/healthz", self.healthz),
+            web.get("/metrics", self.metrics),
+        ])
+        gateway = registry.gauge("diobot_gateway_latency_seconds", "Latence du heartbeat de la passerelle Discord")
+        gateway.add_callback(lambda: self._latency() or 0.0, "gateway")
+        registry.gauge("diobot_guilds", "Serveurs rejoints par le bot").add_callback(lambda: len(self.bot.guilds), "gateway")
+
+    @classmethod
+    def from_env(cls, bot):
+        """Construit le serveur depuis HTTP_HOST et HTTP_PORT."""
+        return cls(bot, host=os.getenv("HTTP_HOST", DEFAULT_HOST), port=int(os.getenv("HTTP_PORT", DEFAULT_PORT)))
+
+    def _latency(self):
+        latency = self.bot.latency
+        return latency if math.isfinite(latency) else None
+
+    async def index(self, request):
+        return web.Response(text="Bot is running!")
+
+    async def healthz(self, request):
+        latency = self._latency()
+        ready = self.bot.is_ready() and not self.bot.is_closed() and latency is not None
+        body = {
+            "status": "ok" if ready else "unavailable",
+            "ready": self.bot.is_ready(),
+            "closed": self.bot.is_closed(),
+            "latency": latency,
+            "guilds": len(self.bot.guilds),
+            "uptime": round(self.clock() - self.started_at, 3),
+        }
+        return web.json_response(body, status=200 if ready else 503)
+
+    async def metrics(self, request):
+        return web.Response(body=self.registry.render().encode("utf-8"), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+    async def start(self):
+        """Démarre l'écoute ; retourne False si le port n'est pas disponible."""
+        try:
+            self._runner = web.AppRunner(self.app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, self.host, self.port).start()
+            logger.info("Serveur de supervision démarré sur %s:%s", self.host, self.port)
+            return True
+        except Exception as e:
+            logger.error("Erreur lors du démarrage du serveur de supervision: %s", e)
+            await self.stop()
+            return False
+
+    async def stop(self):
+        """Arrête l'écoute et ferme les connexions en cours."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
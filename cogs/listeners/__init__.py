@@ -1,15 +1,58 @@
 import logging
 
+from cogs.metrics import REGISTRY
+
+from .members.memberJoin import MemberJoin
 from .messages.messageCreate import MessageCreate
 from .messages.messageDelete import MessageDelete
+from .messages.cache import MessageCache
+from .messages.flood import FloodGuard
+from .messages.image_filter import ImageFilter
+from .messages.modlog import ModLog
+from .messages.near_duplicates import RaidGuard
+from .messages.pipeline import MessagePipeline
+from .messages.term_filter import TermFilter
 
 
 logger = logging.getLogger(__name__)
 
+
+def _register_metrics(pipeline, cache, modlog, source="listeners"):
+    """Expose les files et caches des listeners dans /metrics (lus en mémoire à chaque export)."""
+    REGISTRY.gauge("diobot_message_queue_depth", "Messages en attente dans le pipeline").add_callback(
+        lambda: len(pipeline), source)
+    REGISTRY.counter("diobot_messages_total", "Messages du pipeline par issue", ("outcome",)).add_callback(
+        lambda: {"accepted": pipeline.accepted, "dropped": pipeline.dropped, "processed": pipeline.processed}, source)
+    REGISTRY.counter("diobot_cache_hits_total", "Succès des caches", ("cache",)).add_callback(
+        lambda: {"messages": cache.hits}, source)
+    REGISTRY.counter("diobot_cache_misses_total", "Échecs des caches", ("cache",)).add_callback(
+        lambda: {"messages": cache.misses}, source)
+    REGISTRY.gauge("diobot_cache_bytes", "Mémoire estimée des caches", ("cache",)).add_callback(
+        lambda: {"messages": cache.bytes}, source)
+    REGISTRY.gauge("diobot_modlog_pending", "Suppressions en attente de publication").add_callback(
+        lambda: modlog.stats()["pending"], source)
+
+
 async def setup(bot):
     """Adds the listener cogs to the bot."""
-    await bot.add_cog(MessageCreate(bot))
-    await bot.add_cog(MessageDelete(bot))
+    # Bases et dispatcher partagés avec les commandes : même cache du quota du bot, mêmes rate limits
+    databases, dispatcher = bot.databases, bot.dispatcher
+    pipeline = MessagePipeline.from_env()
+    modlog = ModLog(bot, databases)
+    # Détection du flood en tête de chaîne : un message de flood n'atteint pas les gestionnaires suivants
+    pipeline.register(FloodGuard.from_env(bot, databases, dispatcher), name="flood")
+    term_filter = TermFilter(bot, databases)  # Recompilé à chaque modification des termes d'un serveur
+    pipeline.register(term_filter, name="terms")
+    await bot.add_cog(term_filter)
+    image_filter = ImageFilter.from_env(bot, databases, dispatcher)  # Empreintes calculées hors de la boucle
+    pipeline.register(image_filter, name="images")
+    await bot.add_cog(image_filter)
+    pipeline.register(RaidGuard.from_env(bot, modlog, databases, dispatcher), name="raid")
+    await bot.add_cog(MessageCreate(bot, pipeline))
+    cache = MessageCache.from_env()
+    await bot.add_cog(MessageDelete(bot, cache, modlog))
+    await bot.add_cog(MemberJoin.from_env(bot, databases, dispatcher, modlog))  # Raids d'arrivées
+    _register_metrics(pipeline, cache, modlog)
     logger.info("Loaded MessageCreate listener cog.")
 
 
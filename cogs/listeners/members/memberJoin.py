@@ -0,0 +1,277 @@
+import discord
+from discord.ext import commands
+import asyncio
+import logging
+import os
+import time
+from array import array
+from bisect import bisect_right
+from collections import deque
+
+from cogs.commands.moderation.ban.bulk_ban import BULK_BAN_CHUNK_SIZE, bulk_ban
+from cogs.commands.moderation.ban.dispatcher import BanDispatcher
+from cogs.logging_setup import log_context
+from cogs.metrics import instrumented
+
+logger = logging.getLogger(__name__)
+
+# Bornes (secondes) de l'histogramme des âges de compte : 1 h, 1 j, 7 j, 30 j, 1 an
+AGE_EDGES = (3600, 86400, 7 * 86400, 30 * 86400, 365 * 86400)
+
+DEFAULT_WINDOW = 60
+DEFAULT_JOIN_THRESHOLD = 20
+DEFAULT_NEW_ACCOUNT_AGE = 7 * 86400
+DEFAULT_NEW_ACCOUNT_SHARE = 0.5
+DEFAULT_LOCKDOWN_DURATION = 600
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_BATCH_INTERVAL = 2.0
+
+ACTION_KICK = "kick"
+ACTION_BAN = "ban"
+LOCKDOWN_REASON = "Raid d'arrivées : compte récent pendant le confinement"
+
+
+class JoinWindow:
+    """Arrivées des ``window`` dernières secondes, par tranche d'âge de compte.
+
+    Anneau de ``window`` cases d'une seconde, chacune contenant un histogramme
+    (``array``) des âges ; les totaux par tranche sont tenus à jour. Une arrivée
+    vide au plus ``window`` cases périmées et incrémente deux compteurs : son coût
+    ne dépend pas du nombre d'arrivées.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, edges=AGE_EDGES):
+        self.window = window
+        self.edges = tuple(edges)
+        bins = len(self.edges) + 1
+        self._slots = [array("l", [0] * bins) for _ in range(window)]
+        self.totals = array("l", [0] * bins)
+        self._last = None
+
+    def _advance(self, second):
+        if self._last is None:
+            self._last = second
+            return
+        for elapsed in range(self._last + 1, min(second, self._last + self.window) + 1):
+            slot = self._slots[elapsed % self.window]
+            for index, count in enumerate(slot):
+                if count:
+                    self.totals[index] -= count
+                    slot[index] = 0
+        self._last = max(self._last, second)
+
+    def add(self, now, account_age):
+        """Compte une arrivée à l'instant ``now`` d'un compte âgé de ``account_age`` secondes."""
+        second = int(now)
+        self._advance(second)
+        index = bisect_right(self.edges, account_age)
+        self._slots[second % self.window][index] += 1
+        self.totals[index] += 1
+
+    def count(self, now=None):
+        """Nombre d'arrivées dans la fenêtre."""
+        if now is not None:
+            self._advance(int(now))
+        return sum(self.totals)
+
+    def count_younger_than(self, age):
+        """Arrivées de comptes plus jeunes que ``age`` (qui doit être une borne de l'histogramme)."""
+        return sum(self.totals[:bisect_right(self.edges, age)])
+
+    def histogram(self):
+        """Arrivées par tranche d'âge : liste de (borne supérieure ou None, nombre)."""
+        return list(zip(self.edges + (None,), self.totals))
+
+
+class _GuildJoins:
+    """État d'un serveur : fenêtre d'arrivées, confinement et lot de comptes signalés."""
+
+    __slots__ = ("window", "recent", "lockdown_until", "batch", "timer", "flagged")
+
+    def __init__(self, window, edges, recent_size):
+        self.window = JoinWindow(window, edges)
+        # Derniers comptes récents arrivés, signalés rétroactivement au début du confinement
+        self.recent = deque(maxlen=recent_size)
+        self.lockdown_until = 0.0
+        self.batch = []
+        self.timer = None
+        self.flagged = 0
+
+
+class MemberJoin(commands.Cog):
+    """Cog de détection des raids d'arrivées.
+
+    Quand, sur la fenêtre glissante, le nombre d'arrivées atteint ``join_threshold``
+    et que la part de comptes plus jeunes que ``new_account_age`` atteint
+    ``new_account_share``, le serveur passe en confinement pour ``lockdown_duration``
+    secondes (prolongé tant que les seuils restent franchis). Pendant le confinement,
+    les comptes récents qui arrivent sont regroupés en lots (``batch_size`` ou toutes
+    les ``batch_interval`` secondes) puis bannis en masse via le quota du bot
+    (``action="ban"``, avec repli sur l'expulsion si le quota ne suffit pas) ou expulsés.
+    """
+
+    def __init__(self, bot, databases=None, dispatcher=None, modlog=None, action=ACTION_KICK,
+                 window=DEFAULT_WINDOW, join_threshold=DEFAULT_JOIN_THRESHOLD,
+                 new_account_age=DEFAULT_NEW_ACCOUNT_AGE, new_account_share=DEFAULT_NEW_ACCOUNT_SHARE,
+                 lockdown_duration=DEFAULT_LOCKDOWN_DURATION, batch_size=DEFAULT_BATCH_SIZE,
+                 batch_interval=DEFAULT_BATCH_INTERVAL, clock=time.monotonic):
+        if action not in (ACTION_KICK, ACTION_BAN):
+            raise ValueError(f"Action inconnue: {action}")
+        if action == ACTION_BAN and databases is None:
+            raise ValueError("L'action ban nécessite databases")
+        self.bot = bot
+        self.databases = databases
+        self.dispatcher = dispatcher if dispatcher is not None else BanDispatcher()
+        self.modlog = modlog
+        self.action = action
+        self.window = window
+        self.join_threshold = join_threshold
+        self.new_account_age = new_account_age
+        self.new_account_share = new_account_share
+        self.lockdown_duration = lockdown_duration
+        self.batch_size = min(batch_size, BULK_BAN_CHUNK_SIZE)
+        self.batch_interval = batch_interval
+        self.clock = clock
+        self.edges = tuple(sorted(set(AGE_EDGES) | {new_account_age}))
+        self.lockdowns = 0
+        self.removed = 0
+        self._guilds = {}
+
+    @classmethod
+    def from_env(cls, bot, databases=None, dispatcher=None, modlog=None):
+        """Construit le cog depuis les variables JOIN_* (seuils, confinement, action)."""
+        return cls(
+            bot,
+            databases=databases,
+            dispatcher=dispatcher,
+            modlog=modlog,
+            action=os.getenv("JOIN_LOCKDOWN_ACTION", ACTION_KICK),
+            window=int(os.getenv("JOIN_WINDOW", DEFAULT_WINDOW)),
+            join_threshold=int(os.getenv("JOIN_RATE_THRESHOLD", DEFAULT_JOIN_THRESHOLD)),
+            new_account_age=int(os.getenv("JOIN_NEW_ACCOUNT_AGE", DEFAULT_NEW_ACCOUNT_AGE)),
+            new_account_share=float(os.getenv("JOIN_NEW_ACCOUNT_SHARE", DEFAULT_NEW_ACCOUNT_SHARE)),
+            lockdown_duration=int(os.getenv("JOIN_LOCKDOWN_DURATION", DEFAULT_LOCKDOWN_DURATION)),
+        )
+
+    async def cog_unload(self):
+        for state in self._guilds.values():
+            if state.timer:
+                state.timer.cancel()
+
+    def in_lockdown(self, guild_id):
+        state = self._guilds.get(guild_id)
+        return state is not None and state.lockdown_until > self.clock()
+
+    @commands.Cog.listener()
+    @instrumented("listener")
+    async def on_member_join(self, member):
+        """Événement déclenché à l'arrivée d'un membre."""
+        if member.bot:
+            return
+        with log_context(guild_id=member.guild.id, user_id=member.id):
+            await self._on_join(member)
+
+    async def _on_join(self, member):
+        guild_id = member.guild.id
+        state = self._guilds.get(guild_id)
+        if state is None:
+            state = self._guilds[guild_id] = _GuildJoins(self.window, self.edges, self.join_threshold)
+
+        now = self.clock()
+        account_age = (discord.utils.utcnow() - member.created_at).total_seconds()
+        state.window.add(now, account_age)
+        is_new = account_age < self.new_account_age
+
+        joins = state.window.count()
+        triggered = joins >= self.join_threshold and state.window.count_younger_than(self.new_account_age) >= self.new_account_share * joins
+        if triggered:
+            started = state.lockdown_until <= now
+            state.lockdown_until = now + self.lockdown_duration
+            if started:
+                await self._start_lockdown(member.guild, state, joins)
+
+        if state.lockdown_until > now:
+            if is_new:
+                self._flag(member.guild, state, member)
+        elif is_new:
+            state.recent.append((now, member))
+
+    async def _start_lockdown(self, guild, state, joins):
+        self.lockdowns += 1
+        logger.warning("Confinement du serveur %s: %s arrivées en %ss", guild.id, joins, self.window)
+        # Les comptes récents arrivés juste avant le déclenchement font partie du raid
+        now = self.clock()
+        while state.recent:
+            joined_at, member = state.recent.popleft()
+            if now - joined_at <= self.window:
+                self._flag(guild, state, member)
+        if self.modlog is not None:
+            embed = discord.Embed(
+                title="Raid d'arrivées : confinement activé",
+                description=f"{joins} arrivées en {self.window} secondes, dont une majorité de comptes récents. "
+                            f"Les comptes récents sont {'bannis' if self.action == ACTION_BAN else 'expulsés'} "
+                            f"pendant {self.lockdown_duration // 60} minutes.",
+                colour=discord.Colour.dark_red(),
+            )
+            await self.modlog.report(guild.id, embed)
+
+    def _flag(self, guild, state, member):
+        state.batch.append(member)
+        state.flagged += 1
+        if len(state.batch) >= self.batch_size:
+            if state.timer:
+                state.timer.cancel()
+            state.timer = asyncio.create_task(self._flush_later(guild, state, 0))
+        elif state.timer is None or state.timer.done():
+            state.timer = asyncio.create_task(self._flush_later(guild, state, self.batch_interval))
+
+    async def _flush_later(self, guild, state, delay):
+        if delay:
+            await asyncio.sleep(delay)
+        state.timer = None
+        await self.flush(guild)
+
+    async def flush(self, guild):
+        """Bannit ou expulse le lot de comptes signalés de ``guild``."""
+        state = self._guilds.get(guild.id)
+        if state is None or not state.batch:
+            return
+        members, state.batch = state.batch, []
+        try:
+            if self.action == ACTION_BAN:
+                result = await bulk_ban(guild, self.databases.for_guild(guild.id), self.dispatcher,
+                                        self.bot.user.id, [member.id for member in members], LOCKDOWN_REASON)
+                if result is not None:
+                    banned, failed = result
+                    self.removed += len(banned)
+                    logger.info("Confinement du serveur %s: %s compte(s) banni(s), %s échec(s)", guild.id, len(banned), len(failed))
+                    return
+                logger.warning("Quota de bans du bot insuffisant sur le serveur %s, expulsion de %s compte(s)", guild.id, len(members))
+            await self._kick(guild, members)
+        except Exception as e:
+            logger.error("Erreur lors du traitement du lot de confinement (serveur %s): %s", guild.id, e)
+
+    async def _kick(self, guild, members):
+        results = await asyncio.gather(
+            *(self.dispatcher.kick(guild, member, reason=LOCKDOWN_REASON) for member in members),
+            return_exceptions=True,
+        )
+        kicked = sum(1 for result in results if not isinstance(result, Exception))
+        self.removed += kicked
+        logger.info("Confinement du serveur %s: %s compte(s) expulsé(s), %s échec(s)", guild.id, kicked, len(members) - kicked)
+
+    def stats(self):
+        """Confinements, comptes retirés et arrivées par tranche d'âge de chaque serveur."""
+        return {
+            "lockdowns": self.lockdowns,
+            "removed": self.removed,
+            "guilds": {
+                guild_id: {
+                    "joins": state.window.count(self.clock()),
+                    "lockdown": state.lockdown_until > self.clock(),
+                    "flagged": state.flagged,
+                    "histogram": state.window.histogram(),
+                }
+                for guild_id, state in self._guilds.items()
+            },
+        }
@@ -0,0 +1,185 @@
+import collections
+import heapq
+import os
+import sys
+
+# Budget mémoire global du cache (octets estimés)
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+# Messages conservés au plus par salon (tampon circulaire)
+DEFAULT_MAX_PER_CHANNEL = 5000
+# Coût fixe estimé d'une entrée : objet à __slots__, entrée du dict et du tampon du salon
+ENTRY_OVERHEAD = 200
+
+
+class CachedMessage:
+    """Contenu, auteur et pièces jointes d'un message, tels que reçus."""
+
+    __slots__ = ("id", "guild_id", "channel_id", "author_id", "author_name", "content", "attachments", "size")
+
+    def __init__(self, id, guild_id, channel_id, author_id, author_name, content, attachments=()):
+        self.id = id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.author_name = author_name
+        self.content = content
+        # Tuple de (nom, url, taille en octets)
+        self.attachments = attachments
+        self.size = (
+            ENTRY_OVERHEAD
+            + sys.getsizeof(content)
+            + sys.getsizeof(author_name)
+            + sum(sys.getsizeof(name) + sys.getsizeof(url) + 64 for name, url, _ in attachments)
+        )
+
+    @classmethod
+    def from_message(cls, message):
+        guild = message.guild
+        return cls(
+            message.id,
+            guild.id if guild else None,
+            message.channel.id,
+            message.author.id,
+            str(message.author),
+            message.content,
+            tuple((a.filename, a.url, a.size) for a in message.attachments),
+        )
+
+
+class _Channel:
+    """Tampon circulaire des identifiants de messages d'un salon, du plus ancien au plus récent."""
+
+    __slots__ = ("ids", "bytes")
+
+    def __init__(self):
+        self.ids = collections.deque()
+        self.bytes = 0
+
+
+class MessageCache:
+    """Cache du contenu des messages, borné par salon et par un budget mémoire global.
+
+    Chaque salon garde au plus ``max_per_channel`` messages (les plus anciens sortent
+    en premier). Quand le total estimé dépasse ``max_bytes``, le message le plus ancien
+    du salon qui occupe le plus de mémoire est évincé : un salon très actif ne vide
+    pas le cache des salons calmes. Un message supprimé (``pop``) est retiré de l'index
+    tout de suite ; son identifiant reste dans le tampon du salon et sera ignoré.
+
+    Le salon le plus lourd est lu dans un tas des tailles de salons, corrigé à la
+    demande : une taille qui a diminué depuis son insertion est remise à jour quand
+    elle arrive au sommet. Le choix d'une victime ne parcourt donc pas tous les salons.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_per_channel=DEFAULT_MAX_PER_CHANNEL):
+        self.max_bytes = max_bytes
+        self.max_per_channel = max_per_channel
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._messages = {}
+        self._channels = {}
+        # Tas max des salons : (-octets au moment de l'insertion, channel_id)
+        self._sizes = []
+
+    @classmethod
+    def from_env(cls):
+        """Construit le cache depuis MESSAGE_CACHE_BYTES et MESSAGE_CACHE_PER_CHANNEL."""
+        return cls(
+            max_bytes=int(os.getenv("MESSAGE_CACHE_BYTES", DEFAULT_MAX_BYTES)),
+            max_per_channel=int(os.getenv("MESSAGE_CACHE_PER_CHANNEL", DEFAULT_MAX_PER_CHANNEL)),
+        )
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __contains__(self, message_id):
+        return message_id in self._messages
+
+    def add(self, message):
+        """Met en cache un discord.Message (ou un CachedMessage)."""
+        entry = message if isinstance(message, CachedMessage) else CachedMessage.from_message(message)
+        channel = self._channels.get(entry.channel_id)
+        if channel is None:
+            channel = self._channels[entry.channel_id] = _Channel()
+
+        previous = self._messages.get(entry.id)
+        if previous is not None:
+            # Message modifié : l'entrée est remplacée sans changer sa place dans le tampon
+            self._remove(previous)
+        else:
+            channel.ids.append(entry.id)
+        self._messages[entry.id] = entry
+        channel.bytes += entry.size
+        self.bytes += entry.size
+        self._push_size(entry.channel_id, channel)
+
+        while len(channel.ids) > self.max_per_channel:
+            self._evict_oldest(entry.channel_id, channel)
+        while self.bytes > self.max_bytes and self._messages:
+            self._evict_oldest(*self._largest_channel())
+        return entry
+
+    def _push_size(self, channel_id, channel):
+        if len(self._sizes) > 2 * len(self._channels) + 64:
+            # Trop d'entrées périmées : reconstruction, amortie sur autant d'ajouts
+            self._sizes = [(-state.bytes, key) for key, state in self._channels.items()]
+            heapq.heapify(self._sizes)
+        else:
+            heapq.heappush(self._sizes, (-channel.bytes, channel_id))
+
+    def _largest_channel(self):
+        """(channel_id, _Channel) du salon qui occupe le plus de mémoire."""
+        sizes = self._sizes
+        while True:
+            size, channel_id = sizes[0]
+            channel = self._channels.get(channel_id)
+            if channel is None:
+                heapq.heappop(sizes)
+            elif -size != channel.bytes:
+                # Les tailles ne font que diminuer hors de add : l'entrée est remise à jour
+                heapq.heapreplace(sizes, (-channel.bytes, channel_id))
+            else:
+                return channel_id, channel
+
+    def get(self, message_id):
+        return self._messages.get(message_id)
+
+    def pop(self, message_id):
+        """Retire et retourne le message ``message_id`` ; None (compté comme raté) s'il est absent."""
+        entry = self._messages.get(message_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remove(entry)
+        return entry
+
+    def _remove(self, entry):
+        del self._messages[entry.id]
+        channel = self._channels[entry.channel_id]
+        channel.bytes -= entry.size
+        self.bytes -= entry.size
+
+    def _evict_oldest(self, channel_id, channel):
+        entry = self._messages.get(channel.ids.popleft())
+        # Identifiant d'un message déjà supprimé : seule sa place dans le tampon est libérée
+        if entry is not None:
+            self._remove(entry)
+            self.evictions += 1
+        if not channel.ids:
+            del self._channels[channel_id]
+
+    def stats(self):
+        """Taux de succès et occupation mémoire, pour arbitrer le budget."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._messages),
+            "channels": len(self._channels),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,198 @@
+import logging
+import os
+import time
+from array import array
+from datetime import timedelta
+
+import discord
+
+from .sanctions import partial_message, quota_ban
+
+logger = logging.getLogger(__name__)
+
+# Rafale tolérée (messages) et débit soutenu (messages par seconde) par membre et par salon
+DEFAULT_CAPACITY = 5
+DEFAULT_REFILL_RATE = 1.0
+# Emplacements examinés à chaque message pour libérer les compteurs inactifs
+SWEEP_STEP = 2
+
+ACTION_DELETE = "delete"
+ACTION_TIMEOUT = "timeout"
+ACTION_BAN = "ban"
+ACTIONS = (ACTION_DELETE, ACTION_TIMEOUT, ACTION_BAN)
+DEFAULT_ACTIONS = (ACTION_DELETE, ACTION_TIMEOUT)
+DEFAULT_TIMEOUT = 600
+# Délai pendant lequel un membre déjà sanctionné n'est pas sanctionné à nouveau (secondes)
+DEFAULT_COOLDOWN = 60
+FLOOD_REASON = "Flood détecté"
+
+
+class FloodDetector:
+    """Seaux à jetons par clé, stockés dans des tableaux compacts.
+
+    Chaque clé (serveur, salon, membre) occupe un emplacement des tableaux ``array``
+    de jetons et d'horodatages ; un message coûte un accès au dict et quelques
+    opérations en temps constant. Un seau redevient plein après ``capacity / rate``
+    secondes d'inactivité : il équivaut alors à un seau neuf et son emplacement est
+    libéré. À chaque message, ``SWEEP_STEP`` emplacements sont examinés à tour de rôle,
+    si bien que les membres inactifs n'occupent plus de mémoire (hors emplacements
+    réutilisables).
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, rate=DEFAULT_REFILL_RATE, clock=time.monotonic):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.clock = clock
+        self.idle_after = self.capacity / self.rate
+        self._slots = {}
+        self._keys = []
+        self._tokens = array("d")
+        self._stamps = array("d")
+        self._free = []
+        self._cursor = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def hit(self, key, now=None):
+        """Compte un message pour ``key`` ; retourne True si le débit autorisé est dépassé."""
+        now = self.clock() if now is None else now
+        self._sweep(now)
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._allocate(key)
+            tokens = self.capacity
+        else:
+            tokens = min(self.capacity, self._tokens[slot] + (now - self._stamps[slot]) * self.rate)
+        self._stamps[slot] = now
+        if tokens < 1.0:
+            self._tokens[slot] = tokens
+            return True
+        self._tokens[slot] = tokens - 1.0
+        return False
+
+    def _allocate(self, key):
+        if self._free:
+            slot = self._free.pop()
+            self._keys[slot] = key
+        else:
+            slot = len(self._keys)
+            self._keys.append(key)
+            self._tokens.append(0.0)
+            self._stamps.append(0.0)
+        self._slots[key] = slot
+        return slot
+
+    def _sweep(self, now):
+        size = len(self._keys)
+        for _ in range(min(SWEEP_STEP, size)):
+            self._cursor = (self._cursor + 1) % size
+            key = self._keys[self._cursor]
+            if key is not None and now - self._stamps[self._cursor] >= self.idle_after:
+                del self._slots[key]
+                self._keys[self._cursor] = None
+                self._free.append(self._cursor)
+
+    def stats(self):
+        """Compteurs actifs et emplacements alloués."""
+        return {"active": len(self._slots), "slots": len(self._keys)}
+
+
+class FloodGuard:
+    """Gestionnaire du MessagePipeline qui sanctionne le flood.
+
+    Au-delà du débit autorisé, les ``actions`` configurées s'appliquent : suppression
+    du message, exclusion temporaire (timeout) et/ou bannissement. Le bannissement passe
+    par le quota et l'historique du bot lui-même (à configurer avec /setban sur le bot),
+    sous le verrou de modérateur du BanDispatcher ; sans quota, il n'a pas lieu.
+    """
+
+    def __init__(self, bot, detector=None, actions=DEFAULT_ACTIONS, databases=None, dispatcher=None,
+                 timeout=DEFAULT_TIMEOUT, cooldown=DEFAULT_COOLDOWN, clock=time.monotonic):
+        unknown = set(actions) - set(ACTIONS)
+        if unknown:
+            raise ValueError(f"Actions inconnues: {', '.join(sorted(unknown))}")
+        if ACTION_BAN in actions and (databases is None or dispatcher is None):
+            raise ValueError("L'action ban nécessite databases et dispatcher")
+        self.bot = bot
+        self.detector = detector if detector is not None else FloodDetector(clock=clock)
+        self.actions = tuple(actions)
+        self.databases = databases
+        self.dispatcher = dispatcher
+        self.timeout = timeout
+        self.cooldown = cooldown
+        self.clock = clock
+        self.detections = 0
+        self._sanctioned = {}
+
+    @classmethod
+    def from_env(cls, bot, databases=None, dispatcher=None):
+        """Construit le garde depuis FLOOD_CAPACITY, FLOOD_RATE, FLOOD_ACTIONS et FLOOD_TIMEOUT."""
+        actions = os.getenv("FLOOD_ACTIONS", ",".join(DEFAULT_ACTIONS))
+        detector = FloodDetector(
+            capacity=float(os.getenv("FLOOD_CAPACITY", DEFAULT_CAPACITY)),
+            rate=float(os.getenv("FLOOD_RATE", DEFAULT_REFILL_RATE)),
+        )
+        return cls(
+            bot,
+            detector=detector,
+            actions=[action.strip() for action in actions.split(",") if action.strip()],
+            databases=databases,
+            dispatcher=dispatcher,
+            timeout=int(os.getenv("FLOOD_TIMEOUT", DEFAULT_TIMEOUT)),
+        )
+
+    async def __call__(self, descriptor):
+        """Retourne False (fin de la chaîne) pour un message de flood."""
+        if descriptor.guild_id is None:
+            return True
+        if not self.detector.hit((descriptor.guild_id, descriptor.channel_id, descriptor.author_id)):
+            return True
+        self.detections += 1
+
+        if ACTION_DELETE in self.actions:
+            try:
+                await partial_message(self.bot, descriptor.channel_id, descriptor.id, descriptor.guild_id).delete()
+            except Exception as e:
+                logger.error("Erreur lors de la suppression d'un message de flood: %s", e)
+
+        key = (descriptor.guild_id, descriptor.author_id)
+        now = self.clock()
+        if self._sanctioned.get(key, 0) > now:
+            return False
+        self._sanctioned[key] = now + self.cooldown
+        # Nettoyage paresseux : seuls les membres sanctionnés récemment restent en mémoire
+        if len(self._sanctioned) > 1000:
+            self._sanctioned = {k: until for k, until in self._sanctioned.items() if until > now}
+
+        logger.warning("Flood de %s (%s) dans le salon %s", descriptor.author_name, descriptor.author_id, descriptor.channel_id)
+        if ACTION_BAN in self.actions:
+            await self._ban(descriptor)
+        elif ACTION_TIMEOUT in self.actions:
+            await self._timeout(descriptor)
+        return False
+
+    async def _timeout(self, descriptor):
+        try:
+            guild = self.bot.get_guild(descriptor.guild_id)
+            member = guild.get_member(descriptor.author_id) or await guild.fetch_member(descriptor.author_id)
+            await member.timeout(timedelta(seconds=self.timeout), reason=FLOOD_REASON)
+            return True
+        except Exception as e:
+            logger.error("Erreur lors de l'exclusion temporaire de %s: %s", descriptor.author_id, e)
+            return False
+
+    async def _ban(self, descriptor):
+        """Bannit l'auteur au nom du bot, en décomptant son quota ; sinon se rabat sur le timeout."""
+        guild = self.bot.get_guild(descriptor.guild_id)
+        if guild is None:
+            return False
+        banned = await quota_ban(self.bot, self.databases, self.dispatcher, guild,
+                                 discord.Object(id=descriptor.author_id), descriptor.author_name, FLOOD_REASON)
+        if banned is None and ACTION_TIMEOUT in self.actions:
+            return await self._timeout(descriptor)
+        return bool(banned)
+
+    def stats(self):
+        """Détections et occupation du détecteur."""
+        return {"detections": self.detections, **self.detector.stats()}
@@ -0,0 +1,302 @@
+import asyncio
+import io
+import logging
+import math
+import multiprocessing
+import os
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+import discord
+from discord.ext import commands
+from PIL import Image
+
+from cogs.utils import hamming
+
+from .sanctions import partial_message, quota_ban
+
+logger = logging.getLogger(__name__)
+
+HASH_SIZE = 8
+# pHash : DCT d'une vignette 32x32 dont on garde les 8x8 basses fréquences
+DCT_SIZE = 32
+DEFAULT_PHASH_DISTANCE = 8
+DEFAULT_DHASH_DISTANCE = 10
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+DEFAULT_WORKERS = 2
+DOWNLOAD_TIMEOUT = 10
+IMAGE_REASON = "Image interdite"
+
+# Cosinus de la DCT-II : _COS[u][x] = cos((2x + 1) u pi / 2N), pour les HASH_SIZE premières fréquences
+_COS = [[math.cos((2 * x + 1) * u * math.pi / (2 * DCT_SIZE)) for x in range(DCT_SIZE)] for u in range(HASH_SIZE)]
+
+
+def _thumbnail(image, size):
+    """Vignette en niveaux de gris de ``size`` (largeur, hauteur), pixels en liste."""
+    image.draft("L", (size[0] * 2, size[1] * 2))  # JPEG : décodage directement à échelle réduite
+    return list(image.convert("L").resize(size, Image.LANCZOS).getdata())
+
+
+def dhash(image):
+    """Empreinte de différence (64 bits) : chaque bit compare deux pixels voisins d'une vignette 9x8."""
+    pixels = _thumbnail(image, (HASH_SIZE + 1, HASH_SIZE))
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = value << 1 | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def phash(image):
+    """Empreinte perceptuelle (64 bits) : signe des basses fréquences de la DCT par rapport à leur médiane."""
+    pixels = _thumbnail(image, (DCT_SIZE, DCT_SIZE))
+    rows = [pixels[y * DCT_SIZE:(y + 1) * DCT_SIZE] for y in range(DCT_SIZE)]
+    # DCT séparable, limitée aux fréquences conservées : lignes puis colonnes
+    partial = [[sum(c * p for c, p in zip(_COS[u], row)) for u in range(HASH_SIZE)] for row in rows]
+    coefficients = [
+        sum(_COS[v][y] * partial[y][u] for y in range(DCT_SIZE))
+        for v in range(HASH_SIZE) for u in range(HASH_SIZE)
+    ]
+    # La composante continue (luminosité moyenne) est exclue du calcul de la médiane
+    median = sorted(coefficients[1:])[len(coefficients[1:]) // 2]
+    value = 0
+    for coefficient in coefficients:
+        value = value << 1 | (coefficient > median)
+    return value
+
+
+def hash_image(data):
+    """Retourne (phash, dhash) d'une image encodée, ou None si elle ne peut pas être décodée."""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.seek(0)  # Première image d'un GIF animé
+            return phash(image), dhash(image)
+    except Exception as e:
+        logger.debug("Image illisible: %s", e)
+        return None
+
+
+def fetch_and_hash(url, max_bytes=DEFAULT_MAX_BYTES):
+    """Télécharge puis empreinte une image ; exécuté dans un processus de calcul.
+
+    Retourne (phash, dhash), ou None si l'image est trop lourde, injoignable ou illisible.
+    """
+    try:
+        with urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT) as response:
+            data = response.read(max_bytes + 1)
+    except Exception as e:
+        logger.debug("Téléchargement impossible de %s: %s", url, e)
+        return None
+    if len(data) > max_bytes:
+        return None
+    return hash_image(data)
+
+
+class BKTree:
+    """Arbre BK sur la distance de Hamming entre empreintes 64 bits.
+
+    Chaque nœud range ses enfants par distance au nœud. Une recherche de rayon ``r``
+    ne descend que dans les enfants dont la distance est dans [d - r, d + r]
+    (inégalité triangulaire) au lieu de comparer toute la liste. Un nœud garde les
+    charges utiles de toutes les entrées de même valeur (deux images interdites
+    peuvent partager un pHash).
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, items=()):
+        self._root = None
+        self._size = 0
+        for value, payload in items:
+            self.add(value, payload)
+
+    def __len__(self):
+        return self._size
+
+    def add(self, value, payload=None):
+        """Ajoute ``value`` ; une valeur déjà présente reçoit une charge utile de plus."""
+        node = [value, [payload], {}]
+        if self._root is None:
+            self._root = node
+            self._size = 1
+            return
+        current = self._root
+        while True:
+            distance = hamming(value, current[0])
+            if distance == 0:
+                current[1].append(payload)
+                self._size += 1
+                return
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                self._size += 1
+                return
+            current = child
+
+    def search(self, value, radius):
+        """Retourne les (distance, valeur, charge utile) à au plus ``radius`` de ``value``, les plus proches d'abord.
+
+        Une valeur partagée par plusieurs entrées apparaît une fois par charge utile.
+        """
+        if self._root is None:
+            return []
+        matches = []
+        stack = [self._root]
+        while stack:
+            node_value, payloads, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= radius:
+                matches.extend((distance, node_value, payload) for payload in payloads)
+            for child_distance, child in children.items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+
+class ImageFilter(commands.Cog):
+    """Filtre des images interdites de chaque serveur, gestionnaire du MessagePipeline.
+
+    Les empreintes interdites d'un serveur (table image_hashes) sont chargées dans un
+    arbre BK au premier message du serveur, puis rechargées à chaque modification
+    (événement ``image_hashes_update``). Une image correspond quand son pHash est à
+    au plus ``phash_distance`` bits d'une empreinte interdite, et son dHash à au plus
+    ``dhash_distance`` bits de celle-ci. Le téléchargement et le décodage des pièces
+    jointes se font dans ``executor`` (un pool de processus par défaut) : la boucle
+    de la passerelle n'est jamais bloquée. Un message correspondant est supprimé et
+    son auteur banni via le quota du bot.
+    """
+
+    def __init__(self, bot, databases, dispatcher, executor=None, phash_distance=DEFAULT_PHASH_DISTANCE,
+                 dhash_distance=DEFAULT_DHASH_DISTANCE, max_bytes=DEFAULT_MAX_BYTES, workers=DEFAULT_WORKERS):
+        self.bot = bot
+        self.databases = databases
+        self.dispatcher = dispatcher
+        self.phash_distance = phash_distance
+        self.dhash_distance = dhash_distance
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.hashed = 0
+        self.matches = 0
+        self._executor = executor
+        self._trees = {}
+        self._locks = {}
+
+    @classmethod
+    def from_env(cls, bot, databases, dispatcher):
+        """Construit le filtre depuis IMAGE_PHASH_DISTANCE, IMAGE_DHASH_DISTANCE, IMAGE_MAX_BYTES et IMAGE_HASH_WORKERS."""
+        return cls(
+            bot,
+            databases,
+            dispatcher,
+            phash_distance=int(os.getenv("IMAGE_PHASH_DISTANCE", DEFAULT_PHASH_DISTANCE)),
+            dhash_distance=int(os.getenv("IMAGE_DHASH_DISTANCE", DEFAULT_DHASH_DISTANCE)),
+            max_bytes=int(os.getenv("IMAGE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+            workers=int(os.getenv("IMAGE_HASH_WORKERS", DEFAULT_WORKERS)),
+        )
+
+    @property
+    def executor(self):
+        """Pool de processus de calcul, démarré au premier usage."""
+        if self._executor is None:
+            # spawn : pas de fork d'un processus qui a déjà des threads (pool SQLite, boucle)
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def cog_unload(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def close(self):
+        """Arrête le pool de processus et attend la sortie des workers, hors de la boucle (arrêt du bot)."""
+        if self._executor is not None:
+            executor = self._executor
+            executor.shutdown(wait=False, cancel_futures=True)
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    async def tree(self, guild_id):
+        """Arbre BK des images interdites de ``guild_id``, chargé au premier appel."""
+        tree = self._trees.get(guild_id)
+        if tree is not None:
+            return tree
+        lock = self._locks.setdefault(guild_id, asyncio.Lock())
+        async with lock:
+            if guild_id not in self._trees:
+                await self.reload(guild_id)
+        return self._trees[guild_id]
+
+    async def reload(self, guild_id):
+        """Recharge l'arbre BK de ``guild_id`` depuis la base."""
+        hashes = await self.databases.for_guild(guild_id).get_image_hashes()
+        self._trees[guild_id] = BKTree((phash_value, (dhash_value, label)) for phash_value, dhash_value, label in hashes)
+        logger.info("Images interdites du serveur %s chargées: %s empreinte(s)", guild_id, len(hashes))
+
+    @commands.Cog.listener()
+    async def on_image_hashes_update(self, guild_id):
+        """Événement envoyé par les commandes de gestion des images interdites."""
+        try:
+            await self.reload(guild_id)
+        except Exception as e:
+            logger.error("Erreur lors du rechargement des images interdites du serveur %s: %s", guild_id, e)
+
+    def match(self, tree, hashes):
+        """Libellé (ou empreinte) de l'image interdite correspondant à ``hashes``, ou None."""
+        phash_value, dhash_value = hashes
+        for _, banned_phash, (banned_dhash, label) in tree.search(phash_value, self.phash_distance):
+            if hamming(dhash_value, banned_dhash) <= self.dhash_distance:
+                return label or f"{banned_phash:016x}"
+        return None
+
+    async def __call__(self, descriptor):
+        """Supprime un message contenant une image interdite ; retourne False (fin de la chaîne)."""
+        if descriptor.guild_id is None:
+            return True
+        urls = [
+            url for url, content_type, size in descriptor.attachments
+            if (content_type or "").startswith("image/") and size <= self.max_bytes
+        ]
+        if not urls:
+            return True
+        tree = await self.tree(descriptor.guild_id)
+        if not len(tree):
+            return True  # Rien à comparer : pas de téléchargement
+
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self.executor, fetch_and_hash, url, self.max_bytes) for url in urls),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error("Erreur lors du calcul d'une empreinte d'image: %s", result)
+                continue
+            if result is None:
+                continue
+            self.hashed += 1
+            label = self.match(tree, result)
+            if label is not None:
+                await self._sanction(descriptor, label)
+                return False
+        return True
+
+    async def _sanction(self, descriptor, label):
+        self.matches += 1
+        logger.warning("Image interdite « %s » de %s (%s) dans le salon %s", label, descriptor.author_name, descriptor.author_id, descriptor.channel_id)
+        try:
+            await partial_message(self.bot, descriptor.channel_id, descriptor.id, descriptor.guild_id).delete()
+        except Exception as e:
+            logger.error("Erreur lors de la suppression d'un message avec une image interdite: %s", e)
+        guild = self.bot.get_guild(descriptor.guild_id)
+        if guild is not None:
+            await quota_ban(self.bot, self.databases, self.dispatcher, guild, discord.Object(id=descriptor.author_id),
+                            descriptor.author_name, f"{IMAGE_REASON} ({label})")
+
+    def stats(self):
+        """Images empreintées, images interdites détectées et empreintes chargées par serveur."""
+        return {
+            "hashed": self.hashed,
+            "matches": self.matches,
+            "guilds": {guild_id: len(tree) for guild_id, tree in self._trees.items()},
+        }
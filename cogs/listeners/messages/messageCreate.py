@@ -2,28 +2,47 @@ import discord
 from discord.ext import commands
 import logging
 
+from cogs.metrics import instrumented
+
+from .pipeline import MessagePipeline
+from .sanctions import partial_message
+
 logger = logging.getLogger(__name__)
 
 class MessageCreate(commands.Cog):
-    """Cog pour gérer les événements de création de messages."""
+    """Cog pour gérer les événements de création de messages.
+
+    ``on_message`` ne fait que déposer le message dans le MessagePipeline ; le travail
+    (réponse, filtres de modération...) est fait par les gestionnaires enregistrés sur
+    ``self.pipeline``, exécutés par les workers du pipeline.
+    """
 
-    def __init__(self, bot):
+    def __init__(self, bot, pipeline=None):
         self.bot = bot
+        self.pipeline = pipeline if pipeline is not None else MessagePipeline()
+        self.pipeline.register(self.reply_handler, name="reply")
+
+    async def cog_unload(self):
+        await self.pipeline.close()
 
     @commands.Cog.listener()
+    @instrumented("listener")
     async def on_message(self, message):
         """Événement déclenché lorsqu'un message est créé."""
         if message.author.bot:
             return  # Ignorer les messages des bots
-        
-        message.reply(f"Message reçu de {message.author}: {message.content}")
 
-        logger.info(f"Message reçu de {message.author}: {message.content}")
+        if not await self.pipeline.submit(message):
+            logger.warning("File des messages pleine, message %s abandonné", message.id)
+
+    async def reply_handler(self, descriptor):
+        """Répond au message reçu."""
+        message = partial_message(self.bot, descriptor.channel_id, descriptor.id, descriptor.guild_id)
+        await message.reply(f"Message reçu de {descriptor.author_name}: {descriptor.content}")
+        logger.debug("Message reçu de %s: %s", descriptor.author_name, descriptor.content)
 
 
 async def setup(bot):
     """Ajoute le cog de gestion des messages au bot."""
-    await bot.add_cog(MessageCreate(bot))
+    await bot.add_cog(MessageCreate(bot, MessagePipeline.from_env()))
     logger.info("Loaded MessageCreate listener cog.")
-    
-
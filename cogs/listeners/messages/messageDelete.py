@@ -2,35 +2,87 @@ import discord
 from discord.ext import commands
 import logging
 
+from cogs.metrics import instrumented
+
+from .cache import CachedMessage, MessageCache
+from .modlog import ModLog
+
 logger = logging.getLogger(__name__)
 
 
 class MessageDelete(commands.Cog):
-    """Cog pour gérer les événements de suppression de messages."""
+    """Cog pour gérer les événements de suppression de messages.
 
-    def __init__(self, bot):
+    Le contenu des messages est conservé dans un MessageCache borné en mémoire, ce qui
+    permet de journaliser les suppressions via les événements bruts (``on_raw_*``), y
+    compris pour les messages sortis du cache interne de discord.py. Les suppressions
+    sont regroupées par serveur dans le journal de modération (ModLog).
+    """
+
+    def __init__(self, bot, cache=None, modlog=None):
         self.bot = bot
+        self.cache = cache if cache is not None else MessageCache()
+        self.modlog = modlog or ModLog(bot)
 
-    @commands.Cog.listener()
-    async def on_message_delete(self, message):
-        """Événement déclenché lorsqu'un message est supprimé."""
+    async def cog_unload(self):
+        await self.modlog.close()
 
+    @commands.Cog.listener()
+    @instrumented("listener")
+    async def on_message(self, message):
+        """Met en cache le contenu des messages reçus."""
         if message.author.bot:
             return  # Ignorer les messages des bots
-        
+        self.cache.add(message)
+
+    @commands.Cog.listener()
+    @instrumented("listener")
+    async def on_raw_message_edit(self, payload):
+        """Garde dans le cache le contenu modifié d'un message."""
+        entry = self.cache.get(payload.message_id)
+        if entry is not None and "content" in payload.data:
+            self.cache.add(CachedMessage(
+                entry.id, entry.guild_id, entry.channel_id, entry.author_id,
+                entry.author_name, payload.data["content"], entry.attachments,
+            ))
 
-        channel_id = message.channel.id
-        channel = self.bot.get_channel(channel_id)
+    def _lookup(self, message_id, cached_message=None):
+        entry = self.cache.pop(message_id)
+        if entry is None and cached_message is not None and not cached_message.author.bot:
+            entry = CachedMessage.from_message(cached_message)
+        return entry
 
-        
+    @commands.Cog.listener()
+    @instrumented("listener")
+    async def on_raw_message_delete(self, payload):
+        """Événement déclenché lorsqu'un message est supprimé."""
+        entry = self._lookup(payload.message_id, payload.cached_message)
+        if entry is None:
+            logger.info("Message %s supprimé, contenu inconnu", payload.message_id)
+            return
+        if payload.guild_id is not None:
+            self.modlog.add(payload.guild_id, entry)
 
-        await channel.send(f"Message supprimé: {message.content} de {message.author}")
+        logger.info("Message supprimé: %s", entry.content)
 
-        logger.info(f"Message supprimé: {message.content}")
+    @commands.Cog.listener()
+    @instrumented("listener")
+    async def on_raw_bulk_message_delete(self, payload):
+        """Événement déclenché lors d'une suppression de messages en masse."""
+        cached = {message.id: message for message in payload.cached_messages}
+        entries = [entry for entry in (self._lookup(message_id, cached.get(message_id))
+                                       for message_id in sorted(payload.message_ids)) if entry is not None]
+        logger.info("%s message(s) supprimé(s) en masse, %s retrouvé(s)", len(payload.message_ids), len(entries))
+        if payload.guild_id is not None:
+            for entry in entries:
+                self.modlog.add(payload.guild_id, entry)
+
+    @commands.Cog.listener()
+    async def on_modlog_update(self, guild_id):
+        """Événement envoyé par /setmodlog : la destination du journal a changé."""
+        self.modlog.invalidate(guild_id)
 
 async def setup(bot):
     """Ajoute le cog de gestion des messages au bot."""
     await bot.add_cog(MessageDelete(bot))
     logger.info("Loaded MessageDelete listener cog.")
-    
-
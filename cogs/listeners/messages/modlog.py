@@ -0,0 +1,164 @@
+import asyncio
+import io
+import logging
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Délai maximal entre une suppression et sa publication (secondes)
+DEFAULT_FLUSH_INTERVAL = 5.0
+# Évènements en attente au-delà desquels le tampon d'un serveur est publié sans attendre
+DEFAULT_MAX_EVENTS = 50
+# Limites Discord d'un message : 10 embeds, 6000 caractères d'embeds au total
+MAX_EMBEDS = 10
+MAX_EMBED_CHARACTERS = 6000
+MAX_DESCRIPTION_LENGTH = 4096
+
+
+def deleted_message_embed(entry):
+    """Embed d'un message supprimé (CachedMessage)."""
+    embed = discord.Embed(
+        title="Message supprimé",
+        description=(entry.content or "*(vide)*")[:MAX_DESCRIPTION_LENGTH],
+        colour=discord.Colour.red(),
+    )
+    embed.set_author(name=entry.author_name)
+    embed.add_field(name="Salon", value=f"<#{entry.channel_id}>")
+    embed.add_field(name="Auteur", value=f"<@{entry.author_id}>")
+    if entry.attachments:
+        embed.add_field(name="Pièces jointes", value="\n".join(name for name, _, _ in entry.attachments)[:1024], inline=False)
+    return embed
+
+
+def deleted_messages_file(entries):
+    """Export texte des messages supprimés, quand ils ne tiennent pas dans un message d'embeds."""
+    lines = []
+    for entry in entries:
+        lines.append(f"[#{entry.channel_id}] {entry.author_name} ({entry.author_id}): {entry.content}")
+        lines.extend(f"    pièce jointe: {name} {url}" for name, url, _ in entry.attachments)
+    return discord.File(io.BytesIO("\n".join(lines).encode("utf-8")), filename="messages_supprimes.txt")
+
+
+def build_payload(entries):
+    """Arguments d'un unique ``send`` pour publier ``entries``.
+
+    Des embeds si les limites de Discord le permettent, sinon un fichier texte et un embed récapitulatif.
+    """
+    embeds = [deleted_message_embed(entry) for entry in entries[:MAX_EMBEDS + 1]]
+    if len(entries) <= MAX_EMBEDS and sum(len(embed) for embed in embeds) <= MAX_EMBED_CHARACTERS:
+        return {"embeds": embeds}
+    summary = discord.Embed(
+        title="Messages supprimés",
+        description=f"{len(entries)} message(s) supprimé(s), détail en pièce jointe.",
+        colour=discord.Colour.red(),
+    )
+    return {"embed": summary, "file": deleted_messages_file(entries)}
+
+
+class ModLog:
+    """Journal de modération des messages supprimés, regroupé par serveur.
+
+    Les suppressions sont mises en tampon par serveur et publiées toutes les
+    ``interval`` secondes, ou dès que ``max_events`` sont en attente, en un seul
+    message (embeds ou fichier). Le nombre d'appels à l'API dépend du nombre de
+    publications, plus du nombre de suppressions. La destination (salon ou webhook)
+    est lue dans les réglages du serveur (/setmodlog) et gardée en mémoire.
+    """
+
+    def __init__(self, bot, databases=None, interval=DEFAULT_FLUSH_INTERVAL, max_events=DEFAULT_MAX_EVENTS):
+        self.bot = bot
+        self.databases = databases
+        self.interval = interval
+        self.max_events = max_events
+        self.events = 0
+        self.flushes = 0
+        self.dropped = 0
+        self._buffers = {}
+        self._timers = {}
+        self._destinations = {}
+
+    def add(self, guild_id, entry):
+        """Ajoute un message supprimé au tampon de ``guild_id``."""
+        buffer = self._buffers.setdefault(guild_id, [])
+        buffer.append(entry)
+        self.events += 1
+        timer = self._timers.get(guild_id)
+        if len(buffer) >= self.max_events:
+            if timer:
+                timer.cancel()
+            self._timers[guild_id] = asyncio.create_task(self._flush_later(guild_id, 0))
+        elif timer is None or timer.done():
+            self._timers[guild_id] = asyncio.create_task(self._flush_later(guild_id, self.interval))
+
+    async def _flush_later(self, guild_id, delay):
+        if delay:
+            await asyncio.sleep(delay)
+        self._timers.pop(guild_id, None)
+        await self.flush(guild_id)
+
+    def invalidate(self, guild_id):
+        """Oublie la destination mémorisée de ``guild_id`` (après /setmodlog)."""
+        self._destinations.pop(guild_id, None)
+
+    async def destination(self, guild_id):
+        """Salon ou webhook du journal de modération de ``guild_id``, ou None."""
+        if guild_id in self._destinations:
+            return self._destinations[guild_id]
+        settings = await self.databases.for_guild(guild_id).get_guild_settings() if self.databases else {}
+        destination = None
+        if settings.get("modlog_webhook_url"):
+            destination = discord.Webhook.from_url(settings["modlog_webhook_url"], client=self.bot)
+        elif settings.get("modlog_channel_id"):
+            destination = self.bot.get_channel(settings["modlog_channel_id"])
+        self._destinations[guild_id] = destination
+        return destination
+
+    async def flush(self, guild_id):
+        """Publie en un message les suppressions en attente de ``guild_id``."""
+        entries = self._buffers.pop(guild_id, None)
+        if not entries:
+            return False
+        try:
+            destination = await self.destination(guild_id)
+            if destination is None:
+                self.dropped += len(entries)
+                logger.debug("Aucun journal de modération pour le serveur %s, %s suppression(s) ignorée(s)", guild_id, len(entries))
+                return False
+            await destination.send(**build_payload(entries))
+            self.flushes += 1
+            return True
+        except Exception as e:
+            self.dropped += len(entries)
+            logger.error("Erreur lors de la publication du journal de modération (serveur %s): %s", guild_id, e)
+            return False
+
+    async def report(self, guild_id, embed):
+        """Publie immédiatement un signalement (détection automatique) dans le journal de ``guild_id``."""
+        try:
+            destination = await self.destination(guild_id)
+            if destination is None:
+                logger.warning("Aucun journal de modération pour le serveur %s, signalement non publié: %s", guild_id, embed.title)
+                return False
+            await destination.send(embed=embed)
+            return True
+        except Exception as e:
+            logger.error("Erreur lors de la publication d'un signalement (serveur %s): %s", guild_id, e)
+            return False
+
+    def stats(self):
+        """Suppressions reçues, publications (appels API) et suppressions non publiées."""
+        return {
+            "events": self.events,
+            "flushes": self.flushes,
+            "dropped": self.dropped,
+            "pending": sum(len(buffer) for buffer in self._buffers.values()),
+        }
+
+    async def close(self):
+        """Annule les publications programmées et publie les tampons restants."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for guild_id in list(self._buffers):
+            await self.flush(guild_id)
@@ -0,0 +1,253 @@
+import hashlib
+import logging
+import os
+import time
+from collections import deque
+
+import discord
+
+from cogs.utils import hamming
+
+from .sanctions import partial_message, quota_ban
+from .term_filter import normalize
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+# Bandes de l'index LSH : deux empreintes à distance <= BANDS - 1 partagent au moins une bande
+BANDS = 4
+BAND_BITS = FINGERPRINT_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+SHINGLE_SIZE = 3
+# Messages trop courts (« ok », « lol »...) : quasi identiques par nature, ignorés
+MIN_LENGTH = 12
+
+DEFAULT_WINDOW = 60.0
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_DISTANCE = 3
+DEFAULT_MIN_AUTHORS = 3
+# Empreintes comparées au plus par bande (les plus récentes)
+MAX_CANDIDATES = 64
+
+ACTION_REPORT = "report"
+ACTION_DELETE = "delete"
+ACTION_BAN = "ban"
+ACTIONS = (ACTION_REPORT, ACTION_DELETE, ACTION_BAN)
+RAID_REASON = "Raid détecté (messages quasi identiques)"
+
+
+def simhash(text):
+    """Empreinte SimHash 64 bits des trigrammes de caractères de ``text`` (déjà normalisé)."""
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)} or {text}
+    counts = [0] * FINGERPRINT_BITS
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+        for bit in range(FINGERPRINT_BITS):
+            counts[bit] += 1 if value >> bit & 1 else -1
+    fingerprint = 0
+    for bit, count in enumerate(counts):
+        if count > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+class Fingerprint:
+    """Empreinte d'un message conservée dans l'index."""
+
+    __slots__ = ("seq", "guild_id", "channel_id", "author_id", "author_name", "message_id", "value", "timestamp")
+
+    def __init__(self, seq, guild_id, channel_id, author_id, author_name, message_id, value, timestamp):
+        self.seq = seq
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.author_name = author_name
+        self.message_id = message_id
+        self.value = value
+        self.timestamp = timestamp
+
+
+class NearDuplicateIndex:
+    """Index LSH des empreintes récentes, borné dans le temps et en taille.
+
+    Chaque empreinte est rangée dans ``BANDS`` seaux (serveur, bande, valeur de la
+    bande). Les empreintes sont insérées dans l'ordre chronologique et expirent dans
+    ce même ordre (fenêtre ``window`` ou plus de ``max_entries`` empreintes) : celle
+    qui expire est toujours en tête de chacun de ses seaux, ce qui rend l'expiration
+    en temps constant. La mémoire reste bornée par ``max_entries`` et une recherche
+    compare au plus ``BANDS * MAX_CANDIDATES`` empreintes, quel que soit le débit.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, max_entries=DEFAULT_MAX_ENTRIES, distance=DEFAULT_DISTANCE,
+                 clock=time.monotonic):
+        if distance >= BANDS:
+            raise ValueError(f"La distance doit être inférieure au nombre de bandes ({BANDS})")
+        self.window = window
+        self.max_entries = max_entries
+        self.distance = distance
+        self.clock = clock
+        self._seq = 0
+        self._entries = deque()
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _bands(guild_id, value):
+        return [(guild_id, band, value >> (band * BAND_BITS) & BAND_MASK) for band in range(BANDS)]
+
+    def _expire(self, now):
+        while self._entries and (len(self._entries) >= self.max_entries or now - self._entries[0].timestamp > self.window):
+            entry = self._entries.popleft()
+            for key in self._bands(entry.guild_id, entry.value):
+                bucket = self._buckets[key]
+                bucket.popleft()
+                if not bucket:
+                    del self._buckets[key]
+
+    def observe(self, guild_id, channel_id, author_id, author_name, message_id, value, now=None):
+        """Ajoute une empreinte et retourne les empreintes quasi identiques de la fenêtre."""
+        now = self.clock() if now is None else now
+        self._expire(now)
+        keys = self._bands(guild_id, value)
+
+        matches, seen = [], set()
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if not bucket:
+                continue
+            for index in range(len(bucket) - 1, max(-1, len(bucket) - 1 - MAX_CANDIDATES), -1):
+                candidate = bucket[index]
+                if candidate.seq not in seen:
+                    seen.add(candidate.seq)
+                    if hamming(candidate.value, value) <= self.distance:
+                        matches.append(candidate)
+
+        self._seq += 1
+        entry = Fingerprint(self._seq, guild_id, channel_id, author_id, author_name, message_id, value, now)
+        self._entries.append(entry)
+        for key in keys:
+            self._buckets.setdefault(key, deque()).append(entry)
+        return matches
+
+    def stats(self):
+        """Empreintes et seaux en mémoire."""
+        return {"entries": len(self._entries), "buckets": len(self._buckets)}
+
+
+class RaidGuard:
+    """Gestionnaire du MessagePipeline qui repère les raids par messages quasi identiques.
+
+    Quand ``min_authors`` comptes distincts publient des messages quasi identiques
+    dans la fenêtre de l'index (tous salons du serveur confondus), les nouveaux
+    comptes du groupe sont signalés dans le journal de modération et, selon
+    ``actions``, leurs messages supprimés et/ou eux-mêmes bannis via le quota du bot.
+    """
+
+    def __init__(self, bot, index=None, modlog=None, actions=(ACTION_REPORT,), databases=None, dispatcher=None,
+                 min_authors=DEFAULT_MIN_AUTHORS):
+        unknown = set(actions) - set(ACTIONS)
+        if unknown:
+            raise ValueError(f"Actions inconnues: {', '.join(sorted(unknown))}")
+        if ACTION_BAN in actions and (databases is None or dispatcher is None):
+            raise ValueError("L'action ban nécessite databases et dispatcher")
+        self.bot = bot
+        self.index = index if index is not None else NearDuplicateIndex()
+        self.modlog = modlog
+        self.actions = tuple(actions)
+        self.databases = databases
+        self.dispatcher = dispatcher
+        self.min_authors = min_authors
+        self.raids = 0
+        self._flagged = {}
+
+    @classmethod
+    def from_env(cls, bot, modlog=None, databases=None, dispatcher=None):
+        """Construit le garde depuis RAID_WINDOW, RAID_MIN_AUTHORS, RAID_DISTANCE et RAID_ACTIONS."""
+        actions = os.getenv("RAID_ACTIONS", ACTION_REPORT)
+        index = NearDuplicateIndex(
+            window=float(os.getenv("RAID_WINDOW", DEFAULT_WINDOW)),
+            distance=int(os.getenv("RAID_DISTANCE", DEFAULT_DISTANCE)),
+        )
+        return cls(
+            bot,
+            index=index,
+            modlog=modlog,
+            actions=[action.strip() for action in actions.split(",") if action.strip()],
+            databases=databases,
+            dispatcher=dispatcher,
+            min_authors=int(os.getenv("RAID_MIN_AUTHORS", DEFAULT_MIN_AUTHORS)),
+        )
+
+    async def __call__(self, descriptor):
+        """Retourne False (fin de la chaîne) pour un message de raid supprimé."""
+        if descriptor.guild_id is None or not descriptor.content:
+            return True
+        text = normalize(descriptor.content)
+        if len(text) < MIN_LENGTH:
+            return True
+
+        now = self.index.clock()
+        matches = self.index.observe(descriptor.guild_id, descriptor.channel_id, descriptor.author_id,
+                                     descriptor.author_name, descriptor.id, simhash(text), now)
+        cluster = {match.author_id: match for match in matches}
+        cluster.pop(descriptor.author_id, None)
+        if len(cluster) + 1 < self.min_authors:
+            return True
+
+        flagged_until = now + self.index.window
+        new = [match for author_id, match in cluster.items() if self._flagged.get((descriptor.guild_id, author_id), 0) <= now]
+        already_flagged = self._flagged.get((descriptor.guild_id, descriptor.author_id), 0) > now
+        for author_id in [match.author_id for match in new] + [descriptor.author_id]:
+            self._flagged[(descriptor.guild_id, author_id)] = flagged_until
+        # Nettoyage paresseux : seuls les comptes signalés récemment restent en mémoire
+        if len(self._flagged) > 1000:
+            self._flagged = {key: until for key, until in self._flagged.items() if until > now}
+
+        if new or not already_flagged:
+            self.raids += 1
+            await self._act(descriptor, new, len(cluster) + 1, include_author=not already_flagged)
+
+        if ACTION_DELETE in self.actions:
+            await self._delete(descriptor.channel_id, descriptor.id)
+            return False
+        return True
+
+    async def _act(self, descriptor, new, size, include_author=True):
+        logger.warning("Raid détecté sur le serveur %s: %s comptes, message « %s »", descriptor.guild_id, size, descriptor.content[:100])
+        if self.modlog is not None:
+            embed = discord.Embed(title="Raid détecté : messages quasi identiques",
+                                  description=descriptor.content[:1000], colour=discord.Colour.orange())
+            accounts = [f"<@{descriptor.author_id}>"] + [f"<@{match.author_id}>" for match in new]
+            embed.add_field(name=f"Comptes ({size} au total)", value=" ".join(accounts)[:1024], inline=False)
+            channels = {descriptor.channel_id} | {match.channel_id for match in new}
+            embed.add_field(name="Salons", value=" ".join(f"<#{channel_id}>" for channel_id in channels)[:1024], inline=False)
+            await self.modlog.report(descriptor.guild_id, embed)
+
+        if ACTION_DELETE in self.actions:
+            for match in new:
+                await self._delete(match.channel_id, match.message_id)
+
+        if ACTION_BAN in self.actions:
+            guild = self.bot.get_guild(descriptor.guild_id)
+            if guild is None:
+                return
+            targets = [(m.author_id, m.author_name) for m in new]
+            if include_author:
+                targets.insert(0, (descriptor.author_id, descriptor.author_name))
+            for author_id, author_name in targets:
+                banned = await quota_ban(self.bot, self.databases, self.dispatcher, guild,
+                                         discord.Object(id=author_id), author_name, RAID_REASON)
+                if banned is None:
+                    break  # Quota du bot épuisé
+
+    async def _delete(self, channel_id, message_id):
+        try:
+            await partial_message(self.bot, channel_id, message_id).delete()
+        except Exception as e:
+            logger.error("Erreur lors de la suppression d'un message de raid: %s", e)
+
+    def stats(self):
+        """Raids détectés et occupation de l'index."""
+        return {"raids": self.raids, **self.index.stats()}
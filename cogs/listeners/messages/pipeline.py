@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import os
+import time
+
+from cogs.logging_setup import log_context
+from cogs.metrics import instrumented
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 1000
+
+# Politiques quand la file est pleine
+DROP_OLDEST = "drop_oldest"  # le message le plus ancien est abandonné (les récents sont plus utiles à la modération)
+DROP_NEWEST = "drop_newest"  # le nouveau message est abandonné
+BLOCK = "block"  # le listener attend une place (contre-pression sur la boucle du gateway)
+POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+class MessageDescriptor:
+    """Instantané léger d'un message, déposé dans la file du pipeline.
+
+    Le contenu est copié à la réception (un message peut être modifié ensuite). Le
+    ``discord.Message`` n'est pas conservé : une file pleine ne retient ni ses
+    pièces jointes, ni ses embeds, ni son auteur. Les gestionnaires qui doivent agir
+    sur le message le reconstruisent depuis ses IDs (``sanctions.partial_message``).
+    ``attachments`` contient un ``(url, content_type, size)`` par pièce jointe.
+    """
+
+    __slots__ = ("id", "guild_id", "channel_id", "author_id", "author_name", "content", "received_at", "attachments")
+
+    def __init__(self, id, guild_id, channel_id, author_id, author_name, content, received_at, attachments=()):
+        self.id = id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.author_name = author_name
+        self.content = content
+        self.received_at = received_at
+        self.attachments = attachments
+
+    @classmethod
+    def from_message(cls, message, received_at):
+        guild = message.guild
+        return cls(
+            message.id,
+            guild.id if guild else None,
+            message.channel.id,
+            message.author.id,
+            str(message.author),
+            message.content,
+            received_at,
+            tuple((attachment.url, attachment.content_type, attachment.size) for attachment in message.attachments),
+        )
+
+
+class HandlerStats:
+    """Latence et erreurs d'un gestionnaire du pipeline."""
+
+    __slots__ = ("count", "errors", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed, failed):
+        self.count += 1
+        self.errors += failed
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_latency": self.total / self.count if self.count else 0.0,
+            "max_latency": self.max,
+        }
+
+
+class MessagePipeline:
+    """Traitement des messages hors du listener, par un pool borné de workers.
+
+    ``on_message`` se contente de déposer un MessageDescriptor dans une file bornée ;
+    ``workers`` tâches exécutent pour chaque message la chaîne des gestionnaires
+    enregistrés (``register``), dans l'ordre. Un gestionnaire qui retourne ``False``
+    interrompt la chaîne pour ce message. Quand la file est pleine, ``policy`` décide
+    (DROP_OLDEST, DROP_NEWEST ou BLOCK).
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, maxsize=DEFAULT_QUEUE_SIZE, policy=DROP_OLDEST, clock=time.perf_counter):
+        if policy not in POLICIES:
+            raise ValueError(f"Politique inconnue: {policy}")
+        self.workers = workers
+        self.maxsize = maxsize
+        self.policy = policy
+        self.clock = clock
+        self.handlers = []
+        self.accepted = 0
+        self.dropped = 0
+        self.processed = 0
+        self.max_queue_wait = 0.0
+        self._queue = asyncio.Queue(maxsize)
+        self._tasks = []
+        self._stats = {}
+
+    @classmethod
+    def from_env(cls):
+        """Construit le pipeline depuis MESSAGE_WORKERS, MESSAGE_QUEUE_SIZE et MESSAGE_DROP_POLICY."""
+        return cls(
+            workers=int(os.getenv("MESSAGE_WORKERS", DEFAULT_WORKERS)),
+            maxsize=int(os.getenv("MESSAGE_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)),
+            policy=os.getenv("MESSAGE_DROP_POLICY", DROP_OLDEST),
+        )
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def register(self, handler, name=None):
+        """Ajoute ``handler`` (coroutine recevant un MessageDescriptor) en fin de chaîne."""
+        name = name or getattr(handler, "__name__", repr(handler))
+        self.handlers.append((name, instrumented("handler", name)(handler)))
+        self._stats[name] = HandlerStats()
+        return handler
+
+    def _start(self):
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def submit(self, message):
+        """Dépose un message dans la file ; retourne False s'il a été abandonné."""
+        self._start()
+        descriptor = MessageDescriptor.from_message(message, self.clock())
+        if self.policy == BLOCK:
+            await self._queue.put(descriptor)
+        else:
+            if self._queue.full():
+                self.dropped += 1
+                if self.policy == DROP_NEWEST:
+                    return False
+                # DROP_OLDEST : le plus ancien message en attente laisse sa place
+                self._queue.get_nowait()
+                self._queue.task_done()
+            self._queue.put_nowait(descriptor)
+        self.accepted += 1
+        return True
+
+    async def _worker(self):
+        while True:
+            descriptor = await self._queue.get()
+            self.max_queue_wait = max(self.max_queue_wait, self.clock() - descriptor.received_at)
+            try:
+                with log_context(guild_id=descriptor.guild_id, user_id=descriptor.author_id):
+                    await self._process(descriptor)
+            finally:
+                self.processed += 1
+                self._queue.task_done()
+
+    async def _process(self, descriptor):
+        for name, handler in self.handlers:
+            started = self.clock()
+            failed = False
+            try:
+                result = await handler(descriptor)
+            except Exception as e:
+                failed = True
+                result = None
+                logger.error("Erreur dans le gestionnaire de messages %s: %s", name, e)
+            self._stats[name].record(self.clock() - started, failed)
+            if result is False:
+                break
+
+    async def join(self):
+        """Attend que tous les messages acceptés aient été traités."""
+        await self._queue.join()
+
+    def stats(self):
+        """Profondeur de la file, messages acceptés/abandonnés/traités et latence par gestionnaire."""
+        return {
+            "depth": self._queue.qsize(),
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            "accepted": self.accepted,
+            "dropped": self.dropped,
+            "processed": self.processed,
+            "max_queue_wait": self.max_queue_wait,
+            "handlers": {name: stats.as_dict() for name, stats in self._stats.items()},
+        }
+
+    async def close(self):
+        """Arrête les workers ; les messages encore en file sont abandonnés."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
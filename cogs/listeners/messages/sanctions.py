@@ -0,0 +1,33 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def partial_message(bot, channel_id, message_id, guild_id=None):
+    """Message reconstruit depuis ses IDs (sans cache ni requête), pour le supprimer ou y répondre."""
+    return bot.get_partial_messageable(channel_id, guild_id=guild_id).get_partial_message(message_id)
+
+
+async def quota_ban(bot, databases, dispatcher, guild, user, user_name, reason):
+    """Bannit ``user`` au nom du bot, en décomptant le quota et l'historique du bot.
+
+    Le quota du bot se configure avec /setban, comme celui d'un modérateur. Retourne
+    True si le ban a eu lieu, None si le quota est épuisé ou non configuré, False en
+    cas d'erreur.
+    """
+    moderator_id = bot.user.id
+    db = databases.for_guild(guild.id)
+    try:
+        async with dispatcher.moderator_lock(guild.id, moderator_id):
+            moderator_data = await db.get_moderator_data(moderator_id)
+            if not moderator_data or moderator_data.get("ban_limit", 0) <= 0:
+                logger.warning("Quota de bans du bot épuisé ou non configuré sur le serveur %s", guild.id)
+                return None
+            await dispatcher.ban(guild, user, reason=reason)
+            ban = await db.consume_ban(moderator_id, user.id, user_name, reason)
+            if ban is None:
+                logger.warning("Ban de %s effectué mais non décompté : quota du bot modifié entre-temps", user.id)
+        return True
+    except Exception as e:
+        logger.error("Erreur lors du bannissement automatique de %s: %s", user.id, e)
+        return False
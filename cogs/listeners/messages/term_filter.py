@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import re
+import unicodedata
+from collections import deque
+
+from discord.ext import commands
+
+from .sanctions import partial_message
+
+logger = logging.getLogger(__name__)
+
+# Substitutions courantes du leetspeak, appliquées après la mise en minuscules
+_LEET = str.maketrans({
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b",
+    "@": "a", "$": "s", "!": "i", "€": "e", "|": "l",
+})
+# Symboles décodés comme des lettres ; en début ou fin de mot, ce sont aussi des ponctuations
+_LEET_SYMBOLS = frozenset(chr(code) for code in _LEET if not chr(code).isalnum())
+_SPACES = re.compile(r"\s+")
+
+
+def _fold(text):
+    """Minuscules, sans accents, espaces simples ; même longueur que sa forme normalisée."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _SPACES.sub(" ", text).strip()
+
+
+def normalize(text):
+    """Forme comparable d'un texte : minuscules, sans accents, leetspeak décodé, espaces simples."""
+    return _fold(text).translate(_LEET)
+
+
+def _is_boundary(folded, text, index, step):
+    """Vrai si le caractère ``index``, voisin d'une correspondance côté ``step`` (-1 ou 1), limite le mot.
+
+    Une série de symboles leet qui va jusqu'à une limite est une ponctuation : dans
+    « scam!! », les « ! » terminent le mot ; dans « sc@m », le « @ » est une lettre.
+    """
+    if not 0 <= index < len(text) or not text[index].isalnum():
+        return True
+    end = index
+    while 0 <= end < len(folded) and folded[end] in _LEET_SYMBOLS:
+        end += step
+    return end != index and (not 0 <= end < len(text) or not text[end].isalnum())
+
+
+class TermAutomaton:
+    """Automate d'Aho-Corasick compilé à partir d'une liste de termes.
+
+    Le parcours d'un texte est linéaire en sa longueur, quel que soit le nombre de
+    termes : chaque caractère suit au plus une transition, plus des liens d'échec dont
+    le coût est amorti. Un terme ne correspond qu'à des mots entiers (« ass » ne
+    correspond pas dans « class ») ; une ponctuation qui est aussi un symbole leet
+    (« scam! ») compte comme une limite de mot.
+    """
+
+    def __init__(self, terms=()):
+        self.terms = sorted({normalized for normalized in map(normalize, terms) if normalized})
+        self._goto = [{}]
+        self._fail = [0]
+        # Termes reconnus en chaque état (y compris via les liens d'échec)
+        self._output = [()]
+        for index, term in enumerate(self.terms):
+            self._insert(term, index)
+        self._link()
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _insert(self, term, index):
+        state = 0
+        for char in term:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] = (index,)
+
+    def _link(self):
+        """Calcule les liens d'échec en largeur d'abord."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find(self, text):
+        """Retourne le premier terme interdit présent dans ``text`` (mot entier), ou None."""
+        if not self.terms:
+            return None
+        folded = _fold(text)
+        text = folded.translate(_LEET)
+        state = 0
+        goto, fail, output, terms = self._goto, self._fail, self._output, self.terms
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                start = end - len(terms[index]) + 1
+                if _is_boundary(folded, text, start - 1, -1) and _is_boundary(folded, text, end + 1, 1):
+                    return terms[index]
+        return None
+
+
+class TermFilter(commands.Cog):
+    """Filtre des termes interdits de chaque serveur, gestionnaire du MessagePipeline.
+
+    La liste d'un serveur (table banned_terms) est compilée en un seul automate au
+    premier message du serveur. Quand un administrateur la modifie (événement
+    ``banned_terms_update``), seul l'automate de ce serveur est recompilé, puis
+    remplacé d'un coup : les messages continuent d'être filtrés par l'ancien pendant
+    la recompilation.
+    """
+
+    def __init__(self, bot, databases):
+        self.bot = bot
+        self.databases = databases
+        self.matches = 0
+        self._automata = {}
+        self._locks = {}
+
+    async def automaton(self, guild_id):
+        """Automate de ``guild_id``, compilé au premier appel."""
+        automaton = self._automata.get(guild_id)
+        if automaton is not None:
+            return automaton
+        lock = self._locks.setdefault(guild_id, asyncio.Lock())
+        async with lock:
+            if guild_id not in self._automata:
+                await self.reload(guild_id)
+        return self._automata[guild_id]
+
+    async def reload(self, guild_id):
+        """Recompile l'automate de ``guild_id`` depuis la base."""
+        terms = await self.databases.for_guild(guild_id).get_banned_terms()
+        self._automata[guild_id] = TermAutomaton(terms)
+        logger.info("Filtre du serveur %s compilé: %s terme(s)", guild_id, len(terms))
+
+    @commands.Cog.listener()
+    async def on_banned_terms_update(self, guild_id):
+        """Événement envoyé par les commandes de gestion des termes interdits."""
+        try:
+            await self.reload(guild_id)
+        except Exception as e:
+            logger.error("Erreur lors de la recompilation du filtre du serveur %s: %s", guild_id, e)
+
+    async def __call__(self, descriptor):
+        """Supprime un message contenant un terme interdit ; retourne False (fin de la chaîne)."""
+        if descriptor.guild_id is None or not descriptor.content:
+            return True
+        automaton = await self.automaton(descriptor.guild_id)
+        term = automaton.find(descriptor.content)
+        if term is None:
+            return True
+
+        self.matches += 1
+        logger.warning("Terme interdit « %s » de %s (%s) dans le salon %s", term, descriptor.author_name, descriptor.author_id, descriptor.channel_id)
+        try:
+            await partial_message(self.bot, descriptor.channel_id, descriptor.id, descriptor.guild_id).delete()
+        except Exception as e:
+            logger.error("Erreur lors de la suppression d'un message filtré: %s", e)
+        return False
@@ -0,0 +1,201 @@
+import contextlib
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+
+# Contexte des enregistrements : serveur, utilisateur et commande en cours
+guild_id_var = contextvars.ContextVar("guild_id", default=None)
+user_id_var = contextvars.ContextVar("user_id", default=None)
+command_var = contextvars.ContextVar("command", default=None)
+
+CONTEXT_FIELDS = (("guild_id", guild_id_var), ("user_id", user_id_var), ("command", command_var))
+# Attributs standard d'un LogRecord, exclus des champs supplémentaires (extra=...)
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"} | {
+    field for field, _ in CONTEXT_FIELDS
+}
+
+DEFAULT_QUEUE_SIZE = 10000
+
+
+@contextlib.contextmanager
+def log_context(guild_id=None, user_id=None, command=None):
+    """Associe un serveur, un utilisateur et/ou une commande aux logs émis dans le bloc.
+
+    Les valeurs suivent les tâches asyncio (contextvars) : deux commandes exécutées
+    en parallèle gardent chacune leur contexte.
+    """
+    tokens = [
+        (var, var.set(value))
+        for (_, var), value in zip(CONTEXT_FIELDS, (guild_id, user_id, command))
+        if value is not None
+    ]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def current_context():
+    """Contexte de log courant, à repasser à ``log_context`` dans une autre tâche (workers)."""
+    return {field: var.get() for field, var in CONTEXT_FIELDS}
+
+
+class ContextFilter(logging.Filter):
+    """Copie le contexte courant (serveur, utilisateur, commande) dans l'enregistrement.
+
+    Doit s'exécuter dans le thread qui émet le log, avant la file : le thread
+    d'écriture n'a pas le contexte de la tâche.
+    """
+
+    def filter(self, record):
+        for field, var in CONTEXT_FIELDS:
+            if not hasattr(record, field):
+                setattr(record, field, var.get())
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Ne garde qu'une fraction des logs de certains loggers (et de leurs enfants).
+
+    ``rates`` associe un nom de logger à la proportion conservée (0 à 1). Seuls les
+    niveaux inférieurs à WARNING sont échantillonnés : avertissements et erreurs
+    sont toujours écrits. Un log écarté n'est jamais formaté.
+    """
+
+    def __init__(self, rates, random=random.random):
+        super().__init__()
+        self.rates = dict(rates)
+        self.random = random
+        self.dropped = 0
+        self._resolved = {}
+
+    def rate(self, name):
+        """Proportion conservée pour le logger ``name`` (celle de l'ancêtre le plus proche)."""
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate, candidate = 1.0, name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate(record.name)
+        if rate >= 1.0 or self.random() < rate:
+            return True
+        self.dropped += 1
+        return False
+
+    @classmethod
+    def parse(cls, spec):
+        """Construit le filtre depuis ``"logger=proportion,..."`` (None si ``spec`` est vide)."""
+        rates = {}
+        for item in (spec or "").split(","):
+            if item.strip():
+                name, _, rate = item.partition("=")
+                rates[name.strip()] = float(rate)
+        return cls(rates) if rates else None
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement : horodatage, niveau, logger, message et contexte."""
+
+    def format(self, record):
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field, _ in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        elif record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler qui laisse le formatage au thread d'écriture.
+
+    Seul le message est résolu dans le thread émetteur (les arguments peuvent changer
+    ensuite) ; la trace d'une exception est mise en texte car l'objet traceback
+    retient les frames. La mise en forme (JSON) et l'écriture se font dans le
+    QueueListener. Si la file est pleine, le log est abandonné plutôt que de bloquer
+    la boucle d'événements.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level=logging.INFO, json_output=True, sampling=None, stream=None, queue_size=DEFAULT_QUEUE_SIZE):
+    """Configure le logger racine : file en mémoire, écriture dans un thread dédié.
+
+    Retourne le QueueListener démarré ; ``listener.stop()`` écrit les logs restants.
+    """
+    handler = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    handler.setFormatter(JsonFormatter() if json_output else logging.Formatter(
+        "%(asctime)s %(levelname)s %(name)s [guild=%(guild_id)s user=%(user_id)s command=%(command)s] %(message)s"
+    ))
+    log_queue = queue.Queue(queue_size)
+    queue_handler = LazyQueueHandler(log_queue)
+    if sampling is not None:
+        queue_handler.addFilter(sampling)
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def setup_logging_from_env(stream=None):
+    """Configure les logs depuis LOG_LEVEL, LOG_FORMAT (json ou text) et LOG_SAMPLING."""
+    return setup_logging(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        json_output=os.getenv("LOG_FORMAT", "json").lower() != "text",
+        sampling=SamplingFilter.parse(os.getenv("LOG_SAMPLING")),
+        stream=stream,
+    )
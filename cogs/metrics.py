@@ -0,0 +1,385 @@
+import bisect
+import functools
+import inspect
+import math
+import os
+import threading
+import time
+
+# Bornes (secondes) des histogrammes de latence : de 1 ms à 10 s
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Verrou commun à toutes les métriques : les méthodes de ModerationDB sont mesurées
+# depuis les threads de la base, et chaque section critique ne dure que quelques opérations
+_LOCK = threading.Lock()
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric:
+    """Métrique nommée, déclinée par valeurs d'étiquettes.
+
+    Chaque combinaison d'étiquettes a sa cellule (liste mutable), créée au premier
+    usage : les décorateurs la résolvent une fois pour toutes et n'ont plus qu'à la
+    modifier sous le verrou. Les valeurs peuvent aussi être lues au moment de l'export
+    par des fonctions (``add_callback``) qui retournent ``{valeurs d'étiquettes: valeur}`` :
+    les objets déjà instrumentés (files, caches) exposent leurs compteurs sans coût
+    sur leur chemin critique. Les valeurs de plusieurs sources s'additionnent ;
+    une source enregistrée à nouveau (rechargement d'extension) remplace l'ancienne.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._callbacks = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"Étiquettes attendues pour {self.name}: {', '.join(self.labels) or 'aucune'}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def _new_cell(self):
+        return [0]
+
+    def _cell(self, key):
+        cell = self._values.get(key)
+        if cell is None:
+            with _LOCK:
+                cell = self._values.setdefault(key, self._new_cell())
+        return cell
+
+    def _inc(self, key, amount=1):
+        cell = self._cell(key)
+        with _LOCK:
+            cell[0] += amount
+
+    def add_callback(self, callback, source=None):
+        """Ajoute une fonction lue à chaque export ; elle ne doit pas faire d'entrée-sortie."""
+        self._callbacks[source if source is not None else id(callback)] = callback
+
+    def value(self, **labels):
+        """Valeur courante pour ``labels`` (fonctions comprises), 0 si jamais mesurée."""
+        return self._collect().get(self._key(labels), 0)
+
+    def _collect(self):
+        with _LOCK:
+            values = {key: cell[0] for key, cell in self._values.items()}
+        for callback in self._callbacks.values():
+            result = callback()
+            if not isinstance(result, dict):
+                result = {(): result}
+            for key, value in result.items():
+                key = tuple(str(part) for part in (key if isinstance(key, tuple) else (key,)))
+                values[key] = values.get(key, 0) + value
+        return values
+
+    def samples(self):
+        """Échantillons (suffixe, étiquettes, valeur) à exporter."""
+        return [("", key, value) for key, value in sorted(self._collect().items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, key, value in self.samples():
+            names = self.labels + (("le",) if len(key) > len(self.labels) else ())
+            lines.append(f"{self.name}{suffix}{_format_labels(names, key)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Compteur croissant."""
+
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        self._inc(self._key(labels), amount)
+
+
+class Gauge(Metric):
+    """Valeur instantanée (profondeur de file, octets en cache...)."""
+
+    type = "gauge"
+
+    def set(self, value, **labels):
+        cell = self._cell(self._key(labels))
+        with _LOCK:
+            cell[0] = value
+
+    def inc(self, amount=1, **labels):
+        self._inc(self._key(labels), amount)
+
+    def dec(self, amount=1, **labels):
+        self._inc(self._key(labels), -amount)
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Histogram(Metric):
+    """Répartition de durées dans des tranches fixes, plus leur somme et leur nombre."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_cell(self):
+        # Comptes par tranche (non cumulés, la dernière pour +Inf), somme
+        return [[0] * (len(self.buckets) + 1), 0.0]
+
+    def observe(self, value, **labels):
+        cell = self._cell(self._key(labels))
+        index = bisect.bisect_left(self.buckets, value)
+        with _LOCK:
+            cell[0][index] += 1
+            cell[1] += value
+
+    def time(self, **labels):
+        """Gestionnaire de contexte qui observe la durée de son bloc."""
+        return _Timer(self, labels)
+
+    def add_callback(self, callback, source=None):
+        raise TypeError("Un histogramme ne peut pas être lu par une fonction")
+
+    def _snapshot(self):
+        with _LOCK:
+            return {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+
+    def value(self, **labels):
+        """Nombre d'observations, somme et comptes cumulés par borne pour ``labels``."""
+        counts, total = self._snapshot().get(self._key(labels), self._new_cell())
+        cumulative = [sum(counts[:index + 1]) for index in range(len(counts))]
+        return {"count": cumulative[-1], "sum": total, "buckets": dict(zip(self.buckets + (math.inf,), cumulative))}
+
+    def samples(self):
+        samples = []
+        for key, (counts, total) in sorted(self._snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append(("_bucket", key + (_format_value(float(bound)),), cumulative))
+            samples.append(("_sum", key, total))
+            samples.append(("_count", key, cumulative))
+        return samples
+
+
+class Registry:
+    """Ensemble des métriques du bot, exporté au format texte de Prometheus.
+
+    Les constructeurs ``counter``, ``gauge`` et ``histogram`` retournent la métrique
+    existante du même nom : chaque module déclare les siennes au chargement.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name, documentation, labels, **options):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, documentation, labels, **options)
+        elif type(metric) is not cls or metric.labels != tuple(labels):
+            raise ValueError(f"La métrique {name} existe déjà avec un autre type ou d'autres étiquettes")
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._get_or_create(Counter, name, documentation, labels)
+
+    def gauge(self, name, documentation, labels=()):
+        return self._get_or_create(Gauge, name, documentation, labels)
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labels, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Export texte (format d'exposition 0.0.4) de toutes les métriques."""
+        return "\n".join(metric.render() for _, metric in sorted(self._metrics.items())) + "\n"
+
+
+# Registre global, exporté par /metrics
+REGISTRY = Registry()
+
+# Familles de métriques des décorateurs : type d'appel -> description
+KINDS = {
+    "command": "commandes slash",
+    "listener": "listeners Discord",
+    "handler": "gestionnaires du pipeline de messages",
+    "db": "méthodes de ModerationDB",
+}
+
+
+def metrics_enabled():
+    """Instrumentation active, sauf METRICS_ENABLED=0 (lu quand une fonction est décorée)."""
+    return os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+
+
+class _Series:
+    """Cellules de durée, d'erreurs et d'appels en cours d'une fonction instrumentée.
+
+    Résolues une fois : un appel mesuré ne cherche ni métrique ni étiquette. Les
+    fonctions peuvent s'exécuter dans les threads de la base et modifient les cellules
+    sous le verrou (``start_locked``/``stop_locked``) ; les coroutines s'exécutent
+    toutes dans le thread de la boucle et s'en passent (``start``/``stop``).
+    """
+
+    __slots__ = ("buckets", "duration", "errors", "in_flight")
+
+    def __init__(self, kind, name, registry):
+        if kind not in KINDS:
+            raise ValueError(f"Type d'appel inconnu: {kind}")
+        description = KINDS[kind]
+        duration = registry.histogram(f"diobot_{kind}_duration_seconds", f"Durée des {description}", ("name",))
+        errors = registry.counter(f"diobot_{kind}_errors_total", f"Exceptions levées par les {description}", ("name",))
+        in_flight = registry.gauge(f"diobot_{kind}_in_flight", f"Appels en cours des {description}", ("name",))
+        key = (str(name),)
+        self.buckets = duration.buckets
+        self.duration = duration._cell(key)
+        self.errors = errors._cell(key)
+        self.in_flight = in_flight._cell(key)
+
+    def start(self):
+        self.in_flight[0] += 1
+        return time.perf_counter()
+
+    def stop(self, started, failed):
+        elapsed = time.perf_counter() - started
+        duration = self.duration
+        duration[0][bisect.bisect_left(self.buckets, elapsed)] += 1
+        duration[1] += elapsed
+        self.in_flight[0] -= 1
+        if failed:
+            self.errors[0] += 1
+
+    def start_locked(self):
+        with _LOCK:
+            self.in_flight[0] += 1
+        return time.perf_counter()
+
+    def stop_locked(self, started, failed):
+        elapsed = time.perf_counter() - started
+        index = bisect.bisect_left(self.buckets, elapsed)
+        with _LOCK:
+            self.duration[0][index] += 1
+            self.duration[1] += elapsed
+            self.in_flight[0] -= 1
+            if failed:
+                self.errors[0] += 1
+
+
+def instrumented(kind, name=None, registry=REGISTRY, enabled=None):
+    """Décorateur : durée (histogramme), exceptions et appels en cours d'une fonction.
+
+    Fonctionne pour les fonctions et les coroutines (ou objets dont ``__call__`` est
+    une coroutine). ``name`` vaut par défaut le nom qualifié de la fonction. Quand
+    l'instrumentation est désactivée (METRICS_ENABLED=0 ou ``enabled=False``), la
+    fonction est retournée telle quelle : aucun coût à l'appel.
+    """
+    def decorator(func):
+        if not (metrics_enabled() if enabled is None else enabled):
+            return func
+        series = _Series(kind, name or getattr(func, "__qualname__", type(func).__name__), registry)
+
+        if inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(getattr(func, "__call__", None)):
+            start, stop = series.start, series.stop
+
+            async def wrapper(*args, **kwargs):
+                started = start()
+                failed = False
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    failed = True
+                    raise
+                finally:
+                    stop(started, failed)
+        else:
+            start, stop = series.start_locked, series.stop_locked
+
+            def wrapper(*args, **kwargs):
+                started = start()
+                failed = False
+                try:
+                    return func(*args, **kwargs)
+                except Exception:
+                    failed = True
+                    raise
+                finally:
+                    stop(started, failed)
+        return functools.wraps(func)(wrapper)
+    return decorator
+
+
+class _NullTracker:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TRACKER = _NullTracker()
+# Séries des blocs mesurés par track(), par (registre, type, nom)
+_TRACKED = {}
+
+
+class _Tracker:
+    __slots__ = ("series", "started")
+
+    def __init__(self, series):
+        self.series = series
+
+    def __enter__(self):
+        self.started = self.series.start_locked()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.series.stop_locked(self.started, exc_type is not None and issubclass(exc_type, Exception))
+        return False
+
+
+def track(kind, name, registry=REGISTRY, enabled=None):
+    """Gestionnaire de contexte équivalent à ``instrumented`` pour un bloc de code.
+
+    Utilisable autour d'un ``await`` : seule la durée écoulée est mesurée.
+    """
+    if not (metrics_enabled() if enabled is None else enabled):
+        return _NULL_TRACKER
+    series = _TRACKED.get((id(registry), kind, name))
+    if series is None:
+        series = _TRACKED[(id(registry), kind, name)] = _Series(kind, name, registry)
+    return _Tracker(series)
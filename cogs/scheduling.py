@@ -0,0 +1,72 @@
+import asyncio
+import heapq
+import time
+
+
+class DeadlineScheduler:
+    """Min-heap d'échéances avec une attente asynchrone sur la plus proche.
+
+    ``schedule`` remplace l'échéance d'une clé : l'ancienne entrée reste dans le tas
+    mais est ignorée (suppression paresseuse). La boucle qui appelle ``wait_due`` ne se
+    réveille qu'à l'échéance la plus proche, ou quand une échéance plus proche est ajoutée.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._heap = []
+        self._deadlines = {}
+        self._wakeup = asyncio.Event()
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def __contains__(self, key):
+        return key in self._deadlines
+
+    def schedule(self, key, deadline):
+        """Programme (ou reprogramme) ``key`` à l'instant ``deadline`` (timestamp)."""
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, key))
+        if self._heap[0] == (deadline, key):
+            self._wakeup.set()
+        # Compacter le tas si les entrées obsolètes dominent
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [(d, k) for k, d in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    def cancel(self, key):
+        """Annule l'échéance de ``key`` si elle existe."""
+        self._deadlines.pop(key, None)
+
+    def next_deadline(self):
+        """Retourne l'échéance la plus proche, ou None si rien n'est programmé."""
+        heap = self._heap
+        while heap and self._deadlines.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now=None):
+        """Retire et retourne les clés dont l'échéance est passée, de la plus ancienne à la plus récente."""
+        now = self.clock() if now is None else now
+        due = []
+        while True:
+            deadline = self.next_deadline()
+            if deadline is None or deadline > now:
+                return due
+            _, key = heapq.heappop(self._heap)
+            del self._deadlines[key]
+            due.append(key)
+
+    async def wait_due(self):
+        """Attend la prochaine échéance puis retourne les clés arrivées à échéance."""
+        while True:
+            deadline = self.next_deadline()
+            now = self.clock()
+            if deadline is not None and deadline <= now:
+                return self.pop_due(now)
+            self._wakeup.clear()
+            timeout = None if deadline is None else deadline - now
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta
 import logging
 
+from cogs.database.database import DEFAULT_RESET_INTERVAL_DAYS
+
 logger = logging.getLogger("moderation")
 
 def check_and_reset_limit(db, user_id):
@@ -16,8 +18,8 @@ def check_and_reset_limit(db, user_id):
         
         # Si la date de réinitialisation est dépassée
         if current_date >= reset_date:
-            # Calculer la nouvelle date de réinitialisation (même intervalle que précédemment)
-            days_interval = (reset_date - (reset_date - timedelta(days=30))).days
+            # Calculer la nouvelle date de réinitialisation (même intervalle que celui défini via /setban)
+            days_interval = mod_data.get("reset_interval_days") or DEFAULT_RESET_INTERVAL_DAYS
             new_reset_date = current_date + timedelta(days=days_interval)
             
             # Mettre à jour les données
@@ -25,13 +27,15 @@ def check_and_reset_limit(db, user_id):
                 user_id,
                 mod_data["initial_limit"],
                 mod_data["initial_limit"],
-                new_reset_date.isoformat()
+                new_reset_date.isoformat(),
+                mod_data.get("username"),
+                reset_interval_days=days_interval
             )
-            logger.info(f"Limite de bans réinitialisée pour l'utilisateur {user_id}")
+            logger.info("Limite de bans réinitialisée pour l'utilisateur %s", user_id)
             return True
         return False
     except Exception as e:
-        logger.error(f"Erreur lors de la vérification/réinitialisation de la limite: {e}")
+        logger.error("Erreur lors de la vérification/réinitialisation de la limite: %s", e)
         return False
 
 def format_date(date_str):
@@ -40,5 +44,10 @@ def format_date(date_str):
         date_obj = datetime.fromisoformat(date_str)
         return date_obj.strftime("%d/%m/%Y %H:%M")
     except Exception as e:
-        logger.error(f"Erreur lors du formatage de la date: {e}")
-        return date_str 
\ No newline at end of file
+        logger.error("Erreur lors du formatage de la date: %s", e)
+        return date_str 
+
+def hamming(a, b):
+    """Distance de Hamming entre deux empreintes entières (nombre de bits différents)."""
+    # bin().count() plutôt que int.bit_count(), absent avant Python 3.10
+    return bin(a ^ b).count("1")
@@ -2,6 +2,8 @@ import sqlite3
 import os
 import logging
 
+from cogs.database.migrations import migrate, get_schema_version
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 logger = logging.getLogger()
@@ -14,41 +16,20 @@ def init_database(db_path="moderation.db"):
         
         # Connexion à la base de données
         conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Création des tables
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS moderators (
-            user_id INTEGER PRIMARY KEY,
-            ban_limit INTEGER,
-            initial_limit INTEGER,
-            reset_date TEXT
-        )
-        ''')
-        
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS ban_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            moderator_id INTEGER,
-            banned_user_id INTEGER,
-            banned_user_name TEXT,
-            reason TEXT,
-            timestamp TEXT,
-            FOREIGN KEY (moderator_id) REFERENCES moderators (user_id)
-        )
-        ''')
         
-        conn.commit()
+        # Création / mise à jour des tables via les migrations versionnées (schéma unique partagé avec ModerationDB)
+        applied = migrate(conn)
+        version = get_schema_version(conn)
         conn.close()
         
         if db_exists:
-            logger.info(f"Base de données {db_path} mise à jour avec succès")
+            logger.info("Base de données %s mise à jour avec succès (version %s, migrations appliquées: %s)", db_path, version, applied or 'aucune')
         else:
-            logger.info(f"Base de données {db_path} créée avec succès")
+            logger.info("Base de données %s créée avec succès (version %s)", db_path, version)
         
         return True
     except Exception as e:
-        logger.error(f"Erreur lors de l'initialisation de la base de données: {e}")
+        logger.error("Erreur lors de l'initialisation de la base de données: %s", e)
         return False
 
 if __name__ == "__main__":
@@ -67,7 +48,7 @@ if __name__ == "__main__":
         if tables:
             logger.info("Tables créées :")
             for table in tables:
-                logger.info(f"- {table[0]}")
+                logger.info("- %s", table[0])
         else:
             logger.warning("Aucune table n'a été créée !")
         
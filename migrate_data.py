@@ -1,74 +1,315 @@
+import argparse
 import json
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
 import os
+import time
+
+from cogs.database.migrations import migrate
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 logger = logging.getLogger()
 
-def migrate_json_to_sqlite(json_path="banData.json", db_path="moderation.db"):
-    """Migre les données du fichier JSON vers la base de données SQLite."""
+CHUNK_SIZE = 64 * 1024
+BATCH_SIZE = 5000
+
+# Clés acceptées pour la section d'historique des bans dans l'export JSON
+HISTORY_KEYS = ("history", "ban_history", "banHistory")
+
+_WHITESPACE = " \t\n\r"
+
+
+class JsonStream:
+    """Lecture incrémentale d'un document JSON, par blocs de ``chunk_size`` caractères.
+
+    Seule la valeur en cours de décodage est gardée en mémoire : un objet ou un tableau
+    de premier niveau peut être parcouru élément par élément sans charger le fichier.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self):
+        """Retourne le prochain caractère significatif sans le consommer ('' en fin de fichier)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"JSON invalide: '{char}' attendu, '{found}' trouvé")
+        self.pos += 1
+
+    def value(self):
+        """Décode la prochaine valeur JSON complète."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            # Un nombre en fin de tampon peut être tronqué : relire avant de conclure
+            if end == len(self.buffer) and not self.eof:
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+    def iter_keys(self):
+        """Parcourt les clés d'un objet ; l'appelant doit consommer la valeur de chaque clé."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            separator = self.peek()
+            self.pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"JSON invalide: ',' ou '}}' attendu, '{separator}' trouvé")
+
+    def iter_items(self):
+        """Parcourt les paires (clé, valeur) d'un objet."""
+        for key in self.iter_keys():
+            yield key, self.value()
+
+    def iter_array(self):
+        """Parcourt les éléments d'un tableau."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self.pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"JSON invalide: ',' ou ']' attendu, '{separator}' trouvé")
+
+
+def _to_epoch(value):
+    """Convertit une date de l'export (epoch ou ISO) en epoch entier."""
+    if value is None or isinstance(value, (int, float)):
+        return None if value is None else int(value)
+    date = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return int(date.timestamp())
+
+
+def _moderator_row(mod_id, mod_data):
+    # Vérifier si les données nécessaires sont présentes
+    if not all(key in mod_data for key in ["limit", "initial_limit", "time_reset"]):
+        return None
+    return (int(mod_id), mod_data["limit"], mod_data["initial_limit"], mod_data["time_reset"])
+
+
+def _history_row(entry):
+    moderator_id = entry.get("moderator_id", entry.get("moderator"))
+    banned_user_id = entry.get("banned_user_id", entry.get("user_id"))
+    if moderator_id is None or banned_user_id is None:
+        return None
+    return (
+        int(moderator_id),
+        int(banned_user_id),
+        entry.get("banned_user_name", entry.get("username")),
+        entry.get("reason"),
+        _to_epoch(entry.get("timestamp", entry.get("date"))),
+    )
+
+
+INSERT_MODERATOR = (
+    "INSERT INTO moderators (user_id, ban_limit, initial_limit, reset_date) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(guild_id, user_id) DO UPDATE SET ban_limit = excluded.ban_limit, "
+    "initial_limit = excluded.initial_limit, reset_date = excluded.reset_date"
+)
+INSERT_HISTORY = (
+    "INSERT INTO ban_history (moderator_id, banned_user_id, banned_user_name, reason, timestamp) "
+    "VALUES (?, ?, ?, ?, COALESCE(?, CAST(strftime('%s', 'now') AS INTEGER)))"
+)
+
+
+class _BatchWriter:
+    """Écrit les lignes par lots (executemany) et enregistre le point de reprise dans la même transaction."""
+
+    def __init__(self, conn, source, checkpoint, batch_size):
+        self.conn = conn
+        self.source = source
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.pending = {"moderators": [], "history": []}
+        self.written = 0
+        self.started = time.perf_counter()
+
+    def add(self, section, row):
+        self.pending[section].append(row)
+        if sum(len(rows) for rows in self.pending.values()) >= self.batch_size:
+            self.flush()
+
+    def flush(self, completed=False):
+        moderators, history = self.pending["moderators"], self.pending["history"]
+        with self.conn:
+            if moderators:
+                self.conn.executemany(INSERT_MODERATOR, moderators)
+            if history:
+                self.conn.executemany(INSERT_HISTORY, history)
+            self.checkpoint["moderators"] += len(moderators)
+            self.checkpoint["history"] += len(history)
+            self.conn.execute(
+                "INSERT INTO import_checkpoint (source, moderators, history, completed, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(source) DO UPDATE SET moderators = excluded.moderators, history = excluded.history, "
+                "completed = excluded.completed, updated_at = excluded.updated_at",
+                (self.source, self.checkpoint["moderators"], self.checkpoint["history"], int(completed), int(time.time()))
+            )
+        self.written += len(moderators) + len(history)
+        self.pending = {"moderators": [], "history": []}
+        elapsed = time.perf_counter() - self.started
+        rate = self.written / elapsed if elapsed else 0
+        logger.info("%s lignes importées (%.0f lignes/s)", self.written, rate)
+
+
+def _load_checkpoint(conn, source, resume):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS import_checkpoint (
+        source TEXT PRIMARY KEY,
+        moderators INTEGER,
+        history INTEGER,
+        completed INTEGER,
+        updated_at INTEGER
+    )
+    ''')
+    row = conn.execute("SELECT moderators, history, completed FROM import_checkpoint WHERE source = ?", (source,)).fetchone()
+    if not resume or row is None:
+        return {"moderators": 0, "history": 0, "completed": False}
+    return {"moderators": row[0], "history": row[1], "completed": bool(row[2])}
+
+
+def migrate_json_to_sqlite(json_path="banData.json", db_path="moderation.db", batch_size=BATCH_SIZE,
+                           chunk_size=CHUNK_SIZE, resume=True):
+    """Migre les données du fichier JSON vers la base de données SQLite.
+
+    Le fichier est lu en flux : modérateurs et historique sont décodés un par un et
+    insérés par lots de ``batch_size`` lignes. Le nombre de lignes déjà importées est
+    enregistré avec chaque lot, ce qui permet de reprendre une migration interrompue.
+    """
     try:
         # Vérifier si le fichier JSON existe
         if not os.path.exists(json_path):
-            logger.warning(f"Le fichier {json_path} n'existe pas.")
+            logger.warning("Le fichier %s n'existe pas.", json_path)
             return False
-        
+
         # Vérifier si la base de données existe
         if not os.path.exists(db_path):
-            logger.warning(f"La base de données {db_path} n'existe pas.")
+            logger.warning("La base de données %s n'existe pas.", db_path)
             return False
-        
-        # Charger les données JSON
-        with open(json_path, 'r') as f:
-            content = f.read().strip()
-            if not content:
-                logger.warning("Le fichier JSON est vide.")
-                return False
-            ban_data = json.loads(content)
-        
+
+        if os.path.getsize(json_path) == 0:
+            logger.warning("Le fichier JSON est vide.")
+            return False
+
         # Connexion à la base de données
         conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Migrer les données des modérateurs
-        moderators_count = 0
-        for mod_id, mod_data in ban_data.get("moderators", {}).items():
-            # Vérifier si les données nécessaires sont présentes
-            if all(key in mod_data for key in ["limit", "initial_limit", "time_reset"]):
-                # Insérer ou mettre à jour le modérateur
-                cursor.execute(
-                    "INSERT OR REPLACE INTO moderators (user_id, ban_limit, initial_limit, reset_date) VALUES (?, ?, ?, ?)",
-                    (int(mod_id), mod_data["limit"], mod_data["initial_limit"], mod_data["time_reset"])
-                )
-                moderators_count += 1
-        
-        conn.commit()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        migrate(conn)
+
+        source = os.path.abspath(json_path)
+        checkpoint = _load_checkpoint(conn, source, resume)
+        if checkpoint["completed"]:
+            logger.info("%s a déjà été importé entièrement (reprise ignorée).", json_path)
+            conn.close()
+            return True
+        skip = {"moderators": checkpoint["moderators"], "history": checkpoint["history"]}
+        if skip["moderators"] or skip["history"]:
+            logger.info("Reprise de la migration : %s modérateurs et %s bans déjà importés.", skip['moderators'], skip['history'])
+
+        writer = _BatchWriter(conn, source, checkpoint, batch_size)
+        seen = {"moderators": 0, "history": 0}
+        skipped_invalid = 0
+
+        with open(json_path, 'r', encoding='utf-8') as f:
+            stream = JsonStream(f, chunk_size)
+            for key in stream.iter_keys():
+                if key == "moderators":
+                    section, entries = "moderators", (_moderator_row(mod_id, mod_data) for mod_id, mod_data in stream.iter_items())
+                elif key in HISTORY_KEYS:
+                    section, entries = "history", (_history_row(entry) for entry in stream.iter_array())
+                else:
+                    stream.value()  # section inconnue : ignorée
+                    continue
+
+                for row in entries:
+                    if row is None:
+                        skipped_invalid += 1
+                        continue
+                    seen[section] += 1
+                    if seen[section] <= skip[section]:
+                        continue  # déjà importé lors d'une exécution précédente
+                    writer.add(section, row)
+
+        writer.flush(completed=True)
         conn.close()
-        
-        logger.info(f"Migration terminée : {moderators_count} modérateurs migrés.")
+
+        logger.info(
+            "Migration terminée : %s modérateurs et %s bans dans l'export, "
+            "%s lignes importées, %s entrées incomplètes ignorées.",
+            seen['moderators'], seen['history'], writer.written, skipped_invalid,
+        )
         return True
     except Exception as e:
-        logger.error(f"Erreur lors de la migration : {e}")
+        logger.error("Erreur lors de la migration : %s", e)
         return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migre banData.json vers la base SQLite.")
+    parser.add_argument("--json", default="banData.json")
+    parser.add_argument("--db", default="moderation.db")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--no-resume", action="store_true", help="Ignorer le point de reprise et tout réimporter")
+    args = parser.parse_args()
+
     # Initialiser la base de données (au cas où)
     import init_db
-    init_db.init_database()
-    
+    init_db.init_database(args.db)
+
     # Migrer les données
-    migrate_json_to_sqlite()
-    
+    migrate_json_to_sqlite(args.json, args.db, batch_size=args.batch_size, resume=not args.no_resume)
+
     # Vérifier les données migrées
-    conn = sqlite3.connect("moderation.db")
+    conn = sqlite3.connect(args.db)
     cursor = conn.cursor()
-    
+
     cursor.execute("SELECT COUNT(*) FROM moderators")
     mod_count = cursor.fetchone()[0]
-    
-    logger.info(f"Nombre de modérateurs dans la base de données : {mod_count}")
-    
-    conn.close() 
\ No newline at end of file
+
+    logger.info("Nombre de modérateurs dans la base de données : %s", mod_count)
+
+    conn.close()
@@ -0,0 +1,36 @@
+"""Outils partagés par les tests des listeners."""
+from unittest.mock import AsyncMock, MagicMock
+from cogs.listeners.messages.pipeline import MessageDescriptor
+
+
+class FakeClock:
+    """Horloge manuelle : les tests avancent ``now`` eux-mêmes."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_descriptor(content="", message_id=1, guild_id=10, channel_id=2, author_id=42, author_name="TestUser",
+                    attachments=()):
+    """MessageDescriptor d'un faux message."""
+    return MessageDescriptor(message_id, guild_id, channel_id, author_id, author_name, content, 0.0, attachments)
+
+
+def partial_messages(bot):
+    """Branche ``bot.get_partial_messageable`` : un faux message par ID (``delete`` et ``reply`` attendables).
+
+    Retourne le dict ``{message_id: message}`` rempli au fil des appels.
+    """
+    messages = {}
+
+    def get_partial_message(message_id):
+        if message_id not in messages:
+            messages[message_id] = MagicMock(id=message_id, delete=AsyncMock(), reply=AsyncMock())
+        return messages[message_id]
+
+    bot.get_partial_messageable = MagicMock()
+    bot.get_partial_messageable.return_value.get_partial_message.side_effect = get_partial_message
+    return messages
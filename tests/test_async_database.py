@@ -0,0 +1,49 @@
+import unittest
+import os
+import threading
+from datetime import datetime, timedelta
+from cogs.database import AsyncModerationDB
+
+class TestAsyncModerationDB(unittest.IsolatedAsyncioTestCase):
+    """Tests pour la classe AsyncModerationDB."""
+
+    def setUp(self):
+        """Initialisation avant chaque test."""
+        self.db_path = "test_async_moderation.db"
+        self.db = AsyncModerationDB(self.db_path)
+
+    def tearDown(self):
+        """Nettoyage après chaque test."""
+        self.db.close()
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def test_calls_run_outside_event_loop_thread(self):
+        """Les appels sqlite3 ne doivent pas s'exécuter dans le thread de la boucle."""
+        worker_thread = await self.db._run(threading.get_ident)
+        self.assertNotEqual(worker_thread, threading.get_ident())
+
+    async def test_set_and_get_moderator_data(self):
+        """Les méthodes asynchrones conservent le comportement de ModerationDB."""
+        reset_date = (datetime.utcnow() + timedelta(days=30)).isoformat()
+
+        success = await self.db.set_moderator_data(123, 10, 5, reset_date, "TestMod")
+        result = await self.db.get_moderator_data(123)
+
+        self.assertTrue(success)
+        self.assertEqual(result["ban_limit"], 5)
+        self.assertEqual(result["initial_limit"], 10)
+        self.assertEqual(result["username"], "TestMod")
+
+    async def test_add_ban_to_history(self):
+        """Test de l'ajout asynchrone d'un bannissement à l'historique."""
+        success = await self.db.add_ban_to_history(1, 2, "TestUser", "Spam")
+        history = await self.db.get_ban_history(moderator_id=1)
+
+        self.assertTrue(success)
+        self.assertEqual(len(history), 1)
+        self.assertEqual(history[0][3], "TestUser")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import logging
+import multiprocessing
+import os
+import sys
+import types
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+
+BOT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bot.py")
+
+
+def worker_state():
+    """État d'un worker « spawn » après la réimportation de bot.py en ``__mp_main__``."""
+    main = sys.modules["__mp_main__"]
+    return {
+        "main_file": main.__file__,
+        "globals": sorted(name for name in ("bot", "log_listener", "health_server", "command_sync") if hasattr(main, name)),
+        "handlers": [type(handler).__name__ for handler in logging.getLogger().handlers],
+    }
+
+
+class TestBotImport(unittest.TestCase):
+    """Les workers du filtre d'images réimportent bot.py : l'import ne doit rien démarrer."""
+
+    def setUp(self):
+        self.db_path = "test_bot_import.db"
+
+    def tearDown(self):
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_spawned_worker_has_no_side_effects(self):
+        # Le processus principal est « python bot.py » : le worker réimporte ce fichier
+        main = types.ModuleType("__main__")
+        main.__file__ = BOT_PATH
+        with patch.dict(sys.modules, {"__main__": main}), patch.dict(os.environ, {"DB_PATH": self.db_path}):
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                state = executor.submit(worker_state).result(timeout=60)
+
+        self.assertEqual(state["main_file"], BOT_PATH)
+        self.assertEqual(state["globals"], [])
+        self.assertNotIn("LazyQueueHandler", state["handlers"])
+        self.assertFalse(os.path.exists(self.db_path))  # aucune migration
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import os
+from unittest.mock import AsyncMock, MagicMock
+import discord
+from discord import app_commands
+from cogs.command_sync import CommandTreeSync, command_tree_hash
+
+class TestCommandTreeSync(unittest.IsolatedAsyncioTestCase):
+    """Tests pour la synchronisation des commandes selon l'empreinte de l'arbre."""
+
+    def setUp(self):
+        self.state_path = "test_command_sync.json"
+        self.bot = MagicMock(application_id=42)
+        self.bot.tree = app_commands.CommandTree(discord.Client(intents=discord.Intents.default()))
+        self.bot.tree.sync = AsyncMock(side_effect=lambda guild=None: self.bot.tree.get_commands(guild=guild))
+
+        @self.bot.tree.command(name="ping", description="Répond pong.")
+        async def ping(interaction: discord.Interaction):
+            pass
+
+    def tearDown(self):
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    async def test_unchanged_tree_is_not_synced_again(self):
+        await CommandTreeSync(self.bot, self.state_path).sync()
+        result = await CommandTreeSync(self.bot, self.state_path).sync()
+
+        self.assertIsNone(result)
+        self.bot.tree.sync.assert_awaited_once_with(guild=None)
+
+    async def test_changed_tree_is_synced(self):
+        await CommandTreeSync(self.bot, self.state_path).sync()
+        before = command_tree_hash(self.bot.tree)
+
+        @self.bot.tree.command(name="pong", description="Répond ping.")
+        async def pong(interaction: discord.Interaction):
+            pass
+
+        self.assertNotEqual(command_tree_hash(self.bot.tree), before)
+        await CommandTreeSync(self.bot, self.state_path).sync()
+        self.assertEqual(self.bot.tree.sync.await_count, 2)
+
+    async def test_on_ready_syncs_once_per_process(self):
+        sync = CommandTreeSync(self.bot, self.state_path, dev_guild_id=123)
+
+        await sync.on_ready()
+        os.remove(self.state_path)
+        await sync.on_ready()  # reconnexion
+
+        self.bot.tree.sync.assert_awaited_once()
+        self.assertEqual(self.bot.tree.sync.await_args.kwargs["guild"].id, 123)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,26 @@
 import unittest
-from unittest.mock import AsyncMock, MagicMock
+import asyncio
+import time
+import os
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 from discord import Member
 from cogs.commands.moderation.ban.ban_commands import BanCommands
+from cogs.commands.moderation.ban.ban_history_view import BanHistoryView
+from cogs.commands.moderation.ban.bulk_ban import bulk_ban, parse_user_ids
+from cogs.commands.moderation.ban.filter_commands import FilterCommands
 
 class TestBanCommands(unittest.IsolatedAsyncioTestCase):
+    """Les commandes passent par ``deferred`` : defer éphémère, file des commandes, puis followup."""
 
     def setUp(self):
         self.bot = AsyncMock()
-        self.db = MagicMock()
-        self.ban_commands = BanCommands(self.bot, self.db)
+        self.db = AsyncMock()
+        self.databases = MagicMock()
+        self.databases.for_guild.return_value = self.db
+        self.ban_commands = BanCommands(self.bot, self.databases)
+
+    async def asyncTearDown(self):
+        await self.ban_commands.cog_unload()
 
     async def test_ban_member_success(self):
         interaction = AsyncMock()
@@ -16,110 +28,467 @@ class TestBanCommands(unittest.IsolatedAsyncioTestCase):
         member.id = 123
         member.name = "TestUser"
         interaction.user.id = 456
-        interaction.guild.ban = AsyncMock()
         interaction.guild.me.guild_permissions.ban_members = True
-        interaction.response.send_message = AsyncMock()
-
         self.db.get_moderator_data.return_value = {"ban_limit": 1, "reset_date": None}
-        self.db.update_moderator_ban_limit = AsyncMock()
-        self.db.add_ban_to_history = AsyncMock()
+        self.db.consume_ban.return_value = {"ban_id": 1, "ban_limit": 0}
 
-        await self.ban_commands.ban_member(interaction, member)
+        await BanCommands.ban_member.callback(self.ban_commands, interaction, member)
 
-        interaction.guild.ban.assert_called_once_with(member, reason=None)
-        self.db.update_moderator_ban_limit.assert_called_once_with(456, 0)
-        self.db.add_ban_to_history.assert_called_once_with(456, 123, "TestUser", None)
-        interaction.response.send_message.assert_called_once_with("✅ TestUser a été banni.")
+        interaction.response.defer.assert_awaited_once_with(thinking=True, ephemeral=True)
+        interaction.guild.ban.assert_awaited_once_with(member, reason=None)
+        self.db.consume_ban.assert_awaited_once_with(456, 123, "TestUser", None, expires_at=None)
+        # Annonce publique dans le salon, confirmation éphémère au modérateur
+        interaction.channel.send.assert_awaited_once_with("✅ TestUser a été banni. Raison: None")
+        interaction.followup.send.assert_awaited_once_with("✅ TestUser a été banni. Raison: None", ephemeral=True)
 
     async def test_ban_member_no_permission(self):
         interaction = AsyncMock()
         member = AsyncMock(spec=Member)
         interaction.user.id = 456
         interaction.guild.me.guild_permissions.ban_members = False
-        interaction.response.send_message = AsyncMock()
+        self.db.get_moderator_data.return_value = {"ban_limit": 1, "reset_date": None}
 
-        await self.ban_commands.ban_member(interaction, member)
+        await BanCommands.ban_member.callback(self.ban_commands, interaction, member)
 
-        interaction.response.send_message.assert_called_once_with("❌ Je n'ai pas les permissions nécessaires pour bannir ce membre.")
+        interaction.guild.ban.assert_not_awaited()
+        interaction.followup.send.assert_awaited_once_with("❌ Je n'ai pas les permissions nécessaires pour bannir ce membre.", ephemeral=True)
 
     async def test_ban_member_limit_reached(self):
         interaction = AsyncMock()
         member = AsyncMock(spec=Member)
         interaction.user.id = 456
-        interaction.guild.ban = AsyncMock()
         interaction.guild.me.guild_permissions.ban_members = True
-        interaction.response.send_message = AsyncMock()
-
         self.db.get_moderator_data.return_value = {"ban_limit": 0, "reset_date": None}
 
-        await self.ban_commands.ban_member(interaction, member)
+        await BanCommands.ban_member.callback(self.ban_commands, interaction, member)
 
-        interaction.response.send_message.assert_called_once_with("❌ Vous avez atteint votre limite de bans pour cette période.")
+        interaction.guild.ban.assert_not_awaited()
+        interaction.followup.send.assert_awaited_once_with("❌ Vous avez atteint votre limite de bans pour cette période.", ephemeral=True)
 
     async def test_set_ban_success(self):
         interaction = AsyncMock()
         user = AsyncMock(spec=Member)
         user.id = 123
         user.display_name = "TestUser"
-        interaction.user.roles = [MagicMock(id=1)]  # Simulating admin role
-        interaction.response.send_message = AsyncMock()
-
+        interaction.user.roles = [MagicMock(id=1)]  # Rôle administrateur
         self.db.set_moderator_data.return_value = True
 
-        await self.ban_commands.set_ban(interaction, user, 5, 7)
+        with patch.dict(os.environ, {"ADMIN_ROLE_ID": "1"}):
+            await BanCommands.set_ban.callback(self.ban_commands, interaction, user, 5, 7)
 
-        self.db.set_moderator_data.assert_called_once_with(123, 5, 5, Any, "TestUser")
-        interaction.response.send_message.assert_called_once_with("✅ Le nombre de bans pour TestUser a été défini à 5 avec un timer de réinitialisation de 7 jours.")
+        self.db.set_moderator_data.assert_awaited_once_with(123, 5, 5, ANY, "TestUser", reset_interval_days=7)
+        interaction.followup.send.assert_awaited_once_with("✅ Le nombre de bans pour TestUser a été défini à 5 avec un timer de réinitialisation de 7 jours.", ephemeral=True)
 
     async def test_set_ban_no_permission(self):
         interaction = AsyncMock()
         user = AsyncMock(spec=Member)
-        interaction.user.roles = []  # No admin role
-        interaction.response.send_message = AsyncMock()
+        interaction.user.roles = []  # Pas de rôle administrateur
 
-        await self.ban_commands.set_ban(interaction, user, 5, 7)
+        await BanCommands.set_ban.callback(self.ban_commands, interaction, user, 5, 7)
 
-        interaction.response.send_message.assert_called_once_with("❌ Vous n'avez pas la permission de définir des bans.")
+        self.db.set_moderator_data.assert_not_awaited()
+        interaction.followup.send.assert_awaited_once_with("❌ Vous n'avez pas la permission de définir des bans.", ephemeral=True)
 
     async def test_ban_history(self):
         interaction = AsyncMock()
         interaction.user.id = 456
-        interaction.response.send_message = AsyncMock()
-        self.db.get_all_ban_history.return_value = [(1, 456, 123, "TestUser", "Violation", "2023-10-01")]
+        self.db.get_ban_history_page.return_value = [(1, 456, 123, "TestUser", "Violation", "2023-10-01")]
 
-        await self.ban_commands.ban_history(interaction)
+        await BanCommands.ban_history.callback(self.ban_commands, interaction)
 
-        interaction.response.send_message.assert_called_once()
-        self.assertIn("Historique des bans :", interaction.response.send_message.call_args[0][0])
+        interaction.followup.send.assert_awaited_once()
+        self.assertEqual(interaction.followup.send.call_args.kwargs["embed"].title, "Historique des bans")
+        self.assertTrue(interaction.followup.send.call_args.kwargs["ephemeral"])
 
     async def test_ban_history_no_records(self):
         interaction = AsyncMock()
         interaction.user.id = 456
-        interaction.response.send_message = AsyncMock()
-        self.db.get_all_ban_history.return_value = []
+        self.db.get_ban_history_page.return_value = []
 
-        await self.ban_commands.ban_history(interaction)
+        await BanCommands.ban_history.callback(self.ban_commands, interaction)
 
-        interaction.response.send_message.assert_called_once_with("❌ Aucun historique de bans trouvé.")
+        interaction.followup.send.assert_awaited_once_with("❌ Aucun historique de bans trouvé.", ephemeral=True)
 
     async def test_ban_limits(self):
         interaction = AsyncMock()
-        interaction.response.send_message = AsyncMock()
         self.db.get_all_moderators_with_ban_limits.return_value = [("TestUser", 5, "2023-10-01T00:00:00")]
 
-        await self.ban_commands.ban_limits(interaction)
+        await BanCommands.ban_limits.callback(self.ban_commands, interaction)
 
-        interaction.response.send_message.assert_called_once()
-        self.assertIn("Liste des bans restants pour les modérateurs :", interaction.response.send_message.call_args[0][0])
+        interaction.followup.send.assert_awaited_once()
+        self.assertIn("Liste des bans restants pour les modérateurs :", interaction.followup.send.call_args[0][0])
+        self.assertTrue(interaction.followup.send.call_args.kwargs["ephemeral"])
 
     async def test_ban_limits_no_moderators(self):
         interaction = AsyncMock()
-        interaction.response.send_message = AsyncMock()
         self.db.get_all_moderators_with_ban_limits.return_value = []
 
-        await self.ban_commands.ban_limits(interaction)
+        await BanCommands.ban_limits.callback(self.ban_commands, interaction)
+
+        interaction.followup.send.assert_awaited_once_with("❌ Aucun modérateur trouvé.", ephemeral=True)
+
+class TestBanCommandsAsyncDB(unittest.IsolatedAsyncioTestCase):
+    """Les commandes attendent les méthodes asynchrones de la base de données."""
+
+    def setUp(self):
+        self.bot = AsyncMock()
+        self.db = AsyncMock()
+        self.databases = MagicMock()
+        self.databases.for_guild.return_value = self.db
+        self.ban_commands = BanCommands(self.bot, self.databases)
+
+    async def asyncTearDown(self):
+        await self.ban_commands.cog_unload()
+
+    async def test_ban_member_awaits_db(self):
+        interaction = AsyncMock()
+        member = AsyncMock(spec=Member)
+        member.id = 123
+        member.name = "TestUser"
+        interaction.user.id = 456
+        interaction.guild.me.guild_permissions.ban_members = True
+        self.db.get_moderator_data.return_value = {"ban_limit": 2, "reset_date": None}
+        self.db.consume_ban.return_value = {"ban_id": 1, "ban_limit": 1}
+
+        await BanCommands.ban_member.callback(self.ban_commands, interaction, member)
+
+        self.databases.for_guild.assert_called_with(interaction.guild.id)
+        self.db.get_moderator_data.assert_awaited_once_with(456)
+        self.db.consume_ban.assert_awaited_once_with(456, 123, "TestUser", None, expires_at=None)
+        self.db.update_moderator_ban_limit.assert_not_awaited()
+        interaction.guild.ban.assert_awaited_once_with(member, reason=None)
+
+    async def test_ban_member_quota_consumed_concurrently(self):
+        quota = {"ban_limit": 1}
+
+        async def get_moderator_data(user_id):
+            return dict(quota)
+
+        async def consume_ban(*args, **kwargs):
+            quota["ban_limit"] -= 1
+            return {"ban_id": 1, "ban_limit": quota["ban_limit"]}
+
+        self.db.get_moderator_data.side_effect = get_moderator_data
+        self.db.consume_ban.side_effect = consume_ban
+        interaction = AsyncMock()
+        interaction.user.id = 456
+        interaction.guild.id = 789
+        interaction.guild.me.guild_permissions.ban_members = True
+        interactions = [interaction, AsyncMock(user=interaction.user, guild=interaction.guild)]
+
+        await asyncio.gather(*(BanCommands.ban_member.callback(self.ban_commands, i, AsyncMock(spec=Member)) for i in interactions))
+
+        self.assertEqual(interaction.guild.ban.await_count, 1)
+        self.assertEqual(quota["ban_limit"], 0)
+        interactions[1].followup.send.assert_awaited_once_with("❌ Vous avez atteint votre limite de bans pour cette période.", ephemeral=True)
+
+    async def test_ban_member_quota_untouched_on_discord_error(self):
+        interaction = AsyncMock()
+        member = AsyncMock(spec=Member)
+        member.id = 123
+        member.name = "TestUser"
+        interaction.user.id = 456
+        interaction.guild.me.guild_permissions.ban_members = True
+        interaction.guild.ban.side_effect = RuntimeError("boom")
+        self.db.get_moderator_data.return_value = {"ban_limit": 1, "reset_date": None}
+
+        await BanCommands.ban_member.callback(self.ban_commands, interaction, member)
+
+        self.db.consume_ban.assert_not_awaited()
+        interaction.followup.send.assert_awaited_once_with("❌ Une erreur inattendue est survenue.", ephemeral=True)
+
+    async def test_ban_member_with_duration_schedules_unban(self):
+        interaction = AsyncMock()
+        member = AsyncMock(spec=Member)
+        member.id = 123
+        member.name = "TestUser"
+        interaction.user.id = 456
+        interaction.guild.id = 789
+        interaction.guild.me.guild_permissions.ban_members = True
+        self.ban_commands.temp_bans = MagicMock()
+        self.db.get_moderator_data.return_value = {"ban_limit": 1, "reset_date": None}
+        self.db.consume_ban.return_value = {"ban_id": 5, "ban_limit": 0}
+
+        await BanCommands.ban_member.callback(self.ban_commands, interaction, member, reason="Spam", duration="2h")
+
+        expires_at = self.db.consume_ban.await_args.kwargs["expires_at"]
+        self.assertAlmostEqual(expires_at, time.time() + 7200, delta=5)
+        self.ban_commands.temp_bans.schedule.assert_called_once_with(789, 5, 123, expires_at)
+
+    async def test_ban_member_replies_privately_and_announces_success(self):
+        interaction = AsyncMock()
+        member = AsyncMock(spec=Member)
+        member.name = "TestUser"
+        interaction.guild.me.guild_permissions.ban_members = True
+        self.db.get_moderator_data.return_value = {"ban_limit": 1, "reset_date": None}
+        self.db.consume_ban.return_value = {"ban_id": 1, "ban_limit": 0}
+
+        await BanCommands.ban_member.callback(self.ban_commands, interaction, member, reason="Spam")
+
+        interaction.response.defer.assert_awaited_once_with(thinking=True, ephemeral=True)
+        interaction.channel.send.assert_awaited_once_with("✅ TestUser a été banni. Raison: Spam")
+        interaction.followup.send.assert_awaited_once_with("✅ TestUser a été banni. Raison: Spam", ephemeral=True)
+
+    async def test_ban_member_errors_are_not_announced(self):
+        interaction = AsyncMock()
+        self.db.get_moderator_data.return_value = {"ban_limit": 0, "reset_date": None}
+
+        await BanCommands.ban_member.callback(self.ban_commands, interaction, AsyncMock(spec=Member))
+
+        interaction.response.defer.assert_awaited_once_with(thinking=True, ephemeral=True)
+        interaction.channel.send.assert_not_awaited()
+
+    async def test_ban_member_rejects_invalid_duration(self):
+        interaction = AsyncMock()
+
+        await BanCommands.ban_member.callback(self.ban_commands, interaction, AsyncMock(spec=Member), duration="bientôt")
+
+        interaction.guild.ban.assert_not_awaited()
+        interaction.followup.send.assert_awaited_once_with("❌ Durée invalide. Exemples : 30m, 12h, 7d, 1d12h.", ephemeral=True)
+
+    async def test_set_ban_schedules_quota_reset(self):
+        interaction = AsyncMock()
+        user = AsyncMock(spec=Member)
+        user.id = 123
+        user.display_name = "TestMod"
+        interaction.user.roles = [MagicMock(id=0)]  # ADMIN_ROLE_ID non défini = 0
+        self.ban_commands.quota_scheduler = MagicMock()
+        self.db.set_moderator_data.return_value = True
+
+        with patch.dict(os.environ, {"ADMIN_ROLE_ID": "0"}):
+            await BanCommands.set_ban.callback(self.ban_commands, interaction, user, 5, 7)
+
+        args, kwargs = self.db.set_moderator_data.call_args
+        self.assertEqual(args[:2], (123, 5))
+        self.assertEqual(kwargs["reset_interval_days"], 7)
+        self.ban_commands.quota_scheduler.schedule.assert_called_once_with(interaction.guild.id, 123, args[3])
+
+    async def test_set_modlog_saves_and_notifies(self):
+        interaction = AsyncMock()
+        interaction.user.roles = [MagicMock(id=0)]
+        interaction.guild.id = 1
+        channel = MagicMock()
+        channel.id = 555
+        channel.mention = "<#555>"
+        self.bot.dispatch = MagicMock()
+        self.db.set_modlog.return_value = True
+
+        with patch.dict(os.environ, {"ADMIN_ROLE_ID": "0"}):
+            await BanCommands.set_modlog.callback(self.ban_commands, interaction, channel)
+
+        self.db.set_modlog.assert_awaited_once_with(555, None)
+        self.bot.dispatch.assert_called_once_with("modlog_update", 1)
+        interaction.followup.send.assert_awaited_once_with("✅ Journal de modération envoyé vers <#555>.", ephemeral=True)
+
+    async def test_set_modlog_rejects_invalid_webhook(self):
+        interaction = AsyncMock()
+        interaction.user.roles = [MagicMock(id=0)]
+
+        with patch.dict(os.environ, {"ADMIN_ROLE_ID": "0"}):
+            await BanCommands.set_modlog.callback(self.ban_commands, interaction, None, "https://example.com/hook")
+
+        self.db.set_modlog.assert_not_awaited()
+        interaction.followup.send.assert_awaited_once_with("❌ URL de webhook invalide.", ephemeral=True)
+
+    async def test_ban_limits_awaits_db(self):
+        interaction = AsyncMock()
+        self.db.get_all_moderators_with_ban_limits.return_value = []
+
+        await BanCommands.ban_limits.callback(self.ban_commands, interaction)
+
+        self.db.get_all_moderators_with_ban_limits.assert_awaited_once()
+        interaction.followup.send.assert_awaited_once_with("❌ Aucun modérateur trouvé.", ephemeral=True)
+
+class TestFilterCommands(unittest.IsolatedAsyncioTestCase):
+    """Tests pour la gestion des termes et des images interdits."""
+
+    def setUp(self):
+        self.bot = MagicMock()
+        self.db = AsyncMock()
+        self.databases = MagicMock()
+        self.databases.for_guild.return_value = self.db
+        self.filter_commands = FilterCommands(self.bot, self.databases)
+
+    async def asyncTearDown(self):
+        await self.filter_commands.cog_unload()
+
+    async def test_add_term_notifies_filter(self):
+        interaction = AsyncMock()
+        interaction.user.roles = [MagicMock(id=0)]
+        interaction.guild.id = 1
+        self.db.add_banned_term.return_value = True
+
+        with patch.dict(os.environ, {"ADMIN_ROLE_ID": "0"}):
+            await FilterCommands.add_term.callback(self.filter_commands, interaction, "  arnaque ")
+
+        self.db.add_banned_term.assert_awaited_once_with("arnaque")
+        self.bot.dispatch.assert_called_once_with("banned_terms_update", 1)
+        interaction.followup.send.assert_awaited_once_with("✅ « arnaque » ajouté au filtre.", ephemeral=True)
+
+    async def test_remove_term_requires_admin(self):
+        interaction = AsyncMock()
+        interaction.user.roles = []
+
+        await FilterCommands.remove_term.callback(self.filter_commands, interaction, "arnaque")
+
+        self.db.remove_banned_term.assert_not_awaited()
+        self.bot.dispatch.assert_not_called()
+
+    async def test_block_image_stores_hashes(self):
+        interaction = AsyncMock()
+        interaction.user.roles = [MagicMock(id=0)]
+        interaction.guild.id = 1
+        image = MagicMock(content_type="image/png", size=100)
+        image.read = AsyncMock(return_value=b"png")
+        self.db.add_image_hash.return_value = True
+
+        with patch.dict(os.environ, {"ADMIN_ROLE_ID": "0"}), \
+                patch("cogs.commands.moderation.ban.filter_commands.hash_image", return_value=(0xAB, 0xCD)):
+            await FilterCommands.block_image.callback(self.filter_commands, interaction, image, "arnaque")
+
+        self.db.add_image_hash.assert_awaited_once_with(0xAB, 0xCD, "arnaque")
+        self.bot.dispatch.assert_called_once_with("image_hashes_update", 1)
+        interaction.followup.send.assert_awaited_once_with("✅ Image interdite (empreinte `00000000000000ab`).", ephemeral=True)
+
+    async def test_unblock_image_rejects_invalid_hash(self):
+        interaction = AsyncMock()
+        interaction.user.roles = [MagicMock(id=0)]
+
+        with patch.dict(os.environ, {"ADMIN_ROLE_ID": "0"}):
+            await FilterCommands.unblock_image.callback(self.filter_commands, interaction, "pas-hexa")
+
+        self.db.remove_image_hash.assert_not_awaited()
+        self.bot.dispatch.assert_not_called()
+
+class TestBanHistoryView(unittest.IsolatedAsyncioTestCase):
+    """Pagination de /banhistory."""
+
+    def setUp(self):
+        self.bot = AsyncMock()
+        self.db = AsyncMock()
+        self.databases = MagicMock()
+        self.databases.for_guild.return_value = self.db
+        self.ban_commands = BanCommands(self.bot, self.databases)
+        self.records = [(i, 456, 1000 + i, f"user{i}", "Spam", 1696161600) for i in range(12, 0, -1)]
+
+        async def get_page(moderator_id, before_id, limit):
+            rows = [r for r in self.records if before_id is None or r[0] < before_id]
+            return rows[:limit]
+
+        self.db.get_ban_history_page.side_effect = get_page
+
+    async def asyncTearDown(self):
+        await self.ban_commands.cog_unload()
+
+    async def test_ban_history_sends_first_page(self):
+        interaction = AsyncMock()
+        interaction.user.id = 456
+
+        await BanCommands.ban_history.callback(self.ban_commands, interaction)
+
+        kwargs = interaction.followup.send.call_args.kwargs
+        self.assertEqual(len(kwargs["embed"].fields), 10)
+        self.assertFalse(kwargs["view"].next_page.disabled)
+        self.assertTrue(kwargs["view"].previous_page.disabled)
+        self.db.get_ban_history_page.assert_awaited_once_with(None, None, 11)
+
+    async def test_ban_history_no_records_paginated(self):
+        interaction = AsyncMock()
+        self.records = []
+
+        await BanCommands.ban_history.callback(self.ban_commands, interaction)
+
+        interaction.followup.send.assert_awaited_once_with("❌ Aucun historique de bans trouvé.", ephemeral=True)
+
+    async def test_next_and_previous_fetch_lazily(self):
+        view = BanHistoryView(self.db, author_id=456)
+        await view.load_page()
+        click = AsyncMock()
+
+        await view.next_page.callback(click)
+        self.assertEqual([r[0] for r in view.records], [2, 1])
+        self.assertTrue(view.next_page.disabled)
+        self.db.get_ban_history_page.assert_awaited_with(None, 3, 11)
+
+        await view.previous_page.callback(click)
+        self.assertEqual(view.records[0][0], 12)
+        self.assertEqual(view.page_number, 1)
+
+class TestMassBan(unittest.IsolatedAsyncioTestCase):
+    """Tests pour /massban et le bannissement groupé."""
+
+    def setUp(self):
+        self.bot = AsyncMock()
+        self.db = AsyncMock()
+        self.databases = MagicMock()
+        self.databases.for_guild.return_value = self.db
+        self.ban_commands = BanCommands(self.bot, self.databases)
+        self.ids = [100000000000000000 + i for i in range(250)]
+
+    async def asyncTearDown(self):
+        await self.ban_commands.cog_unload()
+
+    def test_parse_user_ids(self):
+        text = "111111111111111111, <@222222222222222222>\n111111111111111111 12345 3333333333333333333333"
+
+        self.assertEqual(parse_user_ids(text), [111111111111111111, 222222222222222222])
+
+    async def test_bulk_ban_chunks_and_counts_confirmed_bans_only(self):
+        guild = MagicMock()
+        guild.get_member.return_value = None
+
+        async def fake_bulk_ban(users, reason=None):
+            ids = [user.id for user in users]
+            return MagicMock(banned=[MagicMock(id=user_id) for user_id in ids[1:]])
+
+        guild.bulk_ban = AsyncMock(side_effect=fake_bulk_ban)
+        self.db.get_moderator_data.return_value = {"ban_limit": 250}
+
+        banned, failed = await bulk_ban(guild, self.db, self.ban_commands.dispatcher, 456, self.ids, "Raid")
+
+        self.assertEqual(guild.bulk_ban.await_count, 2)
+        self.assertEqual(len(guild.bulk_ban.await_args_list[0].args[0]), 200)
+        self.assertEqual(failed, [self.ids[0], self.ids[200]])
+        self.assertEqual(len(banned), 248)
+        self.db.consume_bans.assert_awaited_once()  # une seule transaction pour toute la commande
+        self.assertEqual([ban[0] for ban in self.db.consume_bans.await_args.args[1]], banned)
+
+    async def test_bulk_ban_failed_chunk_is_not_counted(self):
+        guild = MagicMock()
+        guild.get_member.return_value = None
+        guild.bulk_ban = AsyncMock(side_effect=[MagicMock(banned=[MagicMock(id=user_id) for user_id in self.ids[:200]]),
+                                                RuntimeError("erreur")])
+        self.db.get_moderator_data.return_value = {"ban_limit": 250}
+
+        banned, failed = await bulk_ban(guild, self.db, self.ban_commands.dispatcher, 456, self.ids, "Raid")
+
+        self.assertEqual((banned, failed), (self.ids[:200], self.ids[200:]))
+        self.db.consume_bans.assert_awaited_once()
+        self.assertEqual(len(self.db.consume_bans.await_args.args[1]), 200)
+
+    async def test_massban_refuses_when_quota_too_low(self):
+        interaction = AsyncMock()
+        interaction.user.id = 456
+        self.db.get_moderator_data.return_value = {"ban_limit": 2, "reset_date": None}
+
+        await BanCommands.mass_ban.callback(self.ban_commands, interaction, " ".join(map(str, self.ids[:3])))
+
+        self.db.consume_bans.assert_not_awaited()
+        interaction.followup.send.assert_awaited_once_with(
+            "❌ Quota insuffisant : 3 bannissement(s) demandé(s), 2 restant(s).", ephemeral=True)
+
+    async def test_massban_reports_results(self):
+        interaction = AsyncMock()
+        interaction.user.id = 456
+        self.db.get_moderator_data.return_value = {"ban_limit": 5, "reset_date": None}
+
+        with patch("cogs.commands.moderation.ban.ban_commands.bulk_ban", AsyncMock(return_value=(self.ids[:2], self.ids[2:3]))):
+            await BanCommands.mass_ban.callback(self.ban_commands, interaction, " ".join(map(str, self.ids[:3])), "Raid")
 
-        interaction.response.send_message.assert_called_once_with("❌ Aucun modérateur trouvé.")
+        interaction.response.defer.assert_awaited_once()
+        report = interaction.followup.send.await_args.args[0]
+        self.assertIn("2 utilisateur(s) banni(s)", report)
+        self.assertIn(str(self.ids[2]), report)
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
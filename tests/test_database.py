@@ -1,6 +1,7 @@
 import unittest
 import sqlite3
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from cogs.database.database import ModerationDB
 
@@ -18,9 +19,11 @@ class TestModerationDB(unittest.TestCase):
     
     def tearDown(self):
         """Nettoyage après chaque test."""
-        # Supprimer le fichier de base de données temporaire
-        if os.path.exists(self.db_path):
-            os.remove(self.db_path)
+        # Fermer les connexions persistantes puis supprimer les fichiers temporaires
+        self.db.close()
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
     
     def test_set_moderator_data(self):
         """Test de la méthode set_moderator_data."""
@@ -105,5 +108,167 @@ class TestModerationDB(unittest.TestCase):
     
     # Ajoutez d'autres tests pour les méthodes restantes...
 
+class TestConnectionPool(unittest.TestCase):
+    """Tests pour le pool de connexions persistantes de ModerationDB."""
+
+    def setUp(self):
+        self.db_path = "test_pool.db"
+        self.db = ModerationDB(self.db_path, pool_size=2, mmap_size=1024 * 1024, cache_size=-2000)
+
+    def tearDown(self):
+        self.db.close()
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_pragmas_are_applied(self):
+        """Les pragmas WAL, synchronous, mmap_size et cache_size sont appliqués."""
+        with self.db._pool.connection() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+            self.assertEqual(conn.execute("PRAGMA mmap_size").fetchone()[0], 1024 * 1024)
+            self.assertEqual(conn.execute("PRAGMA cache_size").fetchone()[0], -2000)
+
+    def test_connection_is_reused(self):
+        """Les appels successifs réutilisent la même connexion."""
+        with self.db._pool.connection() as first:
+            pass
+        self.db.get_moderator_data(1)
+        self.db.add_ban_to_history(1, 2, "TestUser", "Spam")
+        with self.db._pool.connection() as second:
+            pass
+
+        self.assertIs(first, second)
+        self.assertEqual(len(self.db._pool._connections), 1)
+
+    def test_failed_write_is_rolled_back(self):
+        """Une erreur dans une transaction ne laisse pas la connexion dans un état sale."""
+        with self.assertRaises(sqlite3.OperationalError):
+            with self.db._pool.connection() as conn:
+                conn.execute("INSERT INTO moderators (user_id, ban_limit) VALUES (1, 5)")
+                conn.execute("INSERT INTO missing_table VALUES (1)")
+
+        self.assertIsNone(self.db.get_moderator_data(1))
+
+class TestConsumeBan(unittest.TestCase):
+    """Tests pour la comptabilisation atomique des bans."""
+
+    def setUp(self):
+        self.db_path = "test_consume_ban.db"
+        self.db = ModerationDB(self.db_path)
+        reset_date = (datetime.utcnow() + timedelta(days=30)).isoformat()
+        self.db.set_moderator_data(1, 3, 3, reset_date, "TestMod")
+
+    def tearDown(self):
+        self.db.close()
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_consume_ban_decrements_and_records(self):
+        """Le quota est décrémenté et l'historique enregistré ensemble."""
+        result = self.db.consume_ban(1, 42, "TestUser", "Spam")
+
+        self.assertEqual(result["ban_limit"], 2)
+        self.assertEqual(self.db.get_moderator_data(1)["ban_limit"], 2)
+        history = self.db.get_ban_history(moderator_id=1)
+        self.assertEqual(len(history), 1)
+        self.assertEqual(history[0][0], result["ban_id"])
+
+    def test_consume_ban_refuses_when_exhausted(self):
+        """Aucun historique n'est écrit quand le quota est épuisé."""
+        self.db.update_moderator_ban_limit(1, 0)
+
+        self.assertIsNone(self.db.consume_ban(1, 42, "TestUser", None))
+        self.assertEqual(self.db.get_ban_history(moderator_id=1), [])
+
+    def test_consume_ban_under_burst(self):
+        """Des /ban simultanés ne dépassent jamais le quota."""
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda i: self.db.consume_ban(1, i, f"user{i}", None), range(20)))
+
+        self.assertEqual(sum(result is not None for result in results), 3)
+        self.assertEqual(self.db.get_moderator_data(1)["ban_limit"], 0)
+        self.assertEqual(len(self.db.get_ban_history(moderator_id=1)), 3)
+
+    def test_consume_bans_reserves_whole_batch(self):
+        """consume_bans réserve tout le lot ou rien."""
+        self.assertIsNone(self.db.consume_bans(1, [(i, f"user{i}", None) for i in range(4)]))
+        self.assertEqual(self.db.get_ban_history(moderator_id=1), [])
+
+        result = self.db.consume_bans(1, [(i, f"user{i}", "Raid") for i in range(3)])
+
+        self.assertEqual(result["ban_limit"], 0)
+        self.assertEqual(len(result["ban_ids"]), 3)
+        self.assertEqual(self.db.get_moderator_data(1)["ban_limit"], 0)
+
+    def test_guild_settings_modlog(self):
+        """set_modlog enregistre la destination du journal de modération du serveur."""
+        self.assertEqual(self.db.get_guild_settings(), {})
+
+        self.assertTrue(self.db.set_modlog(channel_id=555))
+        self.assertEqual(self.db.get_guild_settings(), {"modlog_channel_id": 555, "modlog_webhook_url": None})
+
+        self.assertTrue(self.db.set_modlog(webhook_url="https://discord.com/api/webhooks/1/abc"))
+        self.assertEqual(self.db.get_guild_settings()["modlog_channel_id"], None)
+
+    def test_banned_terms(self):
+        """Les termes interdits sont ajoutés et retirés une seule fois."""
+        self.assertTrue(self.db.add_banned_term("spam"))
+        self.assertFalse(self.db.add_banned_term("spam"))
+        self.assertTrue(self.db.add_banned_term("arnaque"))
+        self.assertEqual(self.db.get_banned_terms(), ["arnaque", "spam"])
+
+        self.assertTrue(self.db.remove_banned_term("spam"))
+        self.assertFalse(self.db.remove_banned_term("spam"))
+        self.assertEqual(self.db.get_banned_terms(), ["arnaque"])
+
+    def test_image_hashes(self):
+        """Les empreintes 64 bits sont conservées intégralement (au-delà d'un entier signé)."""
+        phash = 0xFFFF_0000_1234_ABCD
+        self.assertTrue(self.db.add_image_hash(phash, 0x0F, "choc"))
+        self.assertFalse(self.db.add_image_hash(phash, 0x0F, "choc"))
+        self.assertEqual(self.db.get_image_hashes(), [(phash, 0x0F, "choc")])
+
+        self.assertTrue(self.db.remove_image_hash(phash))
+        self.assertFalse(self.db.remove_image_hash(phash))
+        self.assertEqual(self.db.get_image_hashes(), [])
+
+class TestBanHistoryPage(unittest.TestCase):
+    """Tests pour la pagination par clé de l'historique."""
+
+    def setUp(self):
+        self.db_path = "test_history_page.db"
+        self.db = ModerationDB(self.db_path)
+        for i in range(25):
+            self.db.add_ban_to_history(1 if i % 2 else 2, 1000 + i, f"user{i}", None)
+
+    def tearDown(self):
+        self.db.close()
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_pages_follow_each_other(self):
+        """Les pages successives couvrent tout l'historique sans doublon."""
+        seen = []
+        before_id = None
+        while True:
+            page = self.db.get_ban_history_page(before_id=before_id, limit=10)
+            if not page:
+                break
+            seen.extend(record[0] for record in page)
+            before_id = page[-1][0]
+
+        self.assertEqual(seen, list(range(25, 0, -1)))
+
+    def test_page_filtered_by_moderator(self):
+        """Le filtre par modérateur est appliqué avant la limite."""
+        page = self.db.get_ban_history_page(moderator_id=1, limit=5)
+
+        self.assertEqual(len(page), 5)
+        self.assertTrue(all(record[1] == 1 for record in page))
+        self.assertEqual([record[0] for record in page], [24, 22, 20, 18, 16])
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,96 @@
+import unittest
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+import discord
+from cogs.commands.moderation.ban.dispatcher import BanDispatcher, GLOBAL_BUCKET
+
+def http_error(status, headers=None):
+    """Construit une HTTPException discord.py avec le statut et les en-têtes donnés."""
+    response = MagicMock(status=status, reason="", headers=headers or {})
+    return discord.HTTPException(response, "erreur")
+
+class TestBanDispatcher(unittest.IsolatedAsyncioTestCase):
+    """Tests pour l'envoi des bans avec prise en compte des rate limits."""
+
+    async def asyncSetUp(self):
+        self.now = 0.0
+        self.sleeps = []
+
+        async def fake_sleep(delay):
+            self.sleeps.append(round(delay, 2))
+            self.now += delay
+
+        self.dispatcher = BanDispatcher(clock=lambda: self.now, sleep=fake_sleep)
+        self.guild = MagicMock(id=1)
+
+    async def asyncTearDown(self):
+        await self.dispatcher.close()
+
+    async def test_429_blocks_bucket_then_retries(self):
+        self.guild.ban = AsyncMock(side_effect=[http_error(429, {"Retry-After": "2.5"}), None])
+
+        await self.dispatcher.ban(self.guild, MagicMock(), reason="Spam")
+
+        self.assertEqual(self.guild.ban.await_count, 2)
+        self.assertEqual(self.sleeps, [2.5])
+        self.assertEqual(self.dispatcher.stats()[1]["rate_limited"], 1)
+
+    async def test_global_rate_limit_blocks_every_guild(self):
+        self.guild.ban = AsyncMock(side_effect=[http_error(429, {"Retry-After": "1", "X-RateLimit-Global": "true"}), None])
+
+        await self.dispatcher.ban(self.guild, MagicMock())
+
+        self.assertEqual(self.dispatcher.buckets.delay(2), 0)
+        self.assertEqual(self.dispatcher.buckets._blocked_until[GLOBAL_BUCKET], 1.0)
+
+    async def test_server_errors_back_off_and_give_up(self):
+        self.guild.ban = AsyncMock(side_effect=http_error(503))
+
+        with self.assertRaises(discord.HTTPException):
+            await self.dispatcher.ban(self.guild, MagicMock())
+
+        self.assertEqual(self.guild.ban.await_count, self.dispatcher.max_attempts)
+        self.assertEqual(len(self.sleeps), self.dispatcher.max_attempts - 1)
+
+    async def test_permanent_errors_are_not_retried(self):
+        self.guild.ban = AsyncMock(side_effect=http_error(403))
+
+        with self.assertRaises(discord.HTTPException):
+            await self.dispatcher.ban(self.guild, MagicMock())
+
+        self.assertEqual(self.guild.ban.await_count, 1)
+
+    async def test_full_queue_applies_backpressure(self):
+        dispatcher = BanDispatcher(queue_size=1, concurrency=1)
+        release = asyncio.Event()
+
+        async def slow_ban(user, reason=None):
+            await release.wait()
+
+        self.guild.ban = AsyncMock(side_effect=slow_ban)
+        calls = [asyncio.create_task(dispatcher.ban(self.guild, MagicMock())) for _ in range(3)]
+        await asyncio.sleep(0.01)
+
+        # un ban en cours, un en file, le troisième attend de pouvoir entrer dans la file
+        self.assertEqual(dispatcher.stats()[1]["queued"], 1)
+        release.set()
+        await asyncio.gather(*calls)
+        self.assertEqual(self.guild.ban.await_count, 3)
+        await dispatcher.close()
+
+    async def test_moderator_lock_serializes_then_is_evicted(self):
+        order = []
+
+        async def hold(name):
+            async with self.dispatcher.moderator_lock(1, 456):
+                order.append(f"{name}+")
+                await asyncio.sleep(0)
+                order.append(f"{name}-")
+
+        await asyncio.gather(hold("a"), hold("b"))
+
+        self.assertEqual(order, ["a+", "a-", "b+", "b-"])
+        self.assertEqual(self.dispatcher._moderator_locks, {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+from cogs.listeners.messages.flood import FloodDetector, FloodGuard, FLOOD_REASON
+from helpers import FakeClock, make_descriptor, partial_messages
+
+
+
+class TestFloodDetector(unittest.TestCase):
+    """Tests pour les seaux à jetons de détection du flood."""
+
+    def test_burst_then_refill(self):
+        detector = FloodDetector(capacity=3, rate=1.0)
+
+        self.assertEqual([detector.hit("a", now=0.0) for _ in range(4)], [False, False, False, True])
+        # Un jeton revient par seconde
+        self.assertFalse(detector.hit("a", now=1.0))
+        self.assertTrue(detector.hit("a", now=1.0))
+
+    def test_keys_are_independent(self):
+        detector = FloodDetector(capacity=1, rate=1.0)
+
+        self.assertFalse(detector.hit(("g", "c1", "u"), now=0.0))
+        self.assertFalse(detector.hit(("g", "c2", "u"), now=0.0))
+        self.assertTrue(detector.hit(("g", "c1", "u"), now=0.5))
+
+    def test_idle_keys_are_freed_and_slots_reused(self):
+        detector = FloodDetector(capacity=2, rate=1.0)
+        for user in range(4):
+            detector.hit(user, now=0.0)
+
+        # Après capacity / rate secondes, les seaux sont pleins : leurs emplacements sont libérés
+        for _ in range(2):
+            detector.hit("actif", now=10.0)
+
+        self.assertEqual(detector.stats(), {"active": 1, "slots": 4})
+        # Les emplacements libérés sont réutilisés avant d'agrandir les tableaux
+        for user in range(3):
+            detector.hit(user, now=10.0)
+        self.assertEqual(detector.stats(), {"active": 4, "slots": 4})
+
+
+class TestFloodGuard(unittest.IsolatedAsyncioTestCase):
+    """Tests pour les sanctions du flood."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bot = MagicMock()
+        self.bot.user.id = 999
+        self.db = AsyncMock()
+        self.databases = MagicMock()
+        self.databases.for_guild.return_value = self.db
+        self.dispatcher = MagicMock()
+        self.dispatcher.ban = AsyncMock()
+        self.dispatcher.moderator_lock.return_value = MagicMock(__aenter__=AsyncMock(), __aexit__=AsyncMock(return_value=False))
+        self.messages = partial_messages(self.bot)
+        self.guild = self.bot.get_guild.return_value
+        self.guild.id = 1
+        self.member = self.guild.get_member.return_value
+        self.member.timeout = AsyncMock()
+
+    def descriptors(self, count):
+        return [make_descriptor("spam", message_id=message_id, guild_id=1, author_name="Spammer") for message_id in range(count)]
+
+    def guard(self, actions):
+        detector = FloodDetector(capacity=2, rate=1.0, clock=self.clock)
+        return FloodGuard(self.bot, detector, actions, self.databases, self.dispatcher, cooldown=60, clock=self.clock)
+
+    async def test_delete_and_timeout_with_cooldown(self):
+        guard = self.guard(("delete", "timeout"))
+        descriptors = self.descriptors(4)
+
+        results = [await guard(d) for d in descriptors]
+
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual(sorted(self.messages), [2, 3])
+        self.messages[2].delete.assert_awaited_once()
+        self.messages[3].delete.assert_awaited_once()
+        # Une seule exclusion pendant le délai de grâce
+        self.guild.get_member.assert_called_with(42)
+        self.member.timeout.assert_awaited_once()
+        self.assertEqual(guard.stats()["detections"], 2)
+
+    async def test_ban_consumes_bot_quota(self):
+        guard = self.guard(("ban",))
+        self.db.get_moderator_data.return_value = {"ban_limit": 3}
+        for d in self.descriptors(3):
+            await guard(d)
+
+        self.dispatcher.moderator_lock.assert_called_once_with(1, 999)
+        self.dispatcher.ban.assert_awaited_once()
+        guild, user = self.dispatcher.ban.call_args.args
+        self.assertIs(guild, self.guild)
+        self.assertEqual(user.id, 42)
+        self.assertEqual(self.dispatcher.ban.call_args.kwargs, {"reason": FLOOD_REASON})
+        self.db.consume_ban.assert_awaited_once_with(999, 42, "Spammer", FLOOD_REASON)
+
+    async def test_ban_without_quota_falls_back_to_timeout(self):
+        guard = self.guard(("ban", "timeout"))
+        self.db.get_moderator_data.return_value = {"ban_limit": 0}
+        for d in self.descriptors(3):
+            await guard(d)
+
+        self.dispatcher.ban.assert_not_awaited()
+        self.db.consume_ban.assert_not_awaited()
+        self.member.timeout.assert_awaited_once()
+
+    def test_ban_requires_quota_backend(self):
+        with self.assertRaises(ValueError):
+            FloodGuard(self.bot, actions=("ban",))
+        with self.assertRaises(ValueError):
+            FloodGuard(self.bot, actions=("kick",))
+
+
+if __name__ == "__main__":
+    unittest.main()
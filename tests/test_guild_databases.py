@@ -0,0 +1,116 @@
+import asyncio
+import unittest
+import os
+import shutil
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from cogs.database import GuildDatabases
+from cogs.database import async_database, database
+
+class TestGuildDatabases(unittest.IsolatedAsyncioTestCase):
+    """Tests pour le routage des bases de données par serveur."""
+
+    def setUp(self):
+        self.db_path = "test_guild_databases.db"
+        self.directory = "test_guild_databases"
+
+    def tearDown(self):
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    async def assert_guilds_isolated(self, databases):
+        reset_date = (datetime.utcnow() + timedelta(days=30)).isoformat()
+        guild_a, guild_b = databases.for_guild(111), databases.for_guild(222)
+
+        await guild_a.set_moderator_data(1, 5, 5, reset_date, "modA")
+        await guild_b.set_moderator_data(1, 2, 2, reset_date, "modB")
+        ban = await guild_a.consume_ban(1, 99, "TestUser", None)
+
+        self.assertIs(databases.for_guild(111), guild_a)
+        self.assertEqual(ban["ban_limit"], 4)
+        self.assertEqual((await guild_b.get_moderator_data(1))["ban_limit"], 2)
+        self.assertEqual(await guild_b.get_ban_history(), [])
+        await guild_b.consume_ban(1, 98, "OtherUser", None)
+        self.assertEqual((await guild_a.get_moderator_data(1))["ban_limit"], 4)  # le quota d'un autre serveur est intact
+        self.assertEqual(len(await guild_a.get_ban_history()), 1)
+        self.assertEqual(await databases.guild_ids(), [111, 222])
+
+    async def test_shared_file_partitions_by_guild(self):
+        """Un seul fichier : chaque serveur ne voit que ses propres lignes."""
+        databases = GuildDatabases(self.db_path)
+        try:
+            await self.assert_guilds_isolated(databases)
+        finally:
+            databases.close()
+
+    async def test_per_guild_files(self):
+        """Un fichier par serveur dans le répertoire configuré."""
+        databases = GuildDatabases(self.db_path, per_guild_files=True, directory=self.directory)
+        try:
+            await self.assert_guilds_isolated(databases)
+            self.assertTrue(os.path.exists(os.path.join(self.directory, "111.db")))
+        finally:
+            databases.close()
+
+    async def test_guild_database_opened_once_in_executor(self):
+        """``for_guild`` n'ouvre rien ; la première requête ouvre la base hors de la boucle, une seule fois."""
+        databases = GuildDatabases(self.db_path)
+        opened = []
+        real = async_database.ModerationDB
+
+        def record(*args, **kwargs):
+            opened.append(threading.get_ident())
+            return real(*args, **kwargs)
+
+        try:
+            with patch.object(async_database, "ModerationDB", side_effect=record), \
+                    patch("cogs.database.database.migrate") as migrate:
+                db = databases.for_guild(111)
+                self.assertIsNone(db.db)
+                await asyncio.gather(db.get_moderator_data(1), db.get_moderator_data(2))
+            self.assertEqual(len(opened), 1)
+            self.assertNotEqual(opened[0], threading.get_ident())
+            migrate.assert_not_called()  # le pool partagé est migré par le routeur
+        finally:
+            databases.close()
+
+    async def test_per_guild_file_created_in_executor(self):
+        """Le fichier d'un nouveau serveur est créé et migré hors de la boucle d'événements."""
+        databases = GuildDatabases(self.db_path, per_guild_files=True, directory=self.directory)
+        migrated = []
+        real = database.migrate
+
+        def record(conn):
+            migrated.append(threading.get_ident())
+            return real(conn)
+
+        try:
+            db = databases.for_guild(111)
+            self.assertFalse(os.path.exists(os.path.join(self.directory, "111.db")))
+            with patch.object(database, "migrate", side_effect=record):
+                await db.get_moderator_data(1)
+            self.assertTrue(os.path.exists(os.path.join(self.directory, "111.db")))
+            self.assertEqual(len(migrated), 1)
+            self.assertNotEqual(migrated[0], threading.get_ident())
+        finally:
+            databases.close()
+
+    async def test_legacy_guild_reads_unpartitioned_rows(self):
+        """Les données rattachées au serveur 0 sont servies au serveur désigné."""
+        legacy = GuildDatabases(self.db_path)
+        await legacy.for_guild(0).set_moderator_data(1, 5, 3, None, "mod")
+        legacy.close()
+
+        databases = GuildDatabases(self.db_path, legacy_guild_id=111)
+        try:
+            self.assertEqual((await databases.for_guild(111).get_moderator_data(1))["ban_limit"], 3)
+            self.assertIsNone(await databases.for_guild(222).get_moderator_data(1))
+            self.assertEqual(await databases.guild_ids(), [111])
+        finally:
+            databases.close()
+
+if __name__ == "__main__":
+    unittest.main()
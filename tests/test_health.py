@@ -0,0 +1,59 @@
+import unittest
+import math
+from unittest.mock import MagicMock
+from aiohttp.test_utils import TestClient, TestServer
+from cogs.health import HealthServer
+from cogs.metrics import Registry
+
+
+class TestHealthServer(unittest.IsolatedAsyncioTestCase):
+    """Tests pour les points d'accès /healthz et /metrics."""
+
+    async def asyncSetUp(self):
+        self.bot = MagicMock()
+        self.bot.latency = 0.042
+        self.bot.guilds = [MagicMock(), MagicMock()]
+        self.bot.is_ready.return_value = True
+        self.bot.is_closed.return_value = False
+        self.registry = Registry()
+        self.server = HealthServer(self.bot, registry=self.registry)
+        self.client = TestClient(TestServer(self.server.app))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    async def test_healthz_reports_gateway_state(self):
+        response = await self.client.get("/healthz")
+        body = await response.json()
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body["status"], "ok")
+        self.assertEqual(body["latency"], 0.042)
+        self.assertEqual(body["guilds"], 2)
+
+    async def test_healthz_unavailable_before_gateway_connection(self):
+        self.bot.is_ready.return_value = False
+        self.bot.latency = math.nan
+
+        response = await self.client.get("/healthz")
+        body = await response.json()
+
+        self.assertEqual(response.status, 503)
+        self.assertIsNone(body["latency"])
+
+    async def test_metrics_exports_registry(self):
+        self.registry.counter("diobot_commands_total", "Commandes", ("command", "status")).inc(command="ban", status="ok")
+
+        response = await self.client.get("/metrics")
+        text = await response.text()
+
+        self.assertEqual(response.status, 200)
+        self.assertTrue(response.headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn('diobot_commands_total{command="ban",status="ok"} 1', text)
+        self.assertIn("diobot_gateway_latency_seconds 0.042", text)
+        self.assertIn("diobot_guilds 2", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import unittest
+import io
+import random
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, call, patch
+from PIL import Image, ImageDraw, ImageEnhance
+from cogs.listeners.messages.image_filter import BKTree, ImageFilter, hash_image
+from cogs.utils import hamming
+from helpers import make_descriptor, partial_messages
+
+
+def make_image(seed, size=256):
+    """Image de test : rectangles et ellipses aléatoires mais reproductibles."""
+    rng = random.Random(seed)
+    image = Image.new("RGB", (size, size), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        box = sorted(rng.sample(range(size), 2)), sorted(rng.sample(range(size), 2))
+        shape = draw.rectangle if rng.random() < 0.5 else draw.ellipse
+        shape((box[0][0], box[1][0], box[0][1], box[1][1]), fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    return image
+
+
+def encode(image, format="PNG", **options):
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **options)
+    return buffer.getvalue()
+
+
+class TestPerceptualHashes(unittest.TestCase):
+    """Tests pour les empreintes pHash et dHash."""
+
+    def test_variants_stay_close_and_other_images_do_not(self):
+        original = make_image(1)
+        phash, dhash = hash_image(encode(original))
+        variant = ImageEnhance.Brightness(original.resize((180, 180))).enhance(1.1)
+        variant_phash, variant_dhash = hash_image(encode(variant, "JPEG", quality=70))
+        other_phash, other_dhash = hash_image(encode(make_image(2)))
+
+        self.assertLessEqual(hamming(phash, variant_phash), 8)
+        self.assertLessEqual(hamming(dhash, variant_dhash), 10)
+        self.assertGreater(hamming(phash, other_phash), 8)
+
+    def test_unreadable_image(self):
+        self.assertIsNone(hash_image(b"pas une image"))
+
+
+class TestBKTree(unittest.TestCase):
+    """Tests pour l'arbre BK."""
+
+    def test_search_matches_brute_force(self):
+        rng = random.Random(0)
+        values = [rng.getrandbits(64) for _ in range(500)]
+        tree = BKTree((value, index) for index, value in enumerate(values))
+        self.assertEqual(len(tree), len(set(values)))
+
+        for query in values[:20] + [rng.getrandbits(64) for _ in range(20)]:
+            # Voisins proches : quelques bits inversés
+            query ^= 1 << rng.randrange(64)
+            expected = sorted(value for value in values if hamming(value, query) <= 6)
+            found = sorted(value for _, value, _ in tree.search(query, 6))
+            self.assertEqual(found, expected)
+
+    def test_duplicate_value_keeps_every_payload(self):
+        tree = BKTree([(5, "a"), (5, "b")])
+
+        self.assertEqual(len(tree), 2)
+        self.assertEqual(tree.search(5, 0), [(0, 5, "a"), (0, 5, "b")])
+        self.assertEqual(BKTree().search(5, 3), [])
+
+
+class TestImageFilter(unittest.IsolatedAsyncioTestCase):
+    """Tests pour le filtre des images interdites."""
+
+    def setUp(self):
+        self.banned = make_image(1)
+        phash, dhash = hash_image(encode(self.banned))
+        self.db = AsyncMock()
+        self.db.get_image_hashes.return_value = [(phash, dhash, "choc")]
+        self.db.get_moderator_data.return_value = {"ban_limit": 5}
+        self.databases = MagicMock()
+        self.databases.for_guild.return_value = self.db
+        self.dispatcher = MagicMock()
+        self.dispatcher.ban = AsyncMock()
+        self.dispatcher.moderator_lock.return_value = MagicMock(__aenter__=AsyncMock(), __aexit__=AsyncMock(return_value=False))
+        self.bot = MagicMock()
+        self.bot.user.id = 999
+        self.messages = partial_messages(self.bot)
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.filter = ImageFilter(self.bot, self.databases, self.dispatcher, executor=self.executor)
+        self.images = {}
+
+    async def asyncTearDown(self):
+        await self.filter.cog_unload()
+
+    def descriptor(self, *images):
+        attachments = []
+        for index, image in enumerate(images):
+            url = f"https://cdn.example/{index}.png"
+            self.images[url] = encode(image)
+            attachments.append((url, "image/png", len(self.images[url])))
+        return make_descriptor(attachments=tuple(attachments))
+
+    def fetch(self, url, max_bytes):
+        return hash_image(self.images[url])
+
+    async def test_banned_image_variant_is_deleted_and_author_banned(self):
+        descriptor = self.descriptor(make_image(3), self.banned.resize((200, 200)))
+
+        with patch("cogs.listeners.messages.image_filter.fetch_and_hash", self.fetch):
+            self.assertFalse(await self.filter(descriptor))
+
+        self.messages[descriptor.id].delete.assert_awaited_once()
+        self.dispatcher.ban.assert_awaited_once()
+        self.assertEqual(self.dispatcher.ban.call_args.args[1].id, descriptor.author_id)
+        self.db.consume_ban.assert_awaited_once()
+        self.assertEqual(self.db.consume_ban.call_args.args[0], 999)
+        self.assertEqual(self.filter.stats()["matches"], 1)
+
+    async def test_other_images_pass(self):
+        descriptor = self.descriptor(make_image(3))
+
+        with patch("cogs.listeners.messages.image_filter.fetch_and_hash", self.fetch):
+            self.assertTrue(await self.filter(descriptor))
+
+        self.assertEqual(self.messages, {})
+        self.dispatcher.ban.assert_not_awaited()
+
+    async def test_no_download_without_blocklist(self):
+        self.db.get_image_hashes.return_value = []
+        fetch = MagicMock()
+
+        with patch("cogs.listeners.messages.image_filter.fetch_and_hash", fetch):
+            self.assertTrue(await self.filter(self.descriptor(self.banned)))
+
+        fetch.assert_not_called()
+
+    async def test_update_event_reloads_guild_tree(self):
+        self.db.get_image_hashes.return_value = []
+        with patch("cogs.listeners.messages.image_filter.fetch_and_hash", self.fetch):
+            self.assertTrue(await self.filter(self.descriptor(self.banned)))
+
+            self.db.get_image_hashes.return_value = [(*hash_image(encode(self.banned)), None)]
+            await self.filter.on_image_hashes_update(10)
+
+            self.assertFalse(await self.filter(self.descriptor(self.banned)))
+
+    def test_images_sharing_a_phash_are_all_checked(self):
+        tree = BKTree([(7, (0, "première")), (7, (2 ** 64 - 1, "seconde"))])
+
+        self.assertEqual(self.filter.match(tree, (7, 0)), "première")
+        self.assertEqual(self.filter.match(tree, (7, 2 ** 64 - 1)), "seconde")
+
+    async def test_close_waits_for_workers(self):
+        executor = MagicMock()
+        image_filter = ImageFilter(self.bot, self.databases, self.dispatcher, executor=executor)
+
+        await image_filter.close()
+
+        self.assertEqual(executor.shutdown.call_args_list, [call(wait=False, cancel_futures=True), call()])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import asyncio
+from unittest.mock import AsyncMock
+from cogs.commands.jobs import JobQueue, deferred
+from cogs.metrics import REGISTRY
+
+class TestJobQueue(unittest.IsolatedAsyncioTestCase):
+    """Tests pour la file de tâches des commandes de modération."""
+
+    async def asyncSetUp(self):
+        self.jobs = JobQueue(workers=2)
+
+    async def asyncTearDown(self):
+        await self.jobs.close()
+
+    async def test_concurrency_is_bounded(self):
+        running, peak = 0, 0
+
+        async def job(i):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return i
+
+        results = await asyncio.gather(*(self.jobs.run("ban", job, i) for i in range(6)))
+
+        self.assertEqual(results, list(range(6)))
+        self.assertEqual(peak, 2)
+        stats = self.jobs.stats()["ban"]
+        self.assertEqual(stats["count"], 6)
+        self.assertGreater(stats["max_wait"], 0)
+        self.assertGreater(stats["avg_run"], 0)
+
+    async def test_failures_are_counted_and_propagated(self):
+        async def job():
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            await self.jobs.run("setban", job)
+
+        self.assertEqual(self.jobs.stats()["setban"]["failures"], 1)
+
+    async def test_deferred_defers_before_running(self):
+        calls = []
+
+        class Cog:
+            jobs = self.jobs
+
+            @deferred("banlimits")
+            async def command(self, interaction):
+                calls.append(interaction.response.defer.await_count)
+                await interaction.followup.send("ok")
+
+        interaction = AsyncMock()
+        await Cog().command(interaction)
+
+        self.assertEqual(calls, [1])
+        interaction.followup.send.assert_awaited_once_with("ok")
+
+    async def test_deferred_records_metrics(self):
+        class Cog:
+            jobs = self.jobs
+
+            @deferred("metrics-ok")
+            async def ok(self, interaction):
+                pass
+
+            @deferred("metrics-error")
+            async def error(self, interaction):
+                raise RuntimeError("boom")
+
+        await Cog().ok(AsyncMock())
+        await Cog().error(AsyncMock())
+
+        durations = REGISTRY.get("diobot_command_duration_seconds")
+        errors = REGISTRY.get("diobot_command_errors_total")
+        self.assertEqual(durations.value(name="metrics-ok")["count"], 1)
+        self.assertEqual(durations.value(name="metrics-error")["count"], 1)
+        self.assertEqual(errors.value(name="metrics-ok"), 0)
+        self.assertEqual(errors.value(name="metrics-error"), 1)
+        self.assertEqual(REGISTRY.get("diobot_command_in_flight").value(name="metrics-ok"), 0)
+
+if __name__ == "__main__":
+    unittest.main()
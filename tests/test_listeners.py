@@ -3,13 +3,21 @@ from unittest.mock import AsyncMock, MagicMock
 from discord import Message, Member
 from cogs.listeners.messages.messageCreate import MessageCreate
 from cogs.listeners.messages.messageDelete import MessageDelete
+from cogs.listeners.messages.modlog import ModLog
+import cogs.commands.cog as commands_extension
+import cogs.listeners as listeners_extension
+from helpers import partial_messages
 
 class TestMessageCreateListener(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
         self.bot = AsyncMock()
+        self.messages = partial_messages(self.bot)
         self.message_create = MessageCreate(self.bot)
 
+    async def asyncTearDown(self):
+        await self.message_create.cog_unload()
+
     async def test_on_message_not_bot(self):
         interaction = AsyncMock()
         message = AsyncMock(spec=Message)
@@ -17,44 +25,145 @@ class TestMessageCreateListener(unittest.IsolatedAsyncioTestCase):
         message.author.bot = False
         message.author.name = "TestUser"
         message.content = "Test message"
-        message.reply = AsyncMock()
+        message.id = 7
 
         await self.message_create.on_message(message)
-        message.reply.assert_called_once()
+        await self.message_create.pipeline.join()
+        # Réponse via un PartialMessage : le descripteur ne garde pas le message
+        self.messages[7].reply.assert_awaited_once()
 
     async def test_on_message_is_bot(self):
         interaction = AsyncMock()
         message = AsyncMock(spec=Message)
         message.author.bot = True
-        message.reply = AsyncMock()
 
         await self.message_create.on_message(message)
-        message.reply.assert_not_called()
+        await self.message_create.pipeline.join()
+        self.assertEqual(self.messages, {})
 
 class TestMessageDeleteListener(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
-        self.bot = AsyncMock()
-        self.message_delete = MessageDelete(self.bot)
+        self.bot = MagicMock()
+        self.log_channel = AsyncMock()
+        self.bot.get_channel.return_value = self.log_channel
+        self.db = AsyncMock()
+        self.db.get_guild_settings.return_value = {"modlog_channel_id": 555, "modlog_webhook_url": None}
+        databases = MagicMock()
+        databases.for_guild.return_value = self.db
+        self.message_delete = MessageDelete(self.bot, modlog=ModLog(self.bot, databases, interval=60))
 
-    async def test_on_message_delete_not_bot(self):
-        interaction = AsyncMock()
-        message = AsyncMock(spec=Message)
-        message.author = AsyncMock(spec=Member)
+    async def asyncTearDown(self):
+        await self.message_delete.cog_unload()
+
+    def sent_embeds(self):
+        self.log_channel.send.assert_called_once()
+        return self.log_channel.send.call_args.kwargs["embeds"]
+
+    def make_message(self, message_id, content="Test message"):
+        message = MagicMock(spec=Message)
+        message.id = message_id
+        message.author = MagicMock(spec=Member)
         message.author.bot = False
-        message.author.name = "TestUser"
-        message.content = "Test message"
+        message.author.id = 42
+        message.author.__str__.return_value = "TestUser"
+        message.content = content
         message.channel.id = 123456789
-        message.id = 987654321
-        message.channel.name = "test-channel"
-        message.author.display_avatar.url = "http://example.com/avatar.png"
-        self.bot.get_channel.return_value = AsyncMock()
-        log_channel = AsyncMock()
-        log_channel.send = AsyncMock()
-        self.bot.get_channel.return_value = log_channel
-
-        await self.message_delete.on_message_delete(message)
-        log_channel.send.assert_called_once()
+        message.guild.id = 1
+        message.attachments = []
+        return message
+
+    def make_payload(self, message_id, cached_message=None):
+        payload = MagicMock()
+        payload.message_id = message_id
+        payload.channel_id = 123456789
+        payload.guild_id = 1
+        payload.cached_message = cached_message
+        return payload
+
+    async def test_on_raw_message_delete_cached(self):
+        await self.message_delete.on_message(self.make_message(987654321))
+
+        await self.message_delete.on_raw_message_delete(self.make_payload(987654321))
+        await self.message_delete.modlog.flush(1)
+
+        [embed] = self.sent_embeds()
+        self.assertEqual((embed.author.name, embed.description), ("TestUser", "Test message"))
+        self.bot.get_channel.assert_called_with(555)
+        self.assertEqual(self.message_delete.cache.stats()["hits"], 1)
+        self.assertEqual(len(self.message_delete.cache), 0)
+
+    async def test_on_raw_message_delete_unknown(self):
+        await self.message_delete.on_raw_message_delete(self.make_payload(987654321))
+        await self.message_delete.modlog.flush(1)
+
+        self.log_channel.send.assert_not_called()
+        self.assertEqual(self.message_delete.cache.stats()["misses"], 1)
+
+    async def test_on_raw_message_delete_falls_back_to_discord_cache(self):
+        message = self.make_message(987654321, "Ancien message")
+
+        await self.message_delete.on_raw_message_delete(self.make_payload(987654321, message))
+        await self.message_delete.modlog.flush(1)
+
+        self.assertEqual(self.sent_embeds()[0].description, "Ancien message")
+
+    async def test_on_raw_message_edit_updates_content(self):
+        await self.message_delete.on_message(self.make_message(987654321, "avant"))
+        edit = MagicMock()
+        edit.message_id = 987654321
+        edit.data = {"content": "après"}
+
+        await self.message_delete.on_raw_message_edit(edit)
+        await self.message_delete.on_raw_message_delete(self.make_payload(987654321))
+        await self.message_delete.modlog.flush(1)
+
+        self.assertEqual(self.sent_embeds()[0].description, "après")
+
+    async def test_on_raw_bulk_message_delete(self):
+        for message_id in (1, 2):
+            await self.message_delete.on_message(self.make_message(message_id, f"message {message_id}"))
+        payload = MagicMock()
+        payload.message_ids = {1, 2, 3}
+        payload.channel_id = 123456789
+        payload.guild_id = 1
+        payload.cached_messages = []
+
+        await self.message_delete.on_raw_bulk_message_delete(payload)
+        await self.message_delete.modlog.flush(1)
+
+        # Une seule publication pour toute la suppression en masse
+        self.assertEqual([embed.description for embed in self.sent_embeds()], ["message 1", "message 2"])
+
+    async def test_on_modlog_update_invalidates_destination(self):
+        await self.message_delete.modlog.destination(1)
+
+        await self.message_delete.on_modlog_update(1)
+        await self.message_delete.modlog.destination(1)
+
+        self.assertEqual(self.db.get_guild_settings.await_count, 2)
+
+
+class TestExtensionsShareServices(unittest.IsolatedAsyncioTestCase):
+    """Les commandes et les listeners utilisent les bases et le dispatcher du bot."""
+
+    async def test_setups_use_bot_services(self):
+        bot = MagicMock()
+        bot.add_cog = AsyncMock()
+        await commands_extension.setup(bot)
+        await listeners_extension.setup(bot)
+        cogs = [call.args[0] for call in bot.add_cog.call_args_list]
+        try:
+            for cog in cogs:
+                if hasattr(cog, "databases"):
+                    self.assertIs(cog.databases, bot.databases, type(cog).__name__)
+                if hasattr(cog, "dispatcher"):
+                    self.assertIs(cog.dispatcher, bot.dispatcher, type(cog).__name__)
+            self.assertIn("MemberJoin", [type(cog).__name__ for cog in cogs])
+        finally:
+            for cog in cogs:
+                if hasattr(cog, "cog_unload"):
+                    await cog.cog_unload()
 
 if __name__ == "__main__":
     unittest.main()
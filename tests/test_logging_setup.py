@@ -0,0 +1,140 @@
+import asyncio
+import io
+import json
+import logging
+import threading
+import unittest
+from cogs.logging_setup import (ContextFilter, JsonFormatter, SamplingFilter, current_context, log_context,
+                                setup_logging)
+
+
+class Expensive:
+    """Argument de log qui compte ses mises en forme."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "cher"
+
+
+class TestLoggingSetup(unittest.TestCase):
+    """Tests pour les logs en file, au format JSON, avec contexte et échantillonnage."""
+
+    def setUp(self):
+        root = logging.getLogger()
+        self.saved = (list(root.handlers), root.level)
+        self.stream = io.StringIO()
+        self.listener = None
+
+    def tearDown(self):
+        if self.listener is not None:
+            self.listener.stop()
+        root = logging.getLogger()
+        root.handlers[:] = self.saved[0]
+        root.setLevel(self.saved[1])
+
+    def start(self, **kwargs):
+        self.listener = setup_logging(stream=self.stream, **kwargs)
+
+    def lines(self):
+        self.listener.stop()
+        self.listener = None
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_json_output_with_context(self):
+        self.start()
+        with log_context(guild_id=1, user_id=2, command="ban"):
+            logging.getLogger("cogs.test").info("Membre %s banni", "Alice")
+        logging.getLogger("cogs.test").info("Hors contexte")
+
+        first, second = self.lines()
+        self.assertEqual(first["message"], "Membre Alice banni")
+        self.assertEqual(first["level"], "INFO")
+        self.assertEqual(first["logger"], "cogs.test")
+        self.assertEqual((first["guild_id"], first["user_id"], first["command"]), (1, 2, "ban"))
+        self.assertNotIn("guild_id", second)
+
+    def test_exception_is_serialized(self):
+        self.start()
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("cogs.test").exception("Échec")
+
+        (entry,) = self.lines()
+        self.assertIn("ValueError: boom", entry["exception"])
+
+    def test_written_by_background_thread(self):
+        threads = []
+
+        class Recorder(logging.Handler):
+            def emit(self, record):
+                threads.append(threading.current_thread())
+
+        self.start()
+        self.listener.handlers = (Recorder(),)
+        logging.getLogger("cogs.test").warning("Message")
+        self.listener.stop()
+        self.listener = None
+
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    def test_sampled_out_records_are_not_formatted(self):
+        sampling = SamplingFilter({"cogs.listeners": 0.0})
+        self.start(sampling=sampling)
+        expensive = Expensive()
+        logging.getLogger("cogs.listeners.messages").info("Message %s", expensive)
+        logging.getLogger("cogs.listeners.messages").warning("Alerte %s", expensive)
+        logging.getLogger("cogs.commands").info("Commande")
+
+        self.assertEqual([entry["message"] for entry in self.lines()], ["Alerte cher", "Commande"])
+        self.assertEqual(expensive.calls, 1)
+        self.assertEqual(sampling.dropped, 1)
+
+    def test_sampling_rate_uses_closest_parent(self):
+        draws = iter([0.05, 0.5])
+        sampling = SamplingFilter({"cogs": 0.5, "cogs.listeners.messages": 0.1}, random=lambda: next(draws))
+
+        self.assertEqual(sampling.rate("cogs.listeners.messages.flood"), 0.1)
+        self.assertEqual(sampling.rate("cogs.commands"), 0.5)
+        self.assertEqual(sampling.rate("bot"), 1.0)
+        record = logging.LogRecord("cogs.listeners.messages.flood", logging.DEBUG, "", 0, "m", (), None)
+        self.assertTrue(sampling.filter(record))
+        self.assertFalse(sampling.filter(record))
+
+    def test_parse_sampling_spec(self):
+        sampling = SamplingFilter.parse("cogs.listeners.messages=0.1, discord=0.5")
+
+        self.assertEqual(sampling.rates, {"cogs.listeners.messages": 0.1, "discord": 0.5})
+        self.assertIsNone(SamplingFilter.parse(""))
+        self.assertIsNone(SamplingFilter.parse(None))
+
+    def test_context_follows_tasks(self):
+        async def job(guild_id):
+            with log_context(guild_id=guild_id):
+                await asyncio.sleep(0)
+                return current_context()["guild_id"]
+
+        async def scenario():
+            return await asyncio.gather(job(1), job(2))
+
+        self.assertEqual(asyncio.run(scenario()), [1, 2])
+        self.assertIsNone(current_context()["guild_id"])
+
+    def test_context_filter_and_formatter(self):
+        record = logging.LogRecord("cogs.test", logging.INFO, "", 0, "Message", (), None)
+        record.channel_id = 3
+        with log_context(command="kick"):
+            ContextFilter().filter(record)
+
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry["command"], "kick")
+        self.assertEqual(entry["channel_id"], 3)
+        self.assertNotIn("guild_id", entry)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
+import discord
+from cogs.listeners.members.memberJoin import JoinWindow, MemberJoin, LOCKDOWN_REASON
+from helpers import FakeClock
+
+
+
+class TestJoinWindow(unittest.TestCase):
+    """Tests pour la fenêtre glissante des arrivées."""
+
+    def test_counts_expire_after_window(self):
+        window = JoinWindow(window=10, edges=(3600, 86400))
+        window.add(0, 60)
+        window.add(5, 7200)
+        window.add(9, 10 ** 6)
+
+        self.assertEqual(window.count(9), 3)
+        self.assertEqual(window.histogram(), [(3600, 1), (86400, 1), (None, 1)])
+        self.assertEqual(window.count(10), 2)
+        self.assertEqual(window.count(100), 0)
+
+    def test_count_younger_than(self):
+        window = JoinWindow(window=10, edges=(3600, 86400))
+        for age in (10, 4000, 86400, 10 ** 6):
+            window.add(1, age)
+
+        self.assertEqual(window.count_younger_than(3600), 1)
+        self.assertEqual(window.count_younger_than(86400), 2)
+
+
+class TestMemberJoin(unittest.IsolatedAsyncioTestCase):
+    """Tests pour la détection des raids d'arrivées."""
+
+    def setUp(self):
+        self.clock = FakeClock(1000.0)
+        self.bot = MagicMock()
+        self.bot.user.id = 999
+        self.guild = MagicMock()
+        self.guild.id = 1
+        self.dispatcher = MagicMock()
+        self.dispatcher.kick = AsyncMock()
+        self.modlog = MagicMock()
+        self.modlog.report = AsyncMock()
+        self.next_id = 100
+
+    def member(self, age_days):
+        member = MagicMock()
+        member.bot = False
+        member.guild = self.guild
+        member.id = self.next_id
+        self.next_id += 1
+        member.created_at = discord.utils.utcnow() - timedelta(days=age_days)
+        return member
+
+    def cog(self, **kwargs):
+        options = dict(dispatcher=self.dispatcher, modlog=self.modlog, join_threshold=5,
+                       new_account_share=0.5, batch_interval=0.01, clock=self.clock)
+        options.update(kwargs)
+        return MemberJoin(self.bot, **options)
+
+    async def test_old_accounts_do_not_trigger_lockdown(self):
+        cog = self.cog()
+        for _ in range(10):
+            await cog.on_member_join(self.member(age_days=400))
+
+        self.assertFalse(cog.in_lockdown(1))
+        self.modlog.report.assert_not_awaited()
+
+    async def test_lockdown_kicks_recent_accounts_in_batches(self):
+        cog = self.cog()
+        old = self.member(age_days=400)
+        await cog.on_member_join(old)
+        recent = [self.member(age_days=0) for _ in range(6)]
+        for member in recent:
+            await cog.on_member_join(member)
+
+        self.assertTrue(cog.in_lockdown(1))
+        self.modlog.report.assert_awaited_once()
+        await asyncio.sleep(0.05)
+
+        kicked = [call.args[1] for call in self.dispatcher.kick.await_args_list]
+        # Les comptes récents arrivés avant le déclenchement sont aussi expulsés, pas l'ancien compte
+        self.assertEqual(kicked, recent)
+        self.dispatcher.kick.assert_awaited_with(self.guild, recent[-1], reason=LOCKDOWN_REASON)
+        self.assertEqual(cog.stats()["removed"], 6)
+
+    async def test_lockdown_ends_after_duration(self):
+        cog = self.cog(lockdown_duration=60)
+        for _ in range(5):
+            await cog.on_member_join(self.member(age_days=0))
+        self.assertTrue(cog.in_lockdown(1))
+
+        self.clock.now += 120
+        self.assertFalse(cog.in_lockdown(1))
+        await cog.cog_unload()
+
+    async def test_ban_action_uses_bulk_ban_with_bot_quota(self):
+        db = AsyncMock()
+        db.get_moderator_data.return_value = {"ban_limit": 100}
+        databases = MagicMock()
+        databases.for_guild.return_value = db
+        self.dispatcher.moderator_lock.return_value = MagicMock(__aenter__=AsyncMock(), __aexit__=AsyncMock(return_value=False))
+        self.dispatcher.bulk_ban = AsyncMock(side_effect=lambda guild, users, reason=None: MagicMock(banned=users, failed=[]))
+        cog = self.cog(action="ban", databases=databases, batch_size=5)
+
+        members = [self.member(age_days=0) for _ in range(5)]
+        for member in members:
+            await cog.on_member_join(member)
+        await asyncio.sleep(0.05)
+
+        self.dispatcher.bulk_ban.assert_awaited_once()
+        self.assertEqual([user.id for user in self.dispatcher.bulk_ban.call_args.args[1]], [m.id for m in members])
+        db.consume_bans.assert_awaited_once()
+        self.assertEqual(db.consume_bans.call_args.args[0], 999)
+        self.dispatcher.kick.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()
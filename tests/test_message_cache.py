@@ -0,0 +1,95 @@
+import random
+import unittest
+from cogs.listeners.messages.cache import CachedMessage, MessageCache
+
+
+def entry(message_id, channel_id=1, content="x" * 50):
+    return CachedMessage(message_id, 10, channel_id, 42, "TestUser", content)
+
+
+class TestMessageCache(unittest.TestCase):
+    """Tests pour le cache des messages borné en mémoire."""
+
+    def test_pop_hit_and_miss(self):
+        cache = MessageCache()
+        cache.add(entry(1))
+
+        self.assertEqual(cache.pop(1).content, "x" * 50)
+        self.assertIsNone(cache.pop(1))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertEqual(stats["bytes"], 0)
+
+    def test_per_channel_ring_buffer(self):
+        cache = MessageCache(max_per_channel=3)
+        for message_id in range(5):
+            cache.add(entry(message_id))
+
+        self.assertEqual([m for m in range(5) if m in cache], [2, 3, 4])
+        self.assertEqual(cache.stats()["evictions"], 2)
+
+    def test_byte_budget_evicts_from_largest_channel(self):
+        size = entry(0).size
+        cache = MessageCache(max_bytes=size * 4)
+        cache.add(entry(100, channel_id=2))
+        for message_id in range(4):
+            cache.add(entry(message_id, channel_id=1))
+
+        # Le salon calme garde son message ; le salon actif perd le plus ancien
+        self.assertIn(100, cache)
+        self.assertNotIn(0, cache)
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+
+    def test_victim_follows_shrinking_channels(self):
+        size = entry(0).size
+        cache = MessageCache(max_bytes=size * 5)
+        for message_id in range(3):
+            cache.add(entry(message_id, channel_id=1))
+        for message_id in range(10, 12):
+            cache.add(entry(message_id, channel_id=2))
+        cache.pop(1)
+        cache.pop(2)  # le salon 1 n'est plus le plus lourd
+        for channel_id in (3, 4, 5):
+            cache.add(entry(20 + channel_id, channel_id=channel_id))
+
+        self.assertIn(0, cache)
+        self.assertNotIn(10, cache)
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+
+    def test_largest_channel_matches_full_scan(self):
+        rng = random.Random(7)
+        cache = MessageCache(max_bytes=entry(0).size * 50)
+        for message_id in range(5000):
+            if rng.random() < 0.2 and len(cache):
+                cache.pop(rng.choice(list(cache._messages)))
+            else:
+                cache.add(entry(message_id, channel_id=rng.randrange(40), content="x" * rng.randrange(200)))
+            if cache._channels:
+                largest = max(channel.bytes for channel in cache._channels.values())
+                self.assertEqual(cache._largest_channel()[1].bytes, largest)
+
+        self.assertLessEqual(len(cache._sizes), 2 * len(cache._channels) + 65)
+
+    def test_deleted_ids_are_skipped_on_eviction(self):
+        cache = MessageCache(max_per_channel=2)
+        cache.add(entry(1))
+        cache.add(entry(2))
+        cache.pop(1)
+        cache.add(entry(3))
+
+        self.assertIn(2, cache)
+        self.assertIn(3, cache)
+        self.assertEqual(cache.stats()["evictions"], 0)
+
+    def test_replace_keeps_accounting(self):
+        cache = MessageCache()
+        cache.add(entry(1, content="court"))
+        cache.add(entry(1, content="beaucoup plus long" * 10))
+
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.bytes, cache.get(1).size)
+
+
+if __name__ == "__main__":
+    unittest.main()
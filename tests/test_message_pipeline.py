@@ -0,0 +1,154 @@
+import unittest
+import asyncio
+from unittest.mock import MagicMock
+from cogs.listeners.messages.pipeline import MessageDescriptor, MessagePipeline, DROP_NEWEST, DROP_OLDEST, BLOCK
+
+
+def make_message(message_id, content="Test message"):
+    message = MagicMock()
+    message.id = message_id
+    message.guild.id = 1
+    message.channel.id = 2
+    message.author.id = 3
+    message.content = content
+    return message
+
+
+class TestMessageDescriptor(unittest.TestCase):
+    """Tests pour l'instantané déposé dans la file."""
+
+    def test_keeps_ids_and_attachments_but_not_the_message(self):
+        message = make_message(1)
+        message.attachments = [MagicMock(url="https://cdn.example/a.png", content_type="image/png", size=10)]
+
+        descriptor = MessageDescriptor.from_message(message, 0.0)
+
+        self.assertEqual((descriptor.id, descriptor.guild_id, descriptor.channel_id, descriptor.author_id), (1, 1, 2, 3))
+        self.assertEqual(descriptor.attachments, (("https://cdn.example/a.png", "image/png", 10),))
+        self.assertNotIn("message", MessageDescriptor.__slots__)
+
+
+class TestMessagePipeline(unittest.IsolatedAsyncioTestCase):
+    """Tests pour le pipeline de traitement des messages."""
+
+    async def asyncTearDown(self):
+        await self.pipeline.close()
+
+    async def test_handlers_run_in_order(self):
+        self.pipeline = MessagePipeline(workers=2)
+        calls = []
+
+        async def first(descriptor):
+            calls.append(("first", descriptor.id))
+
+        async def second(descriptor):
+            calls.append(("second", descriptor.id))
+
+        self.pipeline.register(first)
+        self.pipeline.register(second)
+        await self.pipeline.submit(make_message(1))
+        await self.pipeline.join()
+
+        self.assertEqual(calls, [("first", 1), ("second", 1)])
+        stats = self.pipeline.stats()
+        self.assertEqual(stats["processed"], 1)
+        self.assertEqual(stats["depth"], 0)
+        self.assertEqual(stats["handlers"]["first"]["count"], 1)
+
+    async def test_false_stops_chain_and_errors_are_isolated(self):
+        self.pipeline = MessagePipeline(workers=1)
+        seen = []
+
+        async def failing(descriptor):
+            raise RuntimeError("boom")
+
+        async def stop(descriptor):
+            return descriptor.content != "stop"
+
+        async def last(descriptor):
+            seen.append(descriptor.id)
+
+        self.pipeline.register(failing, name="failing")
+        self.pipeline.register(stop, name="stop")
+        self.pipeline.register(last, name="last")
+        await self.pipeline.submit(make_message(1, "stop"))
+        await self.pipeline.submit(make_message(2))
+        await self.pipeline.join()
+
+        self.assertEqual(seen, [2])
+        self.assertEqual(self.pipeline.stats()["handlers"]["failing"]["errors"], 2)
+
+    async def test_descriptor_snapshots_content(self):
+        self.pipeline = MessagePipeline(workers=1)
+        seen = []
+
+        async def handler(descriptor):
+            seen.append(descriptor.content)
+
+        self.pipeline.register(handler)
+        message = make_message(1, "avant")
+        await self.pipeline.submit(message)
+        message.content = "après"
+        await self.pipeline.join()
+
+        self.assertEqual(seen, ["avant"])
+
+    async def _fill(self, policy):
+        self.pipeline = MessagePipeline(workers=1, maxsize=2, policy=policy)
+        release = asyncio.Event()
+        seen = []
+
+        async def handler(descriptor):
+            await release.wait()
+            seen.append(descriptor.id)
+
+        self.pipeline.register(handler)
+        await self.pipeline.submit(make_message(1))
+        await asyncio.sleep(0)  # le worker prend le message 1
+        results = [await self.pipeline.submit(make_message(i)) for i in (2, 3, 4)]
+        release.set()
+        await self.pipeline.join()
+        return results, seen
+
+    async def test_drop_newest_rejects_incoming(self):
+        results, seen = await self._fill(DROP_NEWEST)
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(seen, [1, 2, 3])
+        self.assertEqual(self.pipeline.stats()["dropped"], 1)
+
+    async def test_drop_oldest_evicts_queued(self):
+        results, seen = await self._fill(DROP_OLDEST)
+
+        self.assertEqual(results, [True, True, True])
+        self.assertEqual(seen, [1, 3, 4])
+        self.assertEqual(self.pipeline.stats()["dropped"], 1)
+
+    async def test_block_applies_backpressure(self):
+        self.pipeline = MessagePipeline(workers=1, maxsize=1, policy=BLOCK)
+        release = asyncio.Event()
+
+        async def handler(descriptor):
+            await release.wait()
+
+        self.pipeline.register(handler)
+        await self.pipeline.submit(make_message(1))
+        await asyncio.sleep(0)
+        await self.pipeline.submit(make_message(2))
+        blocked = asyncio.create_task(self.pipeline.submit(make_message(3)))
+        await asyncio.sleep(0.01)
+        self.assertFalse(blocked.done())
+
+        release.set()
+        self.assertTrue(await blocked)
+        await self.pipeline.join()
+        self.assertEqual(self.pipeline.stats()["dropped"], 0)
+
+    def test_unknown_policy(self):
+        self.pipeline = MessagePipeline()
+        with self.assertRaises(ValueError):
+            MessagePipeline(policy="random")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+import os
+from unittest.mock import patch
+from cogs.metrics import Registry, instrumented, track
+
+
+class TestRegistry(unittest.TestCase):
+    """Tests pour le registre de métriques et son export Prometheus."""
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_and_gauge_render(self):
+        commands = self.registry.counter("commands_total", "Commandes", ("command",))
+        commands.inc(command="ban")
+        commands.inc(2, command="ban")
+        self.registry.gauge("queue_depth", "File").set(4)
+
+        self.assertEqual(self.registry.render(), "\n".join([
+            "# HELP commands_total Commandes",
+            "# TYPE commands_total counter",
+            'commands_total{command="ban"} 3',
+            "# HELP queue_depth File",
+            "# TYPE queue_depth gauge",
+            "queue_depth 4",
+        ]) + "\n")
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram("query_seconds", "Requêtes", ("method",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, method="get")
+
+        lines = histogram.render().splitlines()[2:]
+        self.assertEqual(lines, [
+            'query_seconds_bucket{method="get",le="0.1"} 2',
+            'query_seconds_bucket{method="get",le="1.0"} 3',
+            'query_seconds_bucket{method="get",le="+Inf"} 4',
+            'query_seconds_sum{method="get"} 3.65',
+            'query_seconds_count{method="get"} 4',
+        ])
+
+    def test_callbacks_are_summed_and_replaced_by_source(self):
+        hits = self.registry.counter("cache_hits_total", "Succès", ("cache",))
+        hits.add_callback(lambda: {"messages": 5}, "listeners")
+        hits.add_callback(lambda: {"moderators": 2}, "commands")
+        hits.add_callback(lambda: {"messages": 7}, "listeners")  # Rechargement de l'extension
+
+        self.assertEqual(hits.samples(), [("", ("messages",), 7), ("", ("moderators",), 2)])
+
+    def test_label_values_are_escaped(self):
+        self.registry.counter("events_total", "Évènements", ("name",)).inc(name='a"b\\c')
+
+        self.assertIn('events_total{name="a\\"b\\\\c"} 1', self.registry.render())
+
+    def test_wrong_labels_and_conflicting_types_are_rejected(self):
+        counter = self.registry.counter("events_total", "Évènements", ("name",))
+
+        with self.assertRaises(ValueError):
+            counter.inc(other="x")
+        with self.assertRaises(ValueError):
+            self.registry.gauge("events_total", "Évènements", ("name",))
+        self.assertIs(self.registry.counter("events_total", "Évènements", ("name",)), counter)
+
+
+class TestInstrumentation(unittest.IsolatedAsyncioTestCase):
+    """Tests pour les décorateurs et gestionnaires de contexte d'instrumentation."""
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def metric(self, suffix):
+        return self.registry.get(f"diobot_db_{suffix}")
+
+    def test_sync_function_records_duration_and_errors(self):
+        @instrumented("db", registry=self.registry, enabled=True)
+        def query(fail=False):
+            """Requête."""
+            self.assertEqual(self.metric("in_flight").value(name=query.__qualname__), 1)
+            if fail:
+                raise RuntimeError("boom")
+            return 42
+
+        self.assertEqual(query.__doc__, "Requête.")
+        self.assertEqual(query(), 42)
+        with self.assertRaises(RuntimeError):
+            query(fail=True)
+
+        name = query.__qualname__
+        self.assertEqual(self.metric("duration_seconds").value(name=name)["count"], 2)
+        self.assertEqual(self.metric("errors_total").value(name=name), 1)
+        self.assertEqual(self.metric("in_flight").value(name=name), 0)
+
+    async def test_coroutine_and_async_callable_objects(self):
+        class Handler:
+            async def __call__(self, value):
+                return value * 2
+
+        @instrumented("handler", "double", registry=self.registry, enabled=True)
+        async def double(value):
+            return value * 2
+
+        handler = instrumented("handler", "objet", registry=self.registry, enabled=True)(Handler())
+
+        self.assertEqual(await double(2), 4)
+        self.assertEqual(await handler(3), 6)
+        durations = self.registry.get("diobot_handler_duration_seconds")
+        self.assertEqual(durations.value(name="double")["count"], 1)
+        self.assertEqual(durations.value(name="objet")["count"], 1)
+
+    def test_disabled_returns_function_unchanged(self):
+        def query():
+            return 42
+
+        self.assertIs(instrumented("db", registry=self.registry, enabled=False)(query), query)
+        with patch.dict(os.environ, {"METRICS_ENABLED": "0"}):
+            self.assertIs(instrumented("db", registry=self.registry)(query), query)
+            with track("db", "bloc", registry=self.registry):
+                pass
+        self.assertIsNone(self.metric("duration_seconds"))
+
+    def test_track_block(self):
+        with self.assertRaises(ValueError):
+            with track("listener", "on_message", registry=self.registry, enabled=True):
+                raise ValueError("boom")
+
+        self.assertEqual(self.registry.get("diobot_listener_duration_seconds").value(name="on_message")["count"], 1)
+        self.assertEqual(self.registry.get("diobot_listener_errors_total").value(name="on_message"), 1)
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            instrumented("inconnu", registry=self.registry, enabled=True)(lambda: None)
+
+
+if __name__ == "__main__":
+    unittest.main()
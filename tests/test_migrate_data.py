@@ -0,0 +1,94 @@
+import unittest
+import io
+import json
+import os
+import sqlite3
+from unittest.mock import patch
+import migrate_data
+from migrate_data import JsonStream, migrate_json_to_sqlite
+from cogs.database.database import ModerationDB
+
+class TestJsonStream(unittest.TestCase):
+    """Tests pour le lecteur JSON incrémental."""
+
+    def test_items_split_across_tiny_chunks(self):
+        """Les valeurs coupées entre deux blocs sont reconstituées correctement."""
+        document = {"moderators": {"1": {"limit": 12345, "initial_limit": 5}, "2": {"limit": 1.5}},
+                    "other": [1, 2, {"x": "é"}], "history": [{"a": 1}, 123456789, "fin"]}
+        stream = JsonStream(io.StringIO(json.dumps(document, indent=2)), chunk_size=3)
+
+        parsed = {}
+        for key in stream.iter_keys():
+            if key == "moderators":
+                parsed[key] = dict(stream.iter_items())
+            elif key == "history":
+                parsed[key] = list(stream.iter_array())
+            else:
+                parsed[key] = stream.value()
+
+        self.assertEqual(parsed, document)
+        self.assertEqual(stream.peek(), "")
+
+
+class TestMigrateJsonToSqlite(unittest.TestCase):
+    """Tests pour l'import par lots avec point de reprise."""
+
+    def setUp(self):
+        self.json_path = "test_banData.json"
+        self.db_path = "test_migrate.db"
+        ModerationDB(self.db_path).close()
+        data = {
+            "moderators": {str(i): {"limit": i % 5, "initial_limit": 5, "time_reset": "2030-01-01T00:00:00"} for i in range(1, 26)},
+            "history": [{"moderator_id": 1, "user_id": 1000 + i, "username": f"user{i}", "reason": "Spam",
+                         "timestamp": "2023-10-01T12:00:00"} for i in range(40)],
+        }
+        data["moderators"]["99"] = {"limit": 1}  # entrée incomplète ignorée
+        with open(self.json_path, "w") as f:
+            json.dump(data, f)
+
+    def tearDown(self):
+        for path in (self.json_path, self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def count(self, table):
+        conn = sqlite3.connect(self.db_path)
+        result = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        conn.close()
+        return result
+
+    def test_imports_moderators_and_history_in_batches(self):
+        with patch.object(migrate_data._BatchWriter, "flush", autospec=True, side_effect=migrate_data._BatchWriter.flush) as flush:
+            self.assertTrue(migrate_json_to_sqlite(self.json_path, self.db_path, batch_size=10, chunk_size=64))
+
+        self.assertEqual(self.count("moderators"), 25)
+        self.assertEqual(self.count("ban_history"), 40)
+        self.assertEqual(flush.call_count, 7)  # 65 lignes par lots de 10 + lot final
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(conn.execute("SELECT MIN(timestamp) FROM ban_history").fetchone()[0], 1696161600)
+        conn.close()
+
+    def test_resume_from_checkpoint_after_interruption(self):
+        original_flush = migrate_data._BatchWriter.flush
+        calls = []
+
+        def failing_flush(writer, completed=False):
+            calls.append(completed)
+            if len(calls) == 4:
+                raise RuntimeError("interruption")
+            original_flush(writer, completed)
+
+        with patch.object(migrate_data._BatchWriter, "flush", failing_flush):
+            self.assertFalse(migrate_json_to_sqlite(self.json_path, self.db_path, batch_size=10))
+        self.assertEqual(self.count("ban_history"), 5)
+
+        self.assertTrue(migrate_json_to_sqlite(self.json_path, self.db_path, batch_size=10))
+        self.assertEqual(self.count("moderators"), 25)
+        self.assertEqual(self.count("ban_history"), 40)
+
+        # Une exécution supplémentaire ne duplique pas l'historique
+        self.assertTrue(migrate_json_to_sqlite(self.json_path, self.db_path, batch_size=10))
+        self.assertEqual(self.count("ban_history"), 40)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+import sqlite3
+import os
+from cogs.database.database import (
+    ModerationDB,
+    SELECT_MODERATOR,
+    SELECT_BAN_HISTORY,
+    SELECT_BAN_HISTORY_BY_MODERATOR,
+    SELECT_BANS_FOR_USER,
+    SELECT_BAN_HISTORY_PAGE,
+    SELECT_BAN_HISTORY_PAGE_BY_MODERATOR,
+    SELECT_PENDING_UNBANS,
+)
+from cogs.database.migrations import MIGRATIONS, migrate, get_schema_version
+
+class TestMigrations(unittest.TestCase):
+    """Tests pour les migrations versionnées du schéma."""
+
+    def setUp(self):
+        self.db_path = "test_migrations.db"
+
+    def tearDown(self):
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_fresh_database_reaches_latest_version(self):
+        """Une base vierge est migrée jusqu'à la dernière version."""
+        db = ModerationDB(self.db_path)
+        db.close()
+
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(get_schema_version(conn), MIGRATIONS[-1][0])
+        self.assertEqual(migrate(conn), [])  # idempotent
+        conn.close()
+
+    def test_legacy_init_db_schema_is_upgraded(self):
+        """Une base créée par l'ancien init_db.py (sans username, dates texte) est mise à niveau."""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE moderators (user_id INTEGER PRIMARY KEY, ban_limit INTEGER, initial_limit INTEGER, reset_date TEXT)")
+        conn.execute('''CREATE TABLE ban_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, moderator_id INTEGER, banned_user_id INTEGER,
+            banned_user_name TEXT, reason TEXT, timestamp TEXT,
+            FOREIGN KEY (moderator_id) REFERENCES moderators (user_id))''')
+        conn.execute("INSERT INTO ban_history (moderator_id, banned_user_id, banned_user_name, reason, timestamp) "
+                     "VALUES (1, 2, 'TestUser', 'Spam', '2023-10-01 12:00:00')")
+        conn.commit()
+        conn.close()
+
+        db = ModerationDB(self.db_path)
+        history = db.get_ban_history(moderator_id=1)
+        self.assertTrue(db.set_moderator_data(1, 5, 5, None, "TestMod"))
+        db.close()
+
+        self.assertEqual(history[0][5], 1696161600)
+
+    def test_legacy_rows_are_attached_to_guild_zero(self):
+        """Les données antérieures au partitionnement sont rattachées au serveur 0."""
+        conn = sqlite3.connect(self.db_path)
+        migrate(conn, MIGRATIONS[:3])
+        conn.execute("INSERT INTO moderators (user_id, ban_limit, initial_limit, reset_date, username) VALUES (1, 3, 5, NULL, 'mod')")
+        conn.execute("INSERT INTO ban_history (moderator_id, banned_user_id, banned_user_name, reason) VALUES (1, 2, 'TestUser', NULL)")
+        conn.commit()
+        conn.close()
+
+        legacy, other = ModerationDB(self.db_path), ModerationDB(self.db_path, guild_id=42)
+        try:
+            self.assertEqual(legacy.get_moderator_data(1)["ban_limit"], 3)
+            self.assertEqual(len(legacy.get_ban_history(moderator_id=1)), 1)
+            self.assertIsNone(other.get_moderator_data(1))
+            self.assertEqual(other.get_ban_history(moderator_id=1), [])
+        finally:
+            legacy.close()
+            other.close()
+
+    def test_new_bans_store_epoch_timestamps(self):
+        """Les nouveaux bannissements sont horodatés en epoch entier."""
+        db = ModerationDB(self.db_path)
+        db.add_ban_to_history(1, 2, "TestUser", None)
+        record = db.get_ban_history(moderator_id=1)[0]
+        db.close()
+
+        self.assertIsInstance(record[5], int)
+
+
+class TestQueryPlans(unittest.TestCase):
+    """Les requêtes fréquentes doivent utiliser un index, jamais un parcours complet."""
+
+    def setUp(self):
+        self.db_path = "test_query_plans.db"
+        self.db = ModerationDB(self.db_path)
+        self.conn = sqlite3.connect(self.db_path)
+
+    def tearDown(self):
+        self.conn.close()
+        self.db.close()
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def query_plan(self, sql, params=()):
+        return [row[3] for row in self.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+    def assert_no_scan(self, sql, params=()):
+        plan = self.query_plan(sql, params)
+        for detail in plan:
+            self.assertFalse(detail.startswith("SCAN"), f"Parcours complet: {plan}")
+            self.assertNotIn("TEMP B-TREE", detail, f"Tri en mémoire: {plan}")
+        return plan
+
+    def test_moderator_lookup_uses_primary_key(self):
+        plan = self.assert_no_scan(SELECT_MODERATOR, (10, 1))
+        self.assertIn("sqlite_autoindex_moderators_1", plan[0])
+
+    def test_history_by_moderator_uses_composite_index(self):
+        plan = self.assert_no_scan(SELECT_BAN_HISTORY_BY_MODERATOR, (10, 1))
+        self.assertIn("idx_ban_history_moderator", plan[0])
+
+    def test_bans_for_user_uses_index(self):
+        plan = self.assert_no_scan(SELECT_BANS_FOR_USER, (10, 1))
+        self.assertIn("idx_ban_history_banned_user", plan[0])
+
+    def test_history_page_by_moderator_uses_composite_index(self):
+        plan = self.assert_no_scan(SELECT_BAN_HISTORY_PAGE_BY_MODERATOR, (10, 1, 100, 10))
+        self.assertIn("idx_ban_history_moderator", plan[0])
+
+    def test_history_page_is_a_rowid_range(self):
+        plan = self.assert_no_scan(SELECT_BAN_HISTORY_PAGE, (10, 100, 10))
+        self.assertIn("idx_ban_history_guild", plan[0])
+        self.assertIn("guild_id=? AND id<?", plan[0])
+
+    def test_pending_unbans_use_partial_index(self):
+        plan = self.assert_no_scan(SELECT_PENDING_UNBANS, (10,))
+        self.assertIn("idx_ban_history_expiry", plan[0])
+
+    def test_full_history_is_ordered_by_rowid(self):
+        plan = self.assert_no_scan(SELECT_BAN_HISTORY, (10,))
+        self.assertIn("idx_ban_history_guild", plan[0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import os
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from cogs.database.database import ModerationDB
+from cogs.database.cache import ModeratorCache, ModeratorRecord
+
+class TestModeratorCache(unittest.TestCase):
+    """Tests pour le cache LRU des modérateurs."""
+
+    def test_bounded_size_and_counters(self):
+        """Le cache évince les entrées les moins récemment utilisées."""
+        cache = ModeratorCache(capacity=2)
+        for user_id in (1, 2, 3):
+            cache.put(ModeratorRecord(user_id, 5, 5, None, f"mod{user_id}"))
+
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.get(3).username, "mod3")
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+        self.assertEqual(len(cache), 2)
+
+    def test_stale_read_is_not_cached(self):
+        """Une lecture commencée avant une écriture n'écrase pas le cache."""
+        cache = ModeratorCache()
+        generation = cache.generation
+        cache.discard(1)  # écriture concurrente
+        cache.load(ModeratorRecord(1, 5, 5, None, "old"), generation)
+
+        self.assertIsNone(cache.get(1))
+
+    def test_record_keeps_mapping_access(self):
+        record = ModeratorRecord(1, 4, 5, None, "mod")
+
+        self.assertEqual(record["ban_limit"], 4)
+        self.assertEqual(record.get("missing", 0), 0)
+        self.assertFalse(hasattr(record, "__dict__"))
+
+
+class TestModerationDBCache(unittest.TestCase):
+    """Le cache est tenu à jour par les écritures de ModerationDB."""
+
+    def setUp(self):
+        self.db_path = "test_moderator_cache.db"
+        self.db = ModerationDB(self.db_path)
+        self.reset_date = (datetime.utcnow() + timedelta(days=30)).isoformat()
+        self.db.set_moderator_data(1, 3, 3, self.reset_date, "TestMod")
+
+    def tearDown(self):
+        self.db.close()
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_repeated_quota_checks_skip_database(self):
+        """Les lectures répétées ne touchent pas la base."""
+        with patch.object(self.db._pool, "connection", side_effect=AssertionError("accès base")):
+            for _ in range(5):
+                self.assertEqual(self.db.get_moderator_data(1)["ban_limit"], 3)
+
+        self.assertEqual(self.db.moderator_cache.stats()["hits"], 5)
+
+    def test_writes_update_cache(self):
+        """update, consume_ban et delete sont répercutés dans le cache."""
+        self.db.update_moderator_ban_limit(1, 2)
+        self.assertEqual(self.db.get_moderator_data(1)["ban_limit"], 2)
+
+        self.db.consume_ban(1, 42, "TestUser", None)
+        self.assertEqual(self.db.get_moderator_data(1)["ban_limit"], 1)
+
+        self.db.delete_moderator(1)
+        self.assertIsNone(self.db.get_moderator_data(1))
+
+    def test_miss_loads_from_database(self):
+        """Un modérateur absent du cache est lu en base puis mis en cache."""
+        self.db.moderator_cache.clear()
+
+        self.assertEqual(self.db.get_moderator_data(1)["username"], "TestMod")
+        self.assertEqual(self.db.moderator_cache.stats()["misses"], 1)
+        self.assertEqual(len(self.db.moderator_cache), 1)
+
+    def test_ban_limits_served_from_cache_once_loaded(self):
+        """/banlimits ne relit pas la table une fois le cache complet."""
+        self.db.moderator_cache.clear()
+        first = self.db.get_all_moderators_with_ban_limits()
+
+        with patch.object(self.db._pool, "connection", side_effect=AssertionError("accès base")):
+            second = self.db.get_all_moderators_with_ban_limits()
+
+        self.assertEqual(first, [("TestMod", 3, self.reset_date)])
+        self.assertEqual(first, second)
+
+if __name__ == "__main__":
+    unittest.main()
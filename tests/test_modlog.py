@@ -0,0 +1,76 @@
+import unittest
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+from cogs.listeners.messages.cache import CachedMessage
+from cogs.listeners.messages.modlog import ModLog, build_payload
+
+
+def entry(message_id, content="Message supprimé"):
+    return CachedMessage(message_id, 1, 2, 42, "TestUser", content)
+
+
+class TestModLog(unittest.IsolatedAsyncioTestCase):
+    """Tests pour le regroupement du journal de modération."""
+
+    def setUp(self):
+        self.bot = MagicMock()
+        self.log_channel = AsyncMock()
+        self.bot.get_channel.return_value = self.log_channel
+        self.db = AsyncMock()
+        self.db.get_guild_settings.return_value = {"modlog_channel_id": 555, "modlog_webhook_url": None}
+        self.databases = MagicMock()
+        self.databases.for_guild.return_value = self.db
+
+    async def test_deletions_are_coalesced_per_interval(self):
+        modlog = ModLog(self.bot, self.databases, interval=0.01)
+        for message_id in range(5):
+            modlog.add(1, entry(message_id))
+
+        await asyncio.sleep(0.05)
+
+        self.log_channel.send.assert_awaited_once()
+        self.assertEqual(len(self.log_channel.send.call_args.kwargs["embeds"]), 5)
+        self.assertEqual(modlog.stats(), {"events": 5, "flushes": 1, "dropped": 0, "pending": 0})
+        self.db.get_guild_settings.assert_awaited_once()
+
+    async def test_size_threshold_flushes_immediately(self):
+        modlog = ModLog(self.bot, self.databases, interval=60, max_events=3)
+        for message_id in range(3):
+            modlog.add(1, entry(message_id))
+
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        self.log_channel.send.assert_awaited_once()
+        await modlog.close()
+
+    async def test_no_destination_drops_events(self):
+        self.db.get_guild_settings.return_value = {}
+        modlog = ModLog(self.bot, self.databases, interval=60)
+        modlog.add(1, entry(1))
+
+        await modlog.close()
+
+        self.log_channel.send.assert_not_awaited()
+        self.assertEqual(modlog.stats()["dropped"], 1)
+
+    def test_large_flush_uses_a_file(self):
+        payload = build_payload([entry(i) for i in range(11)])
+
+        self.assertIn("file", payload)
+        self.assertEqual(payload["embed"].description, "11 message(s) supprimé(s), détail en pièce jointe.")
+        self.assertIn(b"TestUser (42): Message supprim", payload["file"].fp.read())
+
+    def test_long_contents_use_a_file(self):
+        payload = build_payload([entry(i, "x" * 4000) for i in range(2)])
+
+        self.assertIn("file", payload)
+
+    def test_small_flush_uses_embeds(self):
+        payload = build_payload([entry(1), entry(2)])
+
+        self.assertEqual(len(payload["embeds"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
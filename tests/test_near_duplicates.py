@@ -0,0 +1,125 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+from cogs.listeners.messages.near_duplicates import NearDuplicateIndex, RaidGuard, simhash
+from cogs.listeners.messages.term_filter import normalize
+from cogs.utils import hamming
+from helpers import FakeClock, make_descriptor, partial_messages
+
+RAID_TEXT = "rejoignez notre serveur gratuit discord.gg/promo maintenant !!"
+
+
+
+def fingerprint(text):
+    return simhash(normalize(text))
+
+
+class TestSimHash(unittest.TestCase):
+    """Tests pour les empreintes SimHash."""
+
+    def test_near_duplicates_are_close(self):
+        a = fingerprint(RAID_TEXT)
+        b = fingerprint(RAID_TEXT.replace("maintenant", "maintenant."))
+
+        self.assertLessEqual(hamming(a, b), 10)
+        self.assertGreater(hamming(a, fingerprint("une discussion sans aucun rapport avec le reste")), 10)
+
+    def test_same_text_same_fingerprint(self):
+        self.assertEqual(fingerprint(RAID_TEXT), fingerprint(RAID_TEXT.upper()))
+
+
+class TestNearDuplicateIndex(unittest.TestCase):
+    """Tests pour l'index LSH borné des empreintes."""
+
+    def test_finds_close_fingerprints_within_window(self):
+        index = NearDuplicateIndex(window=10, distance=3)
+        index.observe(1, 2, 100, "a", 1, 0b1111, now=0)
+
+        self.assertEqual(len(index.observe(1, 2, 101, "b", 2, 0b0111, now=1)), 1)
+        # Un autre serveur ne partage pas les seaux
+        self.assertEqual(index.observe(9, 2, 102, "c", 3, 0b1111, now=1), [])
+        # Hors fenêtre
+        self.assertEqual(index.observe(1, 2, 103, "d", 4, 0b1111, now=20), [])
+
+    def test_distance_beyond_threshold_is_ignored(self):
+        index = NearDuplicateIndex(distance=3)
+        index.observe(1, 2, 100, "a", 1, 0, now=0)
+
+        self.assertEqual(index.observe(1, 2, 101, "b", 2, 0b1111, now=0), [])
+
+    def test_memory_is_bounded(self):
+        index = NearDuplicateIndex(window=1000, max_entries=5)
+        for i in range(50):
+            index.observe(1, 2, i, "a", i, i << 20, now=i)
+
+        self.assertEqual(index.stats()["entries"], 5)
+        self.assertLessEqual(index.stats()["buckets"], 5 * 4)
+
+    def test_distance_must_be_below_bands(self):
+        with self.assertRaises(ValueError):
+            NearDuplicateIndex(distance=4)
+
+
+class TestRaidGuard(unittest.IsolatedAsyncioTestCase):
+    """Tests pour la détection des raids."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bot = MagicMock()
+        self.bot.user.id = 999
+        self.modlog = MagicMock()
+        self.modlog.report = AsyncMock()
+        self.messages = partial_messages(self.bot)
+
+    def descriptor(self, author_id, content=RAID_TEXT, message_id=None):
+        return make_descriptor(content, message_id=message_id or author_id, guild_id=1, author_id=author_id,
+                               author_name=f"user{author_id}")
+
+    async def test_reports_cluster_from_distinct_authors(self):
+        guard = RaidGuard(self.bot, NearDuplicateIndex(clock=self.clock), self.modlog, min_authors=3)
+
+        # Le même auteur qui se répète n'est pas un raid
+        for _ in range(3):
+            self.assertTrue(await guard(self.descriptor(1)))
+        self.modlog.report.assert_not_awaited()
+
+        await guard(self.descriptor(2))
+        await guard(self.descriptor(3, RAID_TEXT + " ;)"))
+        self.modlog.report.assert_awaited_once()
+        embed = self.modlog.report.call_args[0][1]
+        self.assertIn("<@3>", embed.fields[0].value)
+        self.assertIn("<@1>", embed.fields[0].value)
+
+        # Un compte déjà signalé ne génère pas de nouveau signalement
+        await guard(self.descriptor(3, message_id=50))
+        self.assertEqual(self.modlog.report.await_count, 1)
+        self.assertEqual(guard.stats()["raids"], 1)
+
+    async def test_short_messages_are_ignored(self):
+        guard = RaidGuard(self.bot, NearDuplicateIndex(clock=self.clock), self.modlog, min_authors=2)
+
+        for author_id in range(5):
+            self.assertTrue(await guard(self.descriptor(author_id, "salut")))
+        self.assertEqual(guard.index.stats()["entries"], 0)
+
+    async def test_delete_and_ban_through_bot_quota(self):
+        db = AsyncMock()
+        db.get_moderator_data.return_value = {"ban_limit": 10}
+        databases = MagicMock()
+        databases.for_guild.return_value = db
+        dispatcher = MagicMock()
+        dispatcher.ban = AsyncMock()
+        dispatcher.moderator_lock.return_value = MagicMock(__aenter__=AsyncMock(), __aexit__=AsyncMock(return_value=False))
+        guard = RaidGuard(self.bot, NearDuplicateIndex(clock=self.clock), self.modlog,
+                          actions=("delete", "ban"), databases=databases, dispatcher=dispatcher, min_authors=2)
+
+        self.assertTrue(await guard(self.descriptor(1)))
+        self.assertFalse(await guard(self.descriptor(2)))
+
+        self.assertEqual(sorted(call.args[1].id for call in dispatcher.ban.await_args_list), [1, 2])
+        self.assertEqual(db.consume_ban.await_count, 2)
+        # Le message courant et celui du compte déjà vu sont supprimés
+        self.assertEqual(sorted(message_id for message_id, message in self.messages.items() if message.delete.await_count), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
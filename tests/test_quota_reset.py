@@ -0,0 +1,133 @@
+import unittest
+import asyncio
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+from datetime import datetime, timedelta
+from cogs.database import GuildDatabases
+from cogs.database.database import ModerationDB
+from cogs.scheduling import DeadlineScheduler
+from cogs.commands.moderation.ban.quota_reset import QuotaResetScheduler
+
+class TestDeadlineScheduler(unittest.IsolatedAsyncioTestCase):
+    """Tests pour le min-heap d'échéances."""
+
+    async def test_pop_due_in_order_and_ignores_stale_entries(self):
+        scheduler = DeadlineScheduler(clock=lambda: 100)
+        scheduler.schedule("a", 50)
+        scheduler.schedule("b", 20)
+        scheduler.schedule("c", 200)
+        scheduler.schedule("a", 300)  # reprogrammé : l'ancienne entrée est ignorée
+
+        self.assertEqual(scheduler.pop_due(), ["b"])
+        self.assertEqual(scheduler.next_deadline(), 200)
+        self.assertEqual(len(scheduler), 2)
+
+    async def test_wait_due_wakes_for_earlier_deadline(self):
+        loop = asyncio.get_running_loop()
+        scheduler = DeadlineScheduler(clock=loop.time)
+        scheduler.schedule("late", loop.time() + 3600)
+        waiter = asyncio.create_task(scheduler.wait_due())
+        await asyncio.sleep(0)
+
+        scheduler.schedule("soon", loop.time() + 0.01)
+
+        self.assertEqual(await asyncio.wait_for(waiter, 1), ["soon"])
+
+
+class TestResetDueModerators(unittest.TestCase):
+    """Tests pour la réinitialisation ensembliste des quotas."""
+
+    def setUp(self):
+        self.db_path = "test_quota_reset.db"
+        self.db = ModerationDB(self.db_path)
+
+    def tearDown(self):
+        self.db.close()
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_resets_only_due_moderators_with_their_interval(self):
+        now = datetime(2024, 1, 10, 12, 0, 0)
+        self.db.set_moderator_data(1, 5, 0, "2024-01-09T12:00:00", "mod1", reset_interval_days=7)
+        self.db.set_moderator_data(2, 3, 1, "2024-01-10T11:59:59.500000", "mod2", reset_interval_days=2)
+        self.db.set_moderator_data(3, 4, 2, "2024-01-11T00:00:00", "mod3", reset_interval_days=1)
+
+        reset = self.db.reset_due_moderators(now)
+
+        self.assertEqual(sorted(reset), [(1, "2024-01-17T12:00:00"), (2, "2024-01-12T12:00:00")])
+        self.assertEqual(self.db.get_moderator_data(1)["ban_limit"], 5)
+        self.assertEqual(self.db.get_moderator_data(2)["reset_date"], "2024-01-12T12:00:00")
+        self.assertEqual(self.db.get_moderator_data(3)["ban_limit"], 2)
+
+    def test_setban_interval_is_preserved_on_update(self):
+        self.db.set_moderator_data(1, 5, 5, "2024-01-09T12:00:00", "mod1", reset_interval_days=7)
+        self.db.set_moderator_data(1, 5, 4, "2024-01-09T12:00:00", "mod1")
+
+        self.assertEqual(self.db.get_moderator_data(1)["reset_interval_days"], 7)
+
+
+class TestQuotaResetScheduler(unittest.IsolatedAsyncioTestCase):
+    """Tests pour la tâche de fond de réinitialisation."""
+
+    def setUp(self):
+        self.db_path = "test_quota_scheduler.db"
+        self.databases = GuildDatabases(self.db_path)
+
+    def tearDown(self):
+        self.databases.close()
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def test_overdue_quota_is_reset_on_startup(self):
+        past = (datetime.utcnow() - timedelta(days=1)).isoformat()
+        future = (datetime.utcnow() + timedelta(days=3)).isoformat()
+        guild_a, guild_b = self.databases.for_guild(111), self.databases.for_guild(222)
+        await guild_a.set_moderator_data(1, 5, 0, past, "mod1", reset_interval_days=7)
+        await guild_a.set_moderator_data(2, 5, 1, future, "mod2", reset_interval_days=7)
+        await guild_b.set_moderator_data(1, 3, 0, past, "mod1", reset_interval_days=7)
+        scheduler = QuotaResetScheduler(MagicMock(), self.databases)
+
+        await scheduler.cog_load()
+        for _ in range(50):
+            if (await guild_b.get_moderator_data(1))["ban_limit"] == 3:
+                break
+            await asyncio.sleep(0.01)
+        await scheduler.cog_unload()
+
+        self.assertEqual((await guild_a.get_moderator_data(1))["ban_limit"], 5)
+        self.assertEqual((await guild_a.get_moderator_data(2))["ban_limit"], 1)
+        self.assertEqual((await guild_b.get_moderator_data(1))["ban_limit"], 3)
+        self.assertEqual(len(scheduler.deadlines), 3)
+        self.assertIn((222, 1), scheduler.deadlines)
+
+    async def test_recovers_from_database_errors(self):
+        past = (datetime.utcnow() - timedelta(days=1)).isoformat()
+        guild = self.databases.for_guild(111)
+        await guild.set_moderator_data(1, 5, 0, past, "mod1", reset_interval_days=7)
+        databases = MagicMock(for_guild=self.databases.for_guild)
+        databases.guild_ids = AsyncMock(side_effect=[RuntimeError("base indisponible"), [111]])
+        scheduler = QuotaResetScheduler(MagicMock(), databases)
+
+        with patch("cogs.commands.moderation.ban.quota_reset.RETRY_DELAY", 0):
+            await scheduler.cog_load()
+            for _ in range(50):
+                if (await guild.get_moderator_data(1))["ban_limit"] == 5:
+                    break
+                await asyncio.sleep(0.01)
+            self.assertFalse(scheduler._task.done())
+            await scheduler.cog_unload()
+
+        self.assertEqual((await guild.get_moderator_data(1))["ban_limit"], 5)
+
+    async def test_schedule_ignores_invalid_dates(self):
+        scheduler = QuotaResetScheduler(MagicMock(), MagicMock())
+
+        scheduler.schedule(111, 1, "pas une date")
+        scheduler.schedule(111, 2, None)
+
+        self.assertEqual(len(scheduler.deadlines), 0)
+
+if __name__ == "__main__":
+    unittest.main()
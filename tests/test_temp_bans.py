@@ -0,0 +1,77 @@
+import unittest
+import asyncio
+import os
+import time
+from unittest.mock import AsyncMock, MagicMock
+import discord
+from cogs.database import GuildDatabases
+from cogs.commands.moderation.ban.dispatcher import BanDispatcher
+from cogs.commands.moderation.ban.temp_bans import TempBanScheduler, parse_duration
+
+class TestParseDuration(unittest.TestCase):
+    """Tests pour la lecture des durées de ban."""
+
+    def test_valid_durations(self):
+        self.assertEqual(parse_duration("30m"), 1800)
+        self.assertEqual(parse_duration("1d12h"), 129600)
+        self.assertEqual(parse_duration(" 2W "), 1209600)
+
+    def test_invalid_durations(self):
+        for text in ("", "12", "abc", "1d-2h", "0h"):
+            with self.assertRaises(ValueError):
+                parse_duration(text)
+
+
+class TestTempBanScheduler(unittest.IsolatedAsyncioTestCase):
+    """Tests pour la levée des bans temporaires."""
+
+    def setUp(self):
+        self.db_path = "test_temp_bans.db"
+        self.databases = GuildDatabases(self.db_path)
+        self.dispatcher = BanDispatcher()
+        self.guild = MagicMock(id=111)
+        self.guild.unban = AsyncMock()
+        self.bot = MagicMock()
+        self.bot.wait_until_ready = AsyncMock()
+        self.bot.get_guild.side_effect = lambda guild_id: self.guild if guild_id == 111 else None
+
+    async def asyncTearDown(self):
+        await self.dispatcher.close()
+        self.databases.close()
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def test_overdue_bans_are_lifted_on_startup(self):
+        db = self.databases.for_guild(111)
+        await db.set_moderator_data(1, 10, 10, None, "mod")
+        now = int(time.time())
+        for user_id in range(5):
+            await db.consume_ban(1, 1000 + user_id, f"user{user_id}", None, expires_at=now - 60)
+        await db.consume_ban(1, 2000, "later", None, expires_at=now + 3600)
+        await db.consume_ban(1, 3000, "forever", None)
+        self.guild.unban.side_effect = [None, None, discord.NotFound(MagicMock(status=404), "inconnu"), None, None]
+        scheduler = TempBanScheduler(self.bot, self.databases, self.dispatcher, batch_size=2)
+
+        await scheduler.cog_load()
+        for _ in range(100):
+            if len(await db.get_pending_unbans()) == 1:
+                break
+            await asyncio.sleep(0.01)
+        await scheduler.cog_unload()
+
+        self.assertEqual(self.guild.unban.await_count, 5)
+        self.assertEqual([row[1] for row in await db.get_pending_unbans()], [2000])
+        self.assertEqual(len(scheduler.deadlines), 1)
+
+    async def test_failed_unbans_are_rescheduled(self):
+        scheduler = TempBanScheduler(self.bot, self.databases, self.dispatcher)
+        self.guild.unban.side_effect = discord.Forbidden(MagicMock(status=403), "interdit")
+
+        await scheduler.lift([(111, 1, 1000), (222, 2, 2000)])
+
+        self.assertIn((111, 1, 1000), scheduler.deadlines)
+        self.assertIn((222, 2, 2000), scheduler.deadlines)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+from cogs.listeners.messages.term_filter import TermAutomaton, TermFilter, normalize
+from helpers import make_descriptor, partial_messages
+
+
+class TestTermAutomaton(unittest.TestCase):
+    """Tests pour l'automate d'Aho-Corasick des termes interdits."""
+
+    def test_normalize(self):
+        self.assertEqual(normalize("  ÉCOLE   Fr4nç@ise "), "ecole francaise")
+
+    def test_finds_terms_with_case_accents_and_leetspeak(self):
+        automaton = TermAutomaton(["arnaque", "mot interdit", "crétin"])
+
+        self.assertEqual(automaton.find("Quelle ARN4QUE !"), "arnaque")
+        self.assertEqual(automaton.find("c'est un   MOT   1nterdit"), "mot interdit")
+        self.assertEqual(automaton.find("espèce de cretin"), "cretin")
+        self.assertIsNone(automaton.find("rien à signaler"))
+
+    def test_whole_words_only(self):
+        automaton = TermAutomaton(["ass"])
+
+        self.assertIsNone(automaton.find("first class"))
+        self.assertEqual(automaton.find("you ass."), "ass")
+
+    def test_trailing_punctuation_is_a_boundary(self):
+        automaton = TermAutomaton(["arnaque", "scam"])
+
+        self.assertEqual(automaton.find("une arnaque!"), "arnaque")
+        self.assertEqual(automaton.find("scam!!"), "scam")
+        self.assertEqual(automaton.find("c'est une arnaque?"), "arnaque")
+        self.assertEqual(automaton.find("encore un scam."), "scam")
+        self.assertEqual(automaton.find("!!scam"), "scam")
+
+    def test_leet_symbols_inside_words_are_letters(self):
+        automaton = TermAutomaton(["sc", "scam", "ass"])
+
+        self.assertEqual(automaton.find("sc@m"), "scam")
+        self.assertEqual(automaton.find("$cam"), "scam")
+        self.assertEqual(automaton.find("you a$$!"), "ass")
+        self.assertIsNone(automaton.find("cla$$"))
+
+    def test_overlapping_terms_via_failure_links(self):
+        automaton = TermAutomaton(["he", "she", "hers", "his"])
+
+        self.assertEqual(automaton.find("ushers"), None)
+        self.assertEqual(automaton.find("u she rs"), "she")
+        self.assertEqual(automaton.find("ushe hers"), "hers")
+
+    def test_longer_term_does_not_hide_shorter_one(self):
+        # « abcd » échoue sur « abce » : le lien d'échec doit retrouver « bce »
+        automaton = TermAutomaton(["abcd", "bce"])
+
+        self.assertEqual(automaton.find("x abce"), None)
+        self.assertEqual(automaton.find("a bce"), "bce")
+
+    def test_empty_automaton(self):
+        automaton = TermAutomaton([])
+
+        self.assertEqual(len(automaton), 0)
+        self.assertIsNone(automaton.find("n'importe quoi"))
+
+
+class TestTermFilter(unittest.IsolatedAsyncioTestCase):
+    """Tests pour le filtre des messages par serveur."""
+
+    def setUp(self):
+        self.db = AsyncMock()
+        self.db.get_banned_terms.return_value = ["arnaque"]
+        self.databases = MagicMock()
+        self.databases.for_guild.return_value = self.db
+        bot = MagicMock()
+        self.messages = partial_messages(bot)
+        self.filter = TermFilter(bot, self.databases)
+
+    def descriptor(self, content):
+        return make_descriptor(content)
+
+    async def test_deletes_matching_message_and_stops_chain(self):
+        descriptor = self.descriptor("une arnaque")
+
+        self.assertFalse(await self.filter(descriptor))
+        self.messages[descriptor.id].delete.assert_awaited_once()
+        self.assertTrue(await self.filter(self.descriptor("bonjour")))
+        # L'automate du serveur n'est compilé qu'une fois
+        self.db.get_banned_terms.assert_awaited_once()
+
+    async def test_update_event_recompiles_guild_automaton(self):
+        self.assertTrue(await self.filter(self.descriptor("un spam")))
+
+        self.db.get_banned_terms.return_value = ["arnaque", "spam"]
+        await self.filter.on_banned_terms_update(10)
+
+        self.assertFalse(await self.filter(self.descriptor("un spam")))
+        self.databases.for_guild.assert_called_with(10)
+
+
+if __name__ == "__main__":
+    unittest.main()
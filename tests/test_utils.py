@@ -2,7 +2,7 @@ import unittest
 from datetime import datetime, timedelta
 import sqlite3
 import os
-from cogs.utils import check_and_reset_limit, format_date
+from cogs.utils import check_and_reset_limit, format_date, hamming
 from cogs.database.database import ModerationDB
 
 class TestUtils(unittest.TestCase):
@@ -19,9 +19,11 @@ class TestUtils(unittest.TestCase):
     
     def tearDown(self):
         """Nettoyage après chaque test."""
-        # Supprimer le fichier de base de données temporaire
-        if os.path.exists(self.db_path):
-            os.remove(self.db_path)
+        # Fermer les connexions persistantes puis supprimer les fichiers temporaires
+        self.db.close()
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
     
     def test_format_date(self):
         """Test de la fonction format_date."""
@@ -34,6 +36,12 @@ class TestUtils(unittest.TestCase):
         # Vérification du résultat - corriger l'assertion selon le format réel
         self.assertEqual(result, "31/12/2023 23:59")  # Ajuster selon le format réel de votre fonction
     
+    def test_hamming(self):
+        """Test de la distance de Hamming entre empreintes."""
+        self.assertEqual(hamming(0, 0), 0)
+        self.assertEqual(hamming(0b1011, 0b0001), 2)
+        self.assertEqual(hamming(0, (1 << 64) - 1), 64)
+
     def test_check_and_reset_limit_not_expired(self):
         """Test de la fonction check_and_reset_limit quand la date n'est pas expirée."""
         # Données de test